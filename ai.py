@@ -0,0 +1,114 @@
+from flask import Blueprint, request, jsonify
+from src.models.job import AIJob
+from src.services.embeddings import get_semantic_index
+from src.services.llm_cache import get_llm_cache
+from src.services.model_router import get_model_router
+from src.services.prompt_builder import get_prompt_builder
+from src.services.resilience import get_resilience_policy
+from src.services.singleflight import get_singleflight
+
+ai_bp = Blueprint('ai', __name__)
+
+@ai_bp.route('/ai/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Retourne les compteurs du cache de réponses LLM."""
+    try:
+        return jsonify(get_llm_cache().stats())
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@ai_bp.route('/ai/cache', methods=['DELETE'])
+def clear_cache():
+    """Vide le cache de réponses LLM."""
+    try:
+        get_llm_cache().clear()
+        return jsonify({'message': 'Cache vidé', 'status': 'success'})
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@ai_bp.route('/ai/semantic-index', methods=['GET'])
+def get_semantic_index_stats():
+    """Taille et état de l'index des plongements (candidats et offres)."""
+    try:
+        return jsonify(get_semantic_index().stats())
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@ai_bp.route('/ai/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Retourne l'état d'un job d'analyse IA en arrière-plan."""
+    try:
+        job = AIJob.query.get_or_404(job_id)
+        return jsonify(job.to_dict())
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@ai_bp.route('/ai/jobs', methods=['GET'])
+def get_jobs():
+    """Liste les jobs d'analyse IA, filtrables par statut, type et cible."""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        
+        query = AIJob.query
+        
+        for field in ['status', 'job_type']:
+            if request.args.get(field):
+                query = query.filter_by(**{field: request.args[field]})
+        
+        if request.args.get('target_id'):
+            query = query.filter_by(target_id=request.args.get('target_id', type=int))
+        
+        jobs = query.order_by(AIJob.id.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        
+        return jsonify({
+            'jobs': [job.to_dict() for job in jobs.items],
+            'total': jobs.total,
+            'pages': jobs.pages,
+            'current_page': page
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@ai_bp.route('/ai/prompts/stats', methods=['GET'])
+def get_prompt_stats():
+    """Retourne les compteurs de tokens des prompts (budgets, tokens économisés)."""
+    try:
+        return jsonify(get_prompt_builder().stats())
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@ai_bp.route('/ai/singleflight/stats', methods=['GET'])
+def get_singleflight_stats():
+    """Retourne les compteurs du regroupement des appels LLM identiques."""
+    try:
+        return jsonify(get_singleflight().stats())
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@ai_bp.route('/ai/routing', methods=['GET'])
+def get_routing():
+    """Retourne la politique de routage des modèles et les compteurs par modèle et d'escalade."""
+    try:
+        return jsonify(get_model_router().stats())
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@ai_bp.route('/ai/breakers', methods=['GET'])
+def get_breakers():
+    """Retourne l'état des disjoncteurs par modèle, le budget de retries et les échéances."""
+    try:
+        return jsonify(get_resilience_policy().stats())
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
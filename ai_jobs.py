@@ -0,0 +1,165 @@
+import json
+from typing import Dict
+from src.models.user import db
+from src.models.candidate import JobPosting, Candidate, Application
+from src.models.employee import Employee, PerformanceEvaluation
+from src.models.document import StoredDocument
+from src.services.ai_service import AIService
+from src.services.bulk_scoring import BulkRescorer
+from src.services.match_matrix import MatchMatrix
+from src.services.embeddings import get_semantic_index
+from src.services.job_queue import PermanentJobError, enqueue, job_handler, report_progress
+from src.services.resume_extraction import ExtractionError, get_extraction_pool
+from src.services.document_store import apply_resume_analysis, save_analysis, save_extracted_text
+from src.services.interview_questions import InterviewQuestionGenerator
+from src.services.performance_evaluations import recent_evaluations
+import logging
+
+logger = logging.getLogger(__name__)
+
+ai_service = AIService(raise_errors=True)
+bulk_rescorer = BulkRescorer(ai_service)
+match_matrix = MatchMatrix()
+interview_questions = InterviewQuestionGenerator(ai_service)
+
+
+@job_handler('analyze_application')
+def analyze_application(application_id: int, payload: Dict):
+    """Calcule ai_match_score / ai_analysis d'une candidature."""
+    application = db.session.get(Application, application_id)
+    if application is None:
+        return
+    candidate = db.session.get(Candidate, application.candidate_id)
+    job_posting = db.session.get(JobPosting, application.job_posting_id)
+
+    job_description = f"{job_posting.title}\n{job_posting.description}\n{job_posting.requirements}"
+    resume_text = f"Compétences: {candidate.skills}\nExpérience: {candidate.experience_years} ans\nRésumé: {candidate.ai_summary}"
+
+    ai_analysis = ai_service.analyze_resume(resume_text, job_description)
+    if payload.get('local_match'):
+        ai_analysis['local_match'] = payload['local_match']
+
+    application.ai_match_score = ai_analysis.get('job_match_score', 0)
+    application.ai_analysis = json.dumps(ai_analysis)
+
+
+@job_handler('analyze_candidate')
+def analyze_candidate(candidate_id: int, payload: Dict):
+    """
+    Analyse le CV d'un candidat et renseigne skills / ai_score / ai_summary.
+    Texte fourni dans `resume_text`, ou document stocké (`document_sha256`) dont
+    l'analyse est conservée et réutilisée pour tout nouvel envoi du même fichier.
+    """
+    candidate = db.session.get(Candidate, candidate_id)
+    if candidate is None:
+        return
+
+    document = None
+    if payload.get('document_sha256'):
+        document = db.session.get(StoredDocument, payload['document_sha256'])
+        if document is None or candidate.resume_path != document.path:
+            return
+        resume_text = document.extracted_text
+    else:
+        resume_text = payload.get('resume_text')
+    if not resume_text:
+        return
+
+    if document is not None and document.analysis is not None:
+        ai_analysis = json.loads(document.analysis)
+    else:
+        ai_analysis = ai_service.analyze_resume(resume_text)
+        if document is not None:
+            save_analysis(document, ai_analysis)
+    _apply_candidate_analysis(candidate, ai_analysis)
+
+
+def _apply_candidate_analysis(candidate: Candidate, ai_analysis: Dict):
+    apply_resume_analysis(candidate, ai_analysis)
+
+    # Nouvelles compétences: mise à jour des scores précalculés et du plongement du candidat
+    db.session.flush()
+    match_matrix.refresh_candidate(candidate.id)
+    get_semantic_index().index_candidates([candidate])
+
+
+@job_handler('extract_resume')
+def extract_resume(candidate_id: int, payload: Dict):
+    """
+    Extrait le texte du CV envoyé (pool de processus), puis met en file son analyse IA.
+    Le texte et l'analyse d'un document déjà traité sont réutilisés sans nouvel appel.
+    """
+    candidate = db.session.get(Candidate, candidate_id)
+    document = db.session.get(StoredDocument, payload.get('document_sha256'))
+    # CV remplacé entre-temps: seul le dernier envoi est traité
+    if candidate is None or document is None or candidate.resume_path != document.path:
+        return
+
+    if document.analysis is not None:
+        _apply_candidate_analysis(candidate, json.loads(document.analysis))
+        report_progress(phase='analyzed', deduplicated=True)
+        return
+
+    if document.extracted_text is None:
+        report_progress(phase='extracting')
+        try:
+            text = get_extraction_pool().extract(document.path)
+        except ExtractionError as e:
+            # Le même fichier échouerait à chaque tentative
+            raise PermanentJobError(str(e)) from e
+        save_extracted_text(document, text)
+    job = enqueue('analyze_candidate', candidate_id, {'document_sha256': document.sha256})
+    report_progress(phase='extracted', characters=len(document.extracted_text), analysis_job_id=job.id)
+
+
+@job_handler('generate_interview_questions')
+def generate_interview_questions(application_id: int, payload: Dict):
+    """Prégénère les questions d'entretien d'une candidature (réutilisées si toujours à jour)."""
+    application = db.session.get(Application, application_id)
+    if application is None:
+        return
+    result = interview_questions.questions_for(application)
+    report_progress(cached=result['cached'], questions=len(result['questions']))
+
+
+@job_handler('analyze_evaluation')
+def analyze_evaluation(evaluation_id: int, payload: Dict):
+    """Génère les ai_insights d'une évaluation de performance."""
+    evaluation = db.session.get(PerformanceEvaluation, evaluation_id)
+    if evaluation is None:
+        return
+    employee = db.session.get(Employee, evaluation.employee_id)
+
+    # Historique borné: les N dernières évaluations jusqu'à celle-ci, pas tout l'historique
+    performance_history = [
+        eval.to_dict() for eval in recent_evaluations(employee.id, until=evaluation.evaluation_date)
+    ]
+    ai_insights = ai_service.analyze_performance_data(employee.to_dict(), performance_history)
+    evaluation.ai_insights = json.dumps(ai_insights)
+
+
+@job_handler('rescore_job_posting')
+def rescore_job_posting(job_posting_id: int, payload: Dict):
+    """Recalcule les scores des candidatures d'une offre, par blocs, avec suivi de l'avancement."""
+    job_posting = db.session.get(JobPosting, job_posting_id)
+    if job_posting is None:
+        return
+    bulk_rescorer.rescore(job_posting, payload.get('mode', 'auto'), progress=report_progress)
+
+
+@job_handler('refresh_candidate_matches')
+def refresh_candidate_matches(candidate_id: int, payload: Dict):
+    """Recalcule les scores précalculés et le plongement d'un candidat."""
+    match_matrix.refresh_candidate(candidate_id)
+    candidate = db.session.get(Candidate, candidate_id)
+    if candidate is not None:
+        get_semantic_index().index_candidates([candidate])
+
+
+@job_handler('refresh_job_posting_matches')
+def refresh_job_posting_matches(job_posting_id: int, payload: Dict):
+    """Recalcule les scores précalculés de tous les candidats pour une offre, et son plongement."""
+    match_matrix.refresh_job_posting(job_posting_id)
+    job_posting = db.session.get(JobPosting, job_posting_id)
+    if job_posting is not None:
+        get_semantic_index().index_job_postings([job_posting])
@@ -1,22 +1,160 @@
 import openai
 import json
 import re
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+from src.services.llm_cache import LLMCache, get_llm_cache, make_cache_key
+from src.services.openai_clients import get_openai_client
+from src.services.resilience import get_resilience_policy
+from src.services.model_router import InvalidResponseError, get_model_router, validate_response
+from src.services.singleflight import get_singleflight
+from src.services.prompt_builder import (
+    get_prompt_builder, EMPLOYEE_FIELDS, EVALUATION_FIELDS, CANDIDATE_PROFILE_FIELDS,
+    BATCH_PROFILE_FIELDS
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
 class AIService:
-    def __init__(self):
-        # OpenAI client is already configured via environment variables
-        self.client = openai.OpenAI()
+    def __init__(self, cache: LLMCache = None, raise_errors: bool = False, client: openai.OpenAI = None):
+        # Client OpenAI partagé par le processus, créé au premier appel
+        self._client = client
+        self.router = get_model_router()
+        self.resilience = get_resilience_policy()
+        self.cache = cache or get_llm_cache()
+        self.prompts = get_prompt_builder()
+        self.flights = get_singleflight()
+        # Les jobs en arrière-plan propagent les erreurs pour pouvoir réessayer
+        self.raise_errors = raise_errors
 
-    def analyze_resume(self, resume_text: str, job_description: str = None) -> Dict:
+    @property
+    def client(self) -> openai.OpenAI:
+        return self._client or get_openai_client()
+
+    def _chat(self, method: str, system_prompt: str, prompt: str, temperature: float,
+              parse_json: bool = True, high_stakes: bool = False):
+        """
+        Exécute un appel chat completion selon la politique de routage des modèles.
+        Une réponse JSON invalide du modèle rapide est relancée sur le modèle fort.
+        Les réponses JSON portent le modèle utilisé (ai_model).
+        L'ensemble des essais respecte l'échéance de la méthode et de la requête en cours.
+        """
+        deadline = self.resilience.deadline_for(method)
+        route = self.router.route(method, self.prompts.count_tokens(prompt), high_stakes)
+        for attempt, model in enumerate(route.models):
+            try:
+                result = self._chat_with_model(
+                    method, model, system_prompt, prompt, temperature, parse_json, deadline
+                )
+            except InvalidResponseError as e:
+                if attempt + 1 >= len(route.models):
+                    raise
+                self.router.record_escalation(method, model, route.models[attempt + 1], e)
+                continue
+            self.router.record_result(method, model)
+            return result
+
+    def _chat_with_model(self, method: str, model: str, system_prompt: str, prompt: str,
+                         temperature: float, parse_json: bool, deadline: float):
+        """Appel d'un modèle donné, via le cache de réponses; seules les réponses valides sont mises en cache."""
+        key = make_cache_key(method, model, temperature, system_prompt + "\n" + prompt)
+        cached = self.cache.get(method, key)
+        if cached is not None:
+            return cached
+
+        def complete():
+            # Retries, disjoncteur du modèle et délai restant avant l'échéance
+            response = self.resilience.call(
+                model,
+                lambda timeout: self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=temperature,
+                    timeout=timeout
+                ),
+                deadline
+            )
+
+            content = response.choices[0].message.content
+            result = self._parse_response(method, model, content) if parse_json else content
+            self.cache.set(method, key, result)
+            return result
+
+        # Les appels identiques simultanés partagent une seule requête
+        lookup = None
+        if self.cache.enabled_for(method) and self.cache.is_shared():
+            lookup = lambda: self.cache.get(method, key, count=False)
+        return self.flights.do(key, complete, lookup, deadline)
+
+    @staticmethod
+    def _parse_response(method: str, model: str, content: str):
+        try:
+            result = json.loads(content)
+        except ValueError as e:
+            raise InvalidResponseError(f"JSON invalide: {str(e)}")
+        validate_response(method, result)
+        for item in (result if isinstance(result, list) else [result]):
+            if isinstance(item, dict):
+                item['ai_model'] = model
+        return result
+
+    def cache_stats(self) -> Dict:
+        """Retourne les compteurs du cache de réponses LLM."""
+        return self.cache.stats()
+
+    def routing_stats(self) -> Dict:
+        """Retourne la politique de routage des modèles et les compteurs d'escalade."""
+        return self.router.stats()
+
+    def resilience_stats(self) -> Dict:
+        """Retourne l'état des disjoncteurs, le budget de retries et les échéances par méthode."""
+        return self.resilience.stats()
+
+    def singleflight_stats(self) -> Dict:
+        """Retourne les compteurs du regroupement des appels identiques."""
+        return self.flights.stats()
+
+    def prompt_stats(self) -> Dict:
+        """Retourne les compteurs de tokens des prompts, dont les tokens économisés."""
+        return self.prompts.stats()
+
+    RESUME_SYSTEM_PROMPT = "Vous êtes un expert RH spécialisé dans l'analyse de CV. Répondez uniquement en JSON valide."
+    INTERVIEW_SYSTEM_PROMPT = "Vous êtes un expert RH. Générez des questions d'entretien pertinentes et professionnelles."
+
+    def analyze_resume(self, resume_text: str, job_description: str = None, high_stakes: bool = False) -> Dict:
         """
         Analyse un CV avec l'IA pour extraire les compétences, l'expérience et calculer un score.
+        `high_stakes` route directement l'appel vers le modèle fort.
         """
         try:
-            prompt = f"""
+            prompt = self._resume_prompt(resume_text, job_description)
+
+            result = self._chat(
+                "analyze_resume",
+                self.RESUME_SYSTEM_PROMPT,
+                prompt,
+                temperature=0.3,
+                high_stakes=high_stakes
+            )
+            return result
+
+        except Exception as e:
+            logger.error(f"Erreur lors de l'analyse du CV: {str(e)}")
+            if self.raise_errors:
+                raise
+            return self._default_resume_analysis(job_description)
+
+    def _resume_prompt(self, resume_text: str, job_description: str = None) -> str:
+        report = self.prompts.report("analyze_resume")
+        budget = self.prompts.budget_for("analyze_resume")
+        resume_text = self.prompts.truncate_text(resume_text, budget, report)
+        if job_description:
+            job_description = self.prompts.truncate_text(job_description, budget // 2, report)
+
+        return self.prompts.finish(report, f"""
             Analysez ce CV et extrayez les informations suivantes au format JSON:
             
             CV:
@@ -33,44 +171,94 @@ class AIService:
             {"- job_match_score: score de 0 à 100 pour l'adéquation au poste" if job_description else ""}
             - strengths: points forts du candidat
             - areas_for_improvement: axes d'amélioration
-            """
-
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "Vous êtes un expert RH spécialisé dans l'analyse de CV. Répondez uniquement en JSON valide."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3
+            """)
+
+    def _default_resume_analysis(self, job_description: str = None) -> Dict:
+        return {
+            "skills": [],
+            "experience_years": 0,
+            "education": "",
+            "summary": "Analyse non disponible",
+            "score": 0,
+            "job_match_score": 0 if job_description else None,
+            "strengths": [],
+            "areas_for_improvement": []
+        }
+
+    def score_candidates_batch(self, job_description: str, profiles: List[Dict]) -> Dict[int, Dict]:
+        """
+        Évalue plusieurs profils candidats compacts pour un même poste en un seul appel.
+        Retourne {id: {job_match_score, summary, strengths, concerns, ai_model}}; les profils
+        absents de la réponse sont laissés à l'appelant (score local).
+        """
+        try:
+            report = self.prompts.report("score_candidates_batch")
+            job_description = self.prompts.truncate_text(
+                job_description, self.prompts.budget_for("score_candidates_batch") // 3, report
             )
+            candidates = self.prompts.compact(profiles, BATCH_PROFILE_FIELDS, report)
 
-            result = json.loads(response.choices[0].message.content)
-            return result
+            prompt = self.prompts.finish(report, f"""
+            Évaluez l'adéquation de chaque candidat au poste suivant:
+
+            Description du poste:
+            {job_description}
+
+            Candidats: {candidates}
+
+            Retournez une liste JSON, un objet par candidat, avec:
+            - id: identifiant du candidat (repris tel quel)
+            - job_match_score: score de 0 à 100 pour l'adéquation au poste
+            - summary: justification en une phrase
+            - strengths: points forts pour ce poste
+            - concerns: points de vigilance
+            """)
+
+            results = self._chat(
+                "score_candidates_batch",
+                self.RESUME_SYSTEM_PROMPT,
+                prompt,
+                temperature=0.2
+            )
+            return {item['id']: item for item in results if isinstance(item.get('id'), int)}
 
         except Exception as e:
-            logger.error(f"Erreur lors de l'analyse du CV: {str(e)}")
-            return {
-                "skills": [],
-                "experience_years": 0,
-                "education": "",
-                "summary": "Analyse non disponible",
-                "score": 0,
-                "job_match_score": 0 if job_description else None,
-                "strengths": [],
-                "areas_for_improvement": []
-            }
+            logger.error(f"Erreur lors de l'évaluation groupée des candidats: {str(e)}")
+            if self.raise_errors:
+                raise
+            return {}
 
     def generate_interview_questions(self, job_title: str, candidate_profile: Dict) -> List[str]:
         """
         Génère des questions d'entretien personnalisées basées sur le poste et le profil du candidat.
         """
         try:
-            prompt = f"""
+            prompt = self._interview_questions_prompt(job_title, candidate_profile)
+
+            questions = self._chat(
+                "generate_interview_questions",
+                self.INTERVIEW_SYSTEM_PROMPT,
+                prompt,
+                temperature=0.5
+            )
+            return questions if isinstance(questions, list) else []
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la génération des questions: {str(e)}")
+            if self.raise_errors:
+                raise
+            return self._default_interview_questions()
+
+    def _interview_questions_prompt(self, job_title: str, candidate_profile: Dict) -> str:
+        report = self.prompts.report("generate_interview_questions")
+        profile = self.prompts.compact(candidate_profile, CANDIDATE_PROFILE_FIELDS, report)
+
+        return self.prompts.finish(report, f"""
             Générez 8-10 questions d'entretien pertinentes pour:
             
             Poste: {job_title}
-            Profil candidat: {json.dumps(candidate_profile, indent=2)}
-            
+            Profil candidat: {profile}
+
             Incluez:
             - 2-3 questions techniques spécifiques au poste
             - 2-3 questions comportementales
@@ -78,41 +266,36 @@ class AIService:
             - 1-2 questions sur la motivation et les objectifs
             
             Retournez une liste JSON de questions.
-            """
-
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "Vous êtes un expert RH. Générez des questions d'entretien pertinentes et professionnelles."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.5
-            )
+            """)
 
-            questions = json.loads(response.choices[0].message.content)
-            return questions if isinstance(questions, list) else []
+    def _default_interview_questions(self) -> List[str]:
+        return [
+            "Pouvez-vous vous présenter en quelques minutes?",
+            "Pourquoi ce poste vous intéresse-t-il?",
+            "Quelles sont vos principales forces?",
+            "Décrivez un défi professionnel que vous avez surmonté.",
+            "Où vous voyez-vous dans 5 ans?"
+        ]
 
-        except Exception as e:
-            logger.error(f"Erreur lors de la génération des questions: {str(e)}")
-            return [
-                "Pouvez-vous vous présenter en quelques minutes?",
-                "Pourquoi ce poste vous intéresse-t-il?",
-                "Quelles sont vos principales forces?",
-                "Décrivez un défi professionnel que vous avez surmonté.",
-                "Où vous voyez-vous dans 5 ans?"
-            ]
-
-    def analyze_performance_data(self, employee_data: Dict, performance_history: List[Dict]) -> Dict:
+    def analyze_performance_data(self, employee_data: Dict, performance_history: List[Dict],
+                                 high_stakes: bool = False) -> Dict:
         """
         Analyse les données de performance d'un employé et génère des insights IA.
         """
         try:
-            prompt = f"""
+            report = self.prompts.report("analyze_performance_data")
+            employee = self.prompts.compact(employee_data, EMPLOYEE_FIELDS, report)
+            history = self.prompts.fit_list(
+                performance_history, EVALUATION_FIELDS,
+                self.prompts.budget_for("analyze_performance_data"), strategy='recent', report=report
+            )
+
+            prompt = self.prompts.finish(report, f"""
             Analysez les données de performance de cet employé:
-            
-            Données employé: {json.dumps(employee_data, indent=2)}
-            Historique performance: {json.dumps(performance_history, indent=2)}
-            
+
+            Données employé: {employee}
+            Historique performance: {history}
+
             Générez une analyse JSON avec:
             - performance_trend: tendance (amélioration/stable/déclin)
             - predicted_score: score prédit pour la prochaine évaluation (0-100)
@@ -121,22 +304,21 @@ class AIService:
             - recommendations: recommandations spécifiques
             - training_suggestions: formations suggérées
             - risk_factors: facteurs de risque (turnover, etc.)
-            """
-
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "Vous êtes un analyste RH expert en performance. Fournissez des insights précis et actionnables."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3
-            )
+            """)
 
-            result = json.loads(response.choices[0].message.content)
+            result = self._chat(
+                "analyze_performance_data",
+                "Vous êtes un analyste RH expert en performance. Fournissez des insights précis et actionnables.",
+                prompt,
+                temperature=0.3,
+                high_stakes=high_stakes
+            )
             return result
 
         except Exception as e:
             logger.error(f"Erreur lors de l'analyse de performance: {str(e)}")
+            if self.raise_errors:
+                raise
             return {
                 "performance_trend": "stable",
                 "predicted_score": 75,
@@ -152,7 +334,8 @@ class AIService:
         Génère une description de poste optimisée avec l'IA.
         """
         try:
-            prompt = f"""
+            report = self.prompts.report("generate_job_description")
+            prompt = self.prompts.finish(report, f"""
             Créez une description de poste professionnelle pour:
             
             Titre: {job_title}
@@ -165,22 +348,20 @@ class AIService:
             - qualifications: qualifications requises
             - preferred_skills: compétences préférées
             - keywords: mots-clés pour le matching IA
-            """
-
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "Vous êtes un expert en rédaction de descriptions de poste. Créez du contenu professionnel et attractif."},
-                    {"role": "user", "content": prompt}
-                ],
+            """)
+
+            result = self._chat(
+                "generate_job_description",
+                "Vous êtes un expert en rédaction de descriptions de poste. Créez du contenu professionnel et attractif.",
+                prompt,
                 temperature=0.4
             )
-
-            result = json.loads(response.choices[0].message.content)
             return result
 
         except Exception as e:
             logger.error(f"Erreur lors de la génération de description: {str(e)}")
+            if self.raise_errors:
+                raise
             return {
                 "description": f"Poste de {job_title} au sein du département {department}",
                 "responsibilities": [],
@@ -189,48 +370,110 @@ class AIService:
                 "keywords": []
             }
 
+    CHATBOT_SYSTEM_PROMPT = "Vous êtes un assistant RH professionnel, serviable et bienveillant. Répondez de manière claire et concise."
+    CHATBOT_FALLBACK = "Je suis désolé, je ne peux pas traiter votre demande pour le moment. Veuillez réessayer plus tard."
+
     def chatbot_response(self, user_message: str, context: Dict = None) -> str:
         """
         Génère une réponse de chatbot RH intelligent.
         """
         try:
-            context_str = f"Contexte: {json.dumps(context, indent=2)}" if context else ""
-            
-            prompt = f"""
+            prompt = self._chatbot_prompt(user_message, context)
+
+            return self._chat(
+                "chatbot_response",
+                self.CHATBOT_SYSTEM_PROMPT,
+                prompt,
+                temperature=0.6,
+                parse_json=False
+            )
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la génération de réponse chatbot: {str(e)}")
+            if self.raise_errors:
+                raise
+            return self.CHATBOT_FALLBACK
+
+    def chatbot_response_stream(self, user_message: str, context: Dict = None) -> Iterator[str]:
+        """
+        Génère la réponse du chatbot par fragments, au fil de la complétion (stream=True).
+        """
+        prompt = self._chatbot_prompt(user_message, context)
+        # Pas d'escalade en streaming: les fragments sont déjà envoyés au client
+        model = self.router.route("chatbot_response", self.prompts.count_tokens(prompt)).models[0]
+        key = make_cache_key("chatbot_response", model, 0.6, self.CHATBOT_SYSTEM_PROMPT + "\n" + prompt)
+        cached = self.cache.get("chatbot_response", key)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        try:
+            # Les retries ne couvrent que l'ouverture du flux, avant tout fragment envoyé
+            stream = self.resilience.call(
+                model,
+                lambda timeout: self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": self.CHATBOT_SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.6,
+                    stream=True,
+                    timeout=timeout
+                ),
+                self.resilience.deadline_for("chatbot_response")
+            )
+
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+
+        except Exception as e:
+            logger.error(f"Erreur lors du streaming de réponse chatbot: {str(e)}")
+            if chunks:
+                self.resilience.record_failure(model)
+            else:
+                yield self.CHATBOT_FALLBACK
+            return
+
+        self.router.record_result("chatbot_response", model)
+        self.cache.set("chatbot_response", key, ''.join(chunks))
+
+    def _chatbot_prompt(self, user_message: str, context: Dict = None) -> str:
+        report = self.prompts.report("chatbot_response")
+        context_str = f"Contexte: {self.prompts.compact(context, report=report)}" if context else ""
+
+        return self.prompts.finish(report, f"""
             Vous êtes un assistant RH virtuel. Répondez à cette question de manière professionnelle et utile:
             
             Question: {user_message}
             {context_str}
             
             Fournissez une réponse claire, précise et professionnelle.
-            """
-
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "Vous êtes un assistant RH professionnel, serviable et bienveillant. Répondez de manière claire et concise."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.6
-            )
-
-            return response.choices[0].message.content
-
-        except Exception as e:
-            logger.error(f"Erreur lors de la génération de réponse chatbot: {str(e)}")
-            return "Je suis désolé, je ne peux pas traiter votre demande pour le moment. Veuillez réessayer plus tard."
+            """)
 
-    def predict_turnover_risk(self, employee_data: Dict, team_data: List[Dict] = None) -> Dict:
+    def predict_turnover_risk(self, employee_data: Dict, team_stats: Dict = None,
+                              high_stakes: bool = False) -> Dict:
         """
         Prédit le risque de turnover d'un employé.
+        `team_stats` est le résumé statistique de son équipe (voir TeamStatsProvider).
         """
         try:
-            team_context = f"Données équipe: {json.dumps(team_data, indent=2)}" if team_data else ""
-            
-            prompt = f"""
+            report = self.prompts.report("predict_turnover_risk")
+            employee = self.prompts.compact(employee_data, EMPLOYEE_FIELDS, report)
+            team_context = ""
+            if team_stats:
+                team_context = f"Statistiques équipe: {self.prompts.compact(team_stats, report=report)}"
+
+            prompt = self.prompts.finish(report, f"""
             Analysez le risque de turnover pour cet employé:
-            
-            Données employé: {json.dumps(employee_data, indent=2)}
+
+            Données employé: {employee}
             {team_context}
             
             Retournez un JSON avec:
@@ -239,22 +482,21 @@ class AIService:
             - risk_factors: facteurs de risque identifiés
             - retention_strategies: stratégies de rétention suggérées
             - timeline: horizon temporel estimé
-            """
-
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "Vous êtes un expert en analytics RH spécialisé dans la prédiction de turnover."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3
-            )
+            """)
 
-            result = json.loads(response.choices[0].message.content)
+            result = self._chat(
+                "predict_turnover_risk",
+                "Vous êtes un expert en analytics RH spécialisé dans la prédiction de turnover.",
+                prompt,
+                temperature=0.3,
+                high_stakes=high_stakes
+            )
             return result
 
         except Exception as e:
             logger.error(f"Erreur lors de la prédiction de turnover: {str(e)}")
+            if self.raise_errors:
+                raise
             return {
                 "risk_score": 50,
                 "risk_level": "moyen",
@@ -8,13 +8,27 @@ from sqlalchemy import func
 from src.models.user import db
 from src.models.employee import Employee, PerformanceEvaluation
 from src.models.candidate import Application, Candidate, JobPosting
+from src.services.model_router import ModelRouter, get_model_router, validate_response
+from src.services.openai_clients import get_openai_client
+from src.services.prompt_builder import get_prompt_builder
+from src.services.resilience import ResiliencePolicy, get_resilience_policy
 import logging
 
 logger = logging.getLogger(__name__)
 
 class AnalyticsService:
-    def __init__(self):
-        self.client = openai.OpenAI()
+    @property
+    def client(self) -> openai.OpenAI:
+        # Client OpenAI partagé par le processus, créé au premier appel
+        return get_openai_client()
+
+    @property
+    def router(self) -> ModelRouter:
+        return get_model_router()
+
+    @property
+    def resilience(self) -> ResiliencePolicy:
+        return get_resilience_policy()
 
     def get_employee_analytics(self) -> Dict:
         """Récupère les analytics des employés."""
@@ -208,17 +222,35 @@ class AnalyticsService:
             - opportunities: opportunités d'amélioration
             """
 
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "Vous êtes un expert en analytics RH. Fournissez des insights précis et actionnables."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3
-            )
+            route = self.router.route("generate_ai_insights", get_prompt_builder().count_tokens(prompt))
+            deadline = self.resilience.deadline_for("generate_ai_insights")
+            for attempt, model in enumerate(route.models):
+                response = self.resilience.call(
+                    model,
+                    lambda timeout: self.client.chat.completions.create(
+                        model=model,
+                        messages=[
+                            {"role": "system", "content": "Vous êtes un expert en analytics RH. Fournissez des insights précis et actionnables."},
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=0.3,
+                        timeout=timeout
+                    ),
+                    deadline
+                )
+
+                try:
+                    insights = json.loads(response.choices[0].message.content)
+                    validate_response("generate_ai_insights", insights)
+                except ValueError as e:
+                    if attempt + 1 >= len(route.models):
+                        raise
+                    self.router.record_escalation("generate_ai_insights", model, route.models[attempt + 1], e)
+                    continue
 
-            insights = json.loads(response.choices[0].message.content)
-            return insights
+                self.router.record_result("generate_ai_insights", model)
+                insights['ai_model'] = model
+                return insights
 
         except Exception as e:
             logger.error(f"Erreur dans generate_ai_insights: {str(e)}")
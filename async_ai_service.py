@@ -0,0 +1,206 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import openai
+from src.services.ai_service import AIService
+from src.services.llm_cache import LLMCache, make_cache_key
+from src.services.model_router import InvalidResponseError
+from src.services.openai_clients import get_async_openai_client
+from src.services.resilience import request_time_remaining
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopThread:
+    """
+    Boucle asyncio dédiée, exécutée dans un thread démon.
+    Permet aux routes Flask synchrones de soumettre des coroutines sans créer
+    une boucle par requête (le client AsyncOpenAI reste lié à une seule boucle).
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(
+                        target=loop.run_forever, name='ai-event-loop', daemon=True
+                    )
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    def run(self, coro, timeout: float = None):
+        """Exécute une coroutine sur la boucle partagée et attend son résultat."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            # Échéance dépassée: la coroutine est annulée et libère son créneau du sémaphore
+            future.cancel()
+            raise
+
+
+_loop_thread = EventLoopThread()
+
+if hasattr(os, 'register_at_fork'):
+    # Le thread de la boucle n'existe pas dans le processus enfant
+    os.register_at_fork(after_in_child=lambda: _loop_thread.__init__())
+
+
+def run_sync(coro, timeout: float = None):
+    """
+    Exécute une coroutine depuis du code synchrone via la boucle partagée.
+    Sans `timeout`, l'attente est bornée par l'échéance de la requête en cours.
+    """
+    if timeout is None:
+        timeout = request_time_remaining()
+    return _loop_thread.run(coro, timeout)
+
+
+class AsyncAIService(AIService):
+    """
+    Variante asynchrone de l'AIService basée sur AsyncOpenAI.
+    Le nombre d'appels simultanés est borné par un sémaphore et chaque appel
+    a son propre délai maximal (AI_MAX_CONCURRENCY, AI_CALL_TIMEOUT).
+    """
+
+    def __init__(self, cache: LLMCache = None, max_concurrency: int = None, call_timeout: float = None):
+        super().__init__(cache)
+        self.max_concurrency = max_concurrency or int(os.getenv('AI_MAX_CONCURRENCY', '8'))
+        self.call_timeout = call_timeout or float(os.getenv('AI_CALL_TIMEOUT', '30'))
+        self._semaphore = None
+        self._semaphore_pid = None
+
+    @property
+    def async_client(self) -> openai.AsyncOpenAI:
+        return get_async_openai_client()
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None or self._semaphore_pid != os.getpid():
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_pid = os.getpid()
+        return self._semaphore
+
+    async def _achat(self, method: str, system_prompt: str, prompt: str, temperature: float,
+                     parse_json: bool = True, timeout: float = None, high_stakes: bool = False):
+        """Équivalent asynchrone de `_chat`: même routage, même cache, même politique de résilience."""
+        deadline = self.resilience.deadline_for(method)
+        if timeout:
+            deadline = min(deadline, time.monotonic() + timeout)
+        route = self.router.route(method, self.prompts.count_tokens(prompt), high_stakes)
+        for attempt, model in enumerate(route.models):
+            try:
+                result = await self._achat_with_model(
+                    method, model, system_prompt, prompt, temperature, parse_json, deadline
+                )
+            except InvalidResponseError as e:
+                if attempt + 1 >= len(route.models):
+                    raise
+                self.router.record_escalation(method, model, route.models[attempt + 1], e)
+                continue
+            self.router.record_result(method, model)
+            return result
+
+    async def _achat_with_model(self, method: str, model: str, system_prompt: str, prompt: str,
+                                temperature: float, parse_json: bool, deadline: float):
+        key = make_cache_key(method, model, temperature, system_prompt + "\n" + prompt)
+        cached = self.cache.get(method, key)
+        if cached is not None:
+            return cached
+
+        async with self.semaphore:
+            response = await self.resilience.acall(
+                model,
+                lambda timeout: self.async_client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=temperature,
+                    timeout=min(timeout, self.call_timeout)
+                ),
+                deadline
+            )
+
+        content = response.choices[0].message.content
+        result = self._parse_response(method, model, content) if parse_json else content
+        self.cache.set(method, key, result)
+        return result
+
+    async def analyze_resume_async(self, resume_text: str, job_description: str = None) -> Dict:
+        """Analyse asynchrone d'un CV (voir `analyze_resume`)."""
+        try:
+            return await self._achat(
+                "analyze_resume",
+                self.RESUME_SYSTEM_PROMPT,
+                self._resume_prompt(resume_text, job_description),
+                temperature=0.3
+            )
+
+        except Exception as e:
+            logger.error(f"Erreur lors de l'analyse asynchrone du CV: {str(e) or type(e).__name__}")
+            return self._default_resume_analysis(job_description)
+
+    async def generate_interview_questions_async(self, job_title: str, candidate_profile: Dict) -> List[str]:
+        """Génération asynchrone des questions d'entretien (voir `generate_interview_questions`)."""
+        try:
+            questions = await self._achat(
+                "generate_interview_questions",
+                self.INTERVIEW_SYSTEM_PROMPT,
+                self._interview_questions_prompt(job_title, candidate_profile),
+                temperature=0.5
+            )
+            return questions if isinstance(questions, list) else []
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la génération asynchrone des questions: {str(e) or type(e).__name__}")
+            return self._default_interview_questions()
+
+    async def analyze_resumes_many_async(self, items: Sequence[Tuple[str, Optional[str]]]) -> List[Dict]:
+        """Analyse un lot de (resume_text, job_description) en parallèle, dans l'ordre d'entrée."""
+        return await asyncio.gather(*[
+            self.analyze_resume_async(resume_text, job_description)
+            for resume_text, job_description in items
+        ])
+
+    async def generate_interview_questions_many_async(self, items: Sequence[Tuple[str, Dict]]) -> List[List[str]]:
+        """Génère les questions pour un lot de (job_title, candidate_profile) en parallèle."""
+        return await asyncio.gather(*[
+            self.generate_interview_questions_async(job_title, candidate_profile)
+            for job_title, candidate_profile in items
+        ])
+
+    def analyze_resumes_many(self, items: Sequence[Tuple[str, Optional[str]]], timeout: float = None) -> List[Dict]:
+        """Point d'entrée synchrone de `analyze_resumes_many_async` pour les routes Flask."""
+        return run_sync(self.analyze_resumes_many_async(list(items)), timeout)
+
+    def generate_interview_questions_many(self, items: Sequence[Tuple[str, Dict]], timeout: float = None) -> List[List[str]]:
+        """Point d'entrée synchrone de `generate_interview_questions_many_async`."""
+        return run_sync(self.generate_interview_questions_many_async(list(items)), timeout)
+
+
+_async_ai_service = None
+_async_ai_service_lock = threading.Lock()
+
+
+def get_async_ai_service() -> AsyncAIService:
+    """Retourne l'instance partagée de l'AsyncAIService (créée au premier usage)."""
+    global _async_ai_service
+    if _async_ai_service is None:
+        with _async_ai_service_lock:
+            if _async_ai_service is None:
+                _async_ai_service = AsyncAIService()
+    return _async_ai_service
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Migration des compétences existantes vers les tables normalisées (skill,
+candidate_skill, employee_skill). Les colonnes JSON `skills` sont réécrites
+sous leur forme canonique. Idempotent: peut être relancé sans risque.
+"""
+
+import os
+import sys
+import time
+
+# Ajout du chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.candidate import Candidate
+from src.models.employee import Employee
+from src.models.skill import Skill
+from src.services.skills import backfill_skills
+
+if __name__ == '__main__':
+    # Configuration de l'application Flask pour accéder à la base de données
+    os.environ.setdefault('AI_JOB_WORKER', 'external')
+    from src.main import app
+    
+    with app.app_context():
+        print("🏷️ Normalisation des compétences...")
+        start = time.time()
+        candidates = backfill_skills(Candidate, 'candidate')
+        print(f"   ✅ {candidates} candidats traités")
+        employees = backfill_skills(Employee, 'employee')
+        print(f"   ✅ {employees} employés traités")
+        elapsed = time.time() - start
+        print(f"   ✅ {Skill.query.count()} compétences distinctes en {elapsed:.1f}s")
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Construit (ou reconstruit) la table des scores précalculés candidat × offre active.
+À lancer après l'installation, un import de données ou un changement du scorer local.
+"""
+
+import os
+import sys
+import time
+
+# Ajout du chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.services.match_matrix import MatchMatrix
+
+if __name__ == '__main__':
+    # Configuration de l'application Flask pour accéder à la base de données
+    os.environ.setdefault('AI_JOB_WORKER', 'external')
+    from src.main import app
+    
+    with app.app_context():
+        print("🧮 Calcul de la matrice des scores candidat × offre...")
+        start = time.time()
+        stats = MatchMatrix().rebuild()
+        elapsed = time.time() - start
+        print(f"   ✅ {stats['pairs']} couples pour {stats['job_postings']} offres actives en {elapsed:.1f}s")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Calcule les plongements locaux de tous les candidats et offres d'emploi et
+entraîne l'index de recherche sémantique. À lancer après l'installation ou un
+import de données; les ajouts suivants sont indexés au fil de l'eau.
+"""
+
+import os
+import sys
+import time
+
+# Ajout du chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.models.candidate import Candidate, JobPosting
+from src.services.embeddings import get_semantic_index
+
+CHUNK_SIZE = 2000
+
+
+def iter_chunks(model, columns):
+    last_id = 0
+    while True:
+        rows = model.query.with_entities(*columns).filter(
+            model.id > last_id
+        ).order_by(model.id).limit(CHUNK_SIZE).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+if __name__ == '__main__':
+    # Configuration de l'application Flask pour accéder à la base de données
+    os.environ.setdefault('AI_JOB_WORKER', 'external')
+    from src.main import app
+    
+    with app.app_context():
+        index = get_semantic_index()
+        print("🧭 Calcul des plongements des candidats et des offres...")
+        start = time.time()
+        for rows in iter_chunks(Candidate, [Candidate.id, Candidate.skills, Candidate.ai_summary]):
+            index.index_candidates(rows)
+        for rows in iter_chunks(JobPosting, [JobPosting.id, JobPosting.title, JobPosting.description,
+                                             JobPosting.requirements]):
+            index.index_job_postings(rows)
+        for store in index.stores.values():
+            store.train()
+        elapsed = time.time() - start
+        stats = index.stats()
+        print(f"   ✅ {stats['candidate']['count']} candidats, {stats['job_posting']['count']} offres "
+              f"({stats['candidate']['lists']} listes) en {elapsed:.1f}s")
@@ -0,0 +1,151 @@
+import json
+import os
+from typing import Callable, Dict, Iterator, List, Optional
+from sqlalchemy import update
+from src.models.user import db
+from src.models.candidate import Application, Candidate, JobPosting
+from src.services.ai_service import AIService
+from src.services.match_scorer import MatchScorer
+import logging
+
+logger = logging.getLogger(__name__)
+
+RESCORE_MODES = ('local', 'auto', 'llm')
+
+
+class BulkRescorer:
+    """
+    Recalcul des scores de toutes les candidatures d'une offre.
+    1. Passe locale: candidatures lues par blocs (pagination par clé sur l'id),
+       score local vectorisé, écriture par UPDATE groupés.
+    2. Passe LLM (modes 'auto' et 'llm'): profils compacts regroupés par paquets
+       dans un seul appel, pour les candidats au-dessus du seuil ou dans le top-K
+       ('auto') ou pour tous ('llm').
+    """
+
+    def __init__(self, ai_service: AIService = None, match_scorer: MatchScorer = None,
+                 chunk_size: int = None, pack_size: int = None):
+        self.ai_service = ai_service or AIService()
+        self.match_scorer = match_scorer or MatchScorer()
+        self.chunk_size = chunk_size or int(os.getenv('RESCORE_CHUNK_SIZE', '500'))
+        self.pack_size = pack_size or int(os.getenv('RESCORE_PACK_SIZE', '8'))
+
+    def count_applicants(self, job_posting_id: int) -> int:
+        return Application.query.filter_by(job_posting_id=job_posting_id).count()
+
+    def rescore(self, job_posting: JobPosting, mode: str = 'auto',
+                progress: Optional[Callable[..., None]] = None) -> Dict:
+        """Recalcule les scores des candidatures de l'offre; `progress(**compteurs)` après chaque bloc."""
+        if mode not in RESCORE_MODES:
+            raise ValueError(f"Mode de recalcul inconnu: {mode}")
+        progress = progress or (lambda **counters: db.session.commit())
+
+        counters = {
+            'mode': mode,
+            'phase': 'local',
+            'total': self.count_applicants(job_posting.id),
+            'local_scored': 0,
+            'llm_selected': 0,
+            'llm_scored': 0,
+            'llm_failed': 0,
+            'llm_requests': 0
+        }
+        progress(**counters)
+
+        local_scores = {}
+        for rows in self._iter_chunks(job_posting.id):
+            results = self.match_scorer.score_many(rows, job_posting)
+            db.session.execute(update(Application), [
+                {
+                    'id': row.id,
+                    'ai_match_score': result['score'],
+                    'ai_analysis': json.dumps(result)
+                }
+                for row, result in zip(rows, results)
+            ])
+            for row, result in zip(rows, results):
+                local_scores[row.id] = result
+            counters['local_scored'] += len(rows)
+            progress(**counters)
+
+        if mode == 'local' or not local_scores:
+            counters['phase'] = 'done'
+            progress(**counters)
+            return counters
+
+        application_ids = list(local_scores)
+        if mode == 'auto':
+            selected = self.match_scorer.select_for_llm([local_scores[i]['score'] for i in application_ids])
+            application_ids = [application_ids[index] for index in selected]
+        counters['phase'] = 'llm'
+        counters['llm_selected'] = len(application_ids)
+        progress(**counters)
+
+        job_description = self.match_scorer.job_text(job_posting)
+        for start in range(0, len(application_ids), self.chunk_size):
+            rows = self._load_rows(application_ids[start:start + self.chunk_size])
+            mappings = []
+            for pack_start in range(0, len(rows), self.pack_size):
+                pack = rows[pack_start:pack_start + self.pack_size]
+                scored = self._score_pack(job_description, pack, counters)
+                for row in pack:
+                    analysis = scored.get(row.id)
+                    if analysis is None:
+                        continue
+                    analysis['local_match'] = local_scores[row.id]
+                    analysis['source'] = 'llm_batch'
+                    mappings.append({
+                        'id': row.id,
+                        'ai_match_score': analysis['job_match_score'],
+                        'ai_analysis': json.dumps(analysis)
+                    })
+            if mappings:
+                db.session.execute(update(Application), mappings)
+            counters['llm_scored'] += len(mappings)
+            progress(**counters)
+
+        counters['phase'] = 'done'
+        progress(**counters)
+        return counters
+
+    def _score_pack(self, job_description: str, rows: List, counters: Dict) -> Dict[int, Dict]:
+        profiles = [{
+            'id': row.id,
+            'skills': row.skills,
+            'experience_years': row.experience_years,
+            'summary': row.ai_summary
+        } for row in rows]
+        counters['llm_requests'] += 1
+        try:
+            scored = self.ai_service.score_candidates_batch(job_description, profiles)
+        except Exception as e:
+            # Le paquet garde son score local; le recalcul continue
+            logger.warning(f"Paquet de {len(rows)} candidats non évalué par le LLM: {str(e)}")
+            scored = {}
+        counters['llm_failed'] += len(rows) - len(scored)
+        return scored
+
+    def _columns(self):
+        # Seules les colonnes utiles au score, sans charger les objets ORM complets
+        return db.session.query(
+            Application.id,
+            Candidate.skills,
+            Candidate.experience_years,
+            Candidate.ai_summary,
+            Candidate.cover_letter
+        ).join(Candidate, Candidate.id == Application.candidate_id)
+
+    def _iter_chunks(self, job_posting_id: int) -> Iterator[List]:
+        last_id = 0
+        while True:
+            rows = self._columns().filter(
+                Application.job_posting_id == job_posting_id,
+                Application.id > last_id
+            ).order_by(Application.id).limit(self.chunk_size).all()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1].id
+
+    def _load_rows(self, application_ids: List[int]) -> List:
+        return self._columns().filter(Application.id.in_(application_ids)).order_by(Application.id).all()
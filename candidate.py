@@ -19,6 +19,11 @@ class JobPosting(db.Model):
     ai_keywords = db.Column(db.Text)  # AI-extracted keywords for matching
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Pagination par curseur: offres d'un statut triées par (posted_date, id)
+        db.Index('ix_job_posting_status_posted_date_id', 'status', 'posted_date', 'id'),
+    )
+
     # Relationships
     applications = db.relationship('Application', backref='job_posting', lazy=True)
 
@@ -53,10 +58,19 @@ class Candidate(db.Model):
     skills = db.Column(db.Text)  # JSON string of skills
     experience_years = db.Column(db.Integer)
     education = db.Column(db.Text)  # JSON string of education
+    cin_number = db.Column(db.String(20), index=True)  # Carte d'identité nationale (import ETL)
+    birth_date = db.Column(db.Date)
+    address = db.Column(db.String(255))
+    cin_expiration_date = db.Column(db.Date)
     ai_score = db.Column(db.Float, default=0.0)  # AI-calculated overall score
     ai_summary = db.Column(db.Text)  # AI-generated candidate summary
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Pagination par curseur des candidats triés par (ai_score, id)
+        db.Index('ix_candidate_ai_score_id', 'ai_score', 'id'),
+    )
+
     # Relationships
     applications = db.relationship('Application', backref='candidate', lazy=True)
 
@@ -73,6 +87,10 @@ class Candidate(db.Model):
             'skills': self.skills,
             'experience_years': self.experience_years,
             'education': self.education,
+            'cin_number': self.cin_number,
+            'birth_date': self.birth_date.isoformat() if self.birth_date else None,
+            'address': self.address,
+            'cin_expiration_date': self.cin_expiration_date.isoformat() if self.cin_expiration_date else None,
             'ai_score': self.ai_score,
             'ai_summary': self.ai_summary,
             'created_at': self.created_at.isoformat() if self.created_at else None
@@ -88,9 +106,17 @@ class Application(db.Model):
     ai_analysis = db.Column(db.Text)  # AI analysis of candidate-job fit
     recruiter_notes = db.Column(db.Text)
     interview_feedback = db.Column(db.Text)
+    interview_questions = db.Column(db.Text)  # JSON: liste des questions d'entretien générées
+    interview_questions_fingerprint = db.Column(db.String(64))  # SHA-256 du profil candidat et de l'intitulé du poste
+    interview_questions_generated_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Parcours des candidatures d'une offre par blocs (pagination par clé sur l'id)
+        db.Index('ix_application_job_posting_id', 'job_posting_id', 'id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -102,7 +128,35 @@ class Application(db.Model):
             'ai_analysis': self.ai_analysis,
             'recruiter_notes': self.recruiter_notes,
             'interview_feedback': self.interview_feedback,
+            'interview_questions_generated_at': self.interview_questions_generated_at.isoformat() if self.interview_questions_generated_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+
+class MatchScore(db.Model):
+    """Score local précalculé pour chaque couple candidat × offre active."""
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id'), primary_key=True)
+    job_posting_id = db.Column(db.Integer, db.ForeignKey('job_posting.id'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+    skill_overlap = db.Column(db.Float)
+    text_similarity = db.Column(db.Float)
+    experience_fit = db.Column(db.Float)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Top-K par offre et par candidat: parcours de l'index dans l'ordre des scores
+        db.Index('ix_match_score_job_score', 'job_posting_id', 'score'),
+        db.Index('ix_match_score_candidate_score', 'candidate_id', 'score'),
+    )
+
+    def to_dict(self):
+        return {
+            'candidate_id': self.candidate_id,
+            'job_posting_id': self.job_posting_id,
+            'score': self.score,
+            'skill_overlap': self.skill_overlap,
+            'text_similarity': self.text_similarity,
+            'experience_fit': self.experience_fit,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
@@ -1,8 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from src.services.ai_service import AIService
 from src.models.user import db
 from src.models.employee import Employee
 from src.models.candidate import JobPosting
+from src.services.search_index import get_search_index, query_terms
 import json
 
 chatbot_bp = Blueprint('chatbot', __name__)
@@ -40,6 +41,50 @@ def handle_chatbot_message():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@chatbot_bp.route('/chatbot/message/stream', methods=['POST'])
+def stream_chatbot_message():
+    """Traite un message du chatbot RH et diffuse la réponse en Server-Sent Events."""
+    try:
+        data = request.get_json()
+        
+        if 'message' not in data:
+            return jsonify({'error': 'Message requis'}), 400
+        
+        user_message = data['message']
+        user_context = data.get('context', {})
+        
+        enhanced_context = enhance_context_with_hr_data(user_message, user_context)
+        intent = detect_intent(user_message)
+        suggestions = generate_suggestions(intent, enhanced_context)
+        
+        def generate():
+            # Premier événement: métadonnées disponibles sans attendre le LLM
+            yield sse_event('meta', {
+                'intent': intent,
+                'suggestions': suggestions,
+                'context': enhanced_context
+            })
+            
+            chunks = []
+            for delta in ai_service.chatbot_response_stream(user_message, enhanced_context):
+                chunks.append(delta)
+                yield sse_event('token', {'delta': delta})
+            
+            yield sse_event('done', {'response': ''.join(chunks)})
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def sse_event(event, data):
+    """Formate un événement Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 def enhance_context_with_hr_data(message, context):
     """Enrichit le contexte avec des données RH pertinentes."""
     enhanced_context = context.copy()
@@ -54,6 +99,22 @@ def enhance_context_with_hr_data(message, context):
             enhanced_context['total_employees'] = total_employees
             enhanced_context['departments'] = [dept[0] for dept in departments if dept[0]]
         
+        # Recherche d'une personne ("qui est Marie Dubois ?", "contact de dupont")
+        if detect_intent(message) == 'search_employee':
+            terms = employee_search_terms(message)
+            if terms:
+                matches = get_search_index().search('employee', terms, limit=5, match_all=False, status='active')
+                enhanced_context['matching_employees'] = [
+                    {
+                        'name': f"{employee.first_name} {employee.last_name}",
+                        'position': employee.position,
+                        'department': employee.department,
+                        'email': employee.email,
+                        'phone': employee.phone
+                    }
+                    for employee, _ in matches
+                ]
+        
         # Si la question concerne le recrutement
         if any(keyword in message_lower for keyword in ['recrutement', 'recruitment', 'poste', 'job', 'candidat']):
             active_jobs = JobPosting.query.filter_by(status='active').count()
@@ -75,6 +136,18 @@ def enhance_context_with_hr_data(message, context):
     
     return enhanced_context
 
+# Mots des questions de recherche d'une personne, ignorés dans la recherche plein texte
+SEARCH_STOPWORDS = {
+    'qui', 'est', 'who', 'is', 'contact', 'contacter', 'telephone', 'tel', 'email', 'mail', 'e',
+    'numero', 'adresse', 'de', 'du', 'des', 'la', 'le', 'les', 'l', 'd', 'un', 'une', 'quel', 'quelle',
+    'son', 'sa', 'ses', 'me', 'moi', 'donne', 'donner', 'trouve', 'trouver', 'cherche', 'chercher',
+    'je', 'j', 'veux', 'voudrais', 'pour', 'avec', 'the', 'of', 'what', 's', 'a', 'et', 'ou', 'en', 'au'
+}
+
+def employee_search_terms(message):
+    """Mots significatifs d'une question de recherche de personne (noms, poste, service)."""
+    return ' '.join(term for term in query_terms(message) if term not in SEARCH_STOPWORDS and len(term) > 1)
+
 def detect_intent(message):
     """Détecte l'intention de l'utilisateur."""
     message_lower = message.lower()
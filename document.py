@@ -0,0 +1,34 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+import json
+from src.models.user import db
+
+class StoredDocument(db.Model):
+    """Document envoyé, adressé par le SHA-256 de son contenu: un même fichier n'est stocké, extrait et analysé qu'une fois."""
+    __tablename__ = 'stored_document'
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    path = db.Column(db.String(500), unique=True, nullable=False)  # uploads/.../<sha[:2]>/<sha>.<ext>
+    size = db.Column(db.Integer, nullable=False)
+    filename = db.Column(db.String(255))  # Nom d'origine au premier envoi
+    upload_count = db.Column(db.Integer, default=1, nullable=False)
+    extracted_text = db.Column(db.Text)  # Texte extrait (PDF/DOCX)
+    analysis = db.Column(db.Text)  # JSON string of the AI resume analysis
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    extracted_at = db.Column(db.DateTime)
+    analyzed_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'sha256': self.sha256,
+            'path': self.path,
+            'size': self.size,
+            'filename': self.filename,
+            'upload_count': self.upload_count,
+            'extracted': self.extracted_text is not None,
+            'analyzed': self.analysis is not None,
+            'analysis': json.loads(self.analysis) if self.analysis else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'extracted_at': self.extracted_at.isoformat() if self.extracted_at else None,
+            'analyzed_at': self.analyzed_at.isoformat() if self.analyzed_at else None
+        }
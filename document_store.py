@@ -0,0 +1,66 @@
+import json
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db
+from src.models.candidate import Candidate
+from src.models.document import StoredDocument
+from src.services.skills import set_skills
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def register_document(upload: Dict) -> StoredDocument:
+    """
+    Enregistre un fichier reçu par `stream_upload` (clé: SHA-256 du contenu).
+    Un contenu déjà connu est réutilisé avec son texte extrait et son analyse.
+    Validé immédiatement: deux envois simultanés du même fichier convergent sur une ligne.
+    """
+    document = db.session.get(StoredDocument, upload['sha256'])
+    if document is not None:
+        document.upload_count = StoredDocument.upload_count + 1
+        db.session.commit()
+        db.session.refresh(document)
+        return document
+
+    document = StoredDocument(
+        sha256=upload['sha256'],
+        path=upload['path'],
+        size=upload['size'],
+        filename=upload['filename']
+    )
+    db.session.add(document)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        document = db.session.get(StoredDocument, upload['sha256'])
+    return document
+
+
+def document_for_path(path: Optional[str]) -> Optional[StoredDocument]:
+    if not path:
+        return None
+    return StoredDocument.query.filter_by(path=path).first()
+
+
+def save_extracted_text(document: StoredDocument, text: str):
+    document.extracted_text = text
+    document.extracted_at = datetime.utcnow()
+
+
+def save_analysis(document: StoredDocument, ai_analysis: Dict):
+    document.analysis = json.dumps(ai_analysis)
+    document.analyzed_at = datetime.utcnow()
+
+
+def apply_resume_analysis(candidate: Candidate, ai_analysis: Dict):
+    """Renseigne les champs IA d'un candidat depuis une analyse de CV (nouvelle ou réutilisée)."""
+    set_skills(candidate, ai_analysis.get('skills', []), 'candidate')
+    candidate.ai_score = ai_analysis.get('score', 0)
+    candidate.ai_summary = ai_analysis.get('summary', '')
+    candidate.experience_years = ai_analysis.get('experience_years', candidate.experience_years)
+
+    if ai_analysis.get('education'):
+        candidate.education = json.dumps(ai_analysis.get('education'))
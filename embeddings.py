@@ -0,0 +1,376 @@
+import fcntl
+import json
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from src.services.match_scorer import parse_skill_list, tokenize
+import logging
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = ('candidate', 'job_posting')
+
+
+@lru_cache(maxsize=200000)
+def _bucket(feature: str, dim: int) -> Tuple[int, float]:
+    # crc32 est stable d'un processus à l'autre (contrairement à hash())
+    h = zlib.crc32(feature.encode('utf-8'))
+    return h % dim, (1.0 if h & 0x80000000 else -1.0)
+
+
+class HashingEmbedder:
+    """
+    Plongement local et déterministe d'un texte, sans modèle ni appel réseau:
+    mots et bigrammes hachés dans `dim` dimensions (signe aléatoire pour
+    compenser les collisions), pondération log(1 + tf), normalisation L2.
+    Le produit scalaire de deux vecteurs est leur similarité cosinus.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        tokens = tokenize(text)
+        features = tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+        counts = {}
+        for feature in features:
+            counts[feature] = counts.get(feature, 0) + 1
+        for feature, count in counts.items():
+            index, sign = _bucket(feature, self.dim)
+            weight = 1.0 + np.log(count)
+            # Les bigrammes précisent le sens sans dominer les mots seuls
+            vector[index] += sign * (weight if ' ' not in feature else 0.5 * weight)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack([self.embed(text) for text in texts])
+
+    @staticmethod
+    def candidate_text(candidate) -> str:
+        skills = ' '.join(parse_skill_list(candidate.skills))
+        return f"{skills}\n{skills}\n{candidate.ai_summary or ''}"
+
+    @staticmethod
+    def job_posting_text(job_posting) -> str:
+        return f"{job_posting.title or ''}\n{job_posting.description or ''}\n{job_posting.requirements or ''}"
+
+
+class VectorStore:
+    """
+    Matrice float32 projetée en mémoire (np.memmap) d'une collection, avec un
+    index IVF approché: centroïdes k-means, chaque ligne rattachée à son centroïde
+    le plus proche, requêtes limitées aux `nprobe` listes les plus proches.
+
+    Fichiers: vectors.f32, ids.i64, lists.i32 (centroïde par ligne),
+    centroids.npy et meta.json. Écritures sérialisées par un verrou de fichier
+    (plusieurs processus peuvent écrire); les lecteurs rechargent l'index quand
+    meta.json change.
+    """
+
+    def __init__(self, directory: str, dim: int, nprobe: int = 16, min_train_size: int = 5000):
+        self.directory = directory
+        self.dim = dim
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self._lock = threading.RLock()
+        self._version = None
+        self.count = 0
+        self.capacity = 0
+        self.trained_count = 0
+        self._vectors = None
+        self._ids = None
+        self._lists = None
+        self.centroids = None
+        self._rows = {}
+        self._members = []
+        os.makedirs(directory, exist_ok=True)
+
+    # Chargement
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_meta(self) -> Dict:
+        try:
+            with open(self._path('meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'dim': self.dim, 'count': 0, 'capacity': 0, 'trained_count': 0, 'version': 0}
+
+    def _write_meta(self):
+        self._version = (self._version or 0) + 1
+        meta = {
+            'dim': self.dim,
+            'count': self.count,
+            'capacity': self.capacity,
+            'trained_count': self.trained_count,
+            'version': self._version
+        }
+        tmp_path = self._path('meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path('meta.json'))
+
+    def _open(self, name: str, dtype, shape):
+        return np.memmap(self._path(name), dtype=dtype, mode='r+', shape=shape)
+
+    def _refresh(self, force: bool = False):
+        """Recharge l'index si une autre instance (ou un autre processus) l'a modifié."""
+        meta = self._read_meta()
+        if not force and meta['version'] == self._version:
+            return
+        if meta['capacity'] and meta['dim'] != self.dim:
+            raise ValueError(
+                f"Index {self.directory} construit en dimension {meta['dim']}, {self.dim} attendue"
+            )
+        self.count = meta['count']
+        self.capacity = meta['capacity']
+        self.trained_count = meta['trained_count']
+        self._version = meta['version']
+        if self.capacity:
+            self._vectors = self._open('vectors.f32', np.float32, (self.capacity, self.dim))
+            self._ids = self._open('ids.i64', np.int64, (self.capacity,))
+            self._lists = self._open('lists.i32', np.int32, (self.capacity,))
+        ids = np.asarray(self._ids[:self.count]) if self.count else np.zeros(0, dtype=np.int64)
+        self._rows = {int(owner_id): row for row, owner_id in enumerate(ids)}
+        self.centroids = np.load(self._path('centroids.npy')) if self.trained_count else None
+        self._build_members()
+
+    def _build_members(self):
+        # Listes inversées: lignes rattachées à chaque centroïde
+        if self.centroids is None or not self.count:
+            self._members = []
+            return
+        lists = np.asarray(self._lists[:self.count])
+        order = np.argsort(lists, kind='stable')
+        bounds = np.searchsorted(lists[order], np.arange(len(self.centroids) + 1))
+        self._members = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+
+    @contextmanager
+    def _write_lock(self):
+        with self._lock, open(self._path('.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _grow(self, needed: int):
+        if needed <= self.capacity:
+            return
+        capacity = max(1024, self.capacity)
+        while capacity < needed:
+            capacity *= 2
+        for name, dtype, width in (('vectors.f32', np.float32, self.dim), ('ids.i64', np.int64, 1),
+                                   ('lists.i32', np.int32, 1)):
+            with open(self._path(name), 'ab') as f:
+                f.truncate(capacity * width * np.dtype(dtype).itemsize)
+        self.capacity = capacity
+        self._vectors = self._open('vectors.f32', np.float32, (capacity, self.dim))
+        self._ids = self._open('ids.i64', np.int64, (capacity,))
+        self._lists = self._open('lists.i32', np.int32, (capacity,))
+
+    # Écriture
+
+    def upsert_many(self, ids: Sequence[int], vectors: np.ndarray):
+        """Ajoute ou remplace les vecteurs; les nouvelles lignes rejoignent leur liste IVF."""
+        if not len(ids):
+            return
+        with self._write_lock():
+            rows = []
+            next_row = self.count
+            for owner_id in ids:
+                row = self._rows.get(int(owner_id))
+                if row is None:
+                    row = self._rows[int(owner_id)] = next_row
+                    next_row += 1
+                rows.append(row)
+            self._grow(next_row)
+
+            rows = np.asarray(rows)
+            self._vectors[rows] = vectors
+            self._ids[rows] = np.asarray(ids, dtype=np.int64)
+            self._lists[rows] = self._assign(vectors) if self.centroids is not None else -1
+            self.count = next_row
+            self._vectors.flush()
+            self._ids.flush()
+            self._lists.flush()
+
+            if self.count >= self.min_train_size and self.count >= 2 * self.trained_count:
+                self._train()
+            self._build_members()
+            self._write_meta()
+
+    def upsert(self, owner_id: int, vector: np.ndarray):
+        self.upsert_many([owner_id], vector.reshape(1, -1))
+
+    def remove(self, owner_id: int):
+        """Neutralise la ligne d'un identifiant supprimé (vecteur nul, jamais retourné)."""
+        with self._write_lock():
+            row = self._rows.pop(int(owner_id), None)
+            if row is None:
+                return
+            self._vectors[row] = 0
+            self._ids[row] = -1
+            self._vectors.flush()
+            self._ids.flush()
+            self._write_meta()
+
+    def train(self):
+        with self._write_lock():
+            if self.count:
+                self._train()
+                self._build_members()
+                self._write_meta()
+
+    def _train(self, iterations: int = 10, sample_size: int = 20000):
+        """k-means sphérique (√n centroïdes) sur un échantillon, puis réaffectation de toutes les lignes."""
+        nlist = max(1, int(np.sqrt(self.count)))
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(self.count, min(self.count, sample_size), replace=False))
+        sample = np.asarray(self._vectors[sample_rows])
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for index in range(nlist):
+                members = sample[assignment == index]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[index] = centroid / norm if norm > 0 else centroid
+        self.centroids = centroids.astype(np.float32)
+        np.save(self._path('centroids.npy'), self.centroids)
+
+        for start in range(0, self.count, 10000):
+            end = min(start + 10000, self.count)
+            self._lists[start:end] = self._assign(np.asarray(self._vectors[start:end]))
+        self._lists.flush()
+        self.trained_count = self.count
+        logger.info(f"Index {self.directory}: {nlist} listes pour {self.count} vecteurs")
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    # Lecture
+
+    def get(self, owner_id: int) -> Optional[np.ndarray]:
+        with self._lock:
+            self._refresh()
+            row = self._rows.get(int(owner_id))
+            return None if row is None else np.array(self._vectors[row])
+
+    def search(self, vector: np.ndarray, k: int = 10, nprobe: int = None,
+               exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """Top-k (id, similarité cosinus); recherche exacte tant que l'index n'est pas entraîné."""
+        with self._lock:
+            self._refresh()
+            if not self.count:
+                return []
+            if self.centroids is None:
+                rows = np.arange(self.count)
+            else:
+                nprobe = min(nprobe or self.nprobe, len(self.centroids))
+                probes = np.argpartition(-(self.centroids @ vector), nprobe - 1)[:nprobe]
+                rows = np.sort(np.concatenate([self._members[p] for p in probes]))
+            if not len(rows):
+                return []
+
+            scores = np.asarray(self._vectors[rows]) @ vector
+            ids = np.asarray(self._ids[rows])
+        excluded = set(int(i) for i in exclude)
+        wanted = min(len(rows), k + len(excluded))
+        top = np.argpartition(-scores, wanted - 1)[:wanted]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for index in top:
+            owner_id = int(ids[index])
+            if owner_id < 0 or owner_id in excluded or scores[index] <= 0:
+                continue
+            results.append((owner_id, round(float(scores[index]), 4)))
+            if len(results) == k:
+                break
+        return results
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._refresh()
+            return {
+                'count': self.count,
+                'capacity': self.capacity,
+                'dim': self.dim,
+                'lists': 0 if self.centroids is None else len(self.centroids),
+                'trained_count': self.trained_count,
+                'nprobe': self.nprobe,
+                'size_bytes': self.capacity * self.dim * 4
+            }
+
+
+class SemanticIndex:
+    """Plongements des candidats (compétences + résumé IA) et des offres (titre, description, exigences)."""
+
+    def __init__(self, directory: str, dim: int = 512, nprobe: int = 16, min_train_size: int = 5000):
+        self.embedder = HashingEmbedder(dim)
+        self.stores = {
+            name: VectorStore(os.path.join(directory, name), dim, nprobe, min_train_size)
+            for name in COLLECTIONS
+        }
+
+    def index_candidates(self, candidates: Sequence):
+        self.stores['candidate'].upsert_many(
+            [c.id for c in candidates],
+            self.embedder.embed_many([self.embedder.candidate_text(c) for c in candidates])
+        )
+
+    def index_job_postings(self, job_postings: Sequence):
+        self.stores['job_posting'].upsert_many(
+            [j.id for j in job_postings],
+            self.embedder.embed_many([self.embedder.job_posting_text(j) for j in job_postings])
+        )
+
+    def search_candidates(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        return self.stores['candidate'].search(self.embedder.embed(query), k)
+
+    def similar_candidates(self, job_posting, k: int = 10) -> List[Tuple[int, float]]:
+        vector = self.stores['job_posting'].get(job_posting.id)
+        if vector is None:
+            vector = self.embedder.embed(self.embedder.job_posting_text(job_posting))
+        return self.stores['candidate'].search(vector, k)
+
+    def stats(self) -> Dict:
+        return {name: store.stats() for name, store in self.stores.items()}
+
+
+def build_semantic_index_from_env() -> SemanticIndex:
+    """EMBEDDINGS_DIR, EMBEDDING_DIM, EMBEDDING_NPROBE, EMBEDDING_MIN_TRAIN_SIZE."""
+    default_dir = os.path.join(os.path.dirname(__file__), 'database', 'embeddings')
+    return SemanticIndex(
+        os.getenv('EMBEDDINGS_DIR', default_dir),
+        dim=int(os.getenv('EMBEDDING_DIM', '512')),
+        nprobe=int(os.getenv('EMBEDDING_NPROBE', '16')),
+        min_train_size=int(os.getenv('EMBEDDING_MIN_TRAIN_SIZE', '5000'))
+    )
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_semantic_index() -> SemanticIndex:
+    """Retourne l'index sémantique partagé du processus."""
+    global _default_index
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                _default_index = build_semantic_index_from_env()
+    return _default_index
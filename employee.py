@@ -20,9 +20,19 @@ class Employee(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Pagination par curseur des employés d'un statut, dans l'ordre des id
+        db.Index('ix_employee_status_id', 'status', 'id'),
+        # Parcours récursif de l'organigramme (rattachements d'un manager)
+        db.Index('ix_employee_manager_id', 'manager_id'),
+        # Statistiques d'équipe et version des données d'un département
+        db.Index('ix_employee_department_updated_at', 'department', 'updated_at'),
+    )
+
     # Relationships
     manager = db.relationship('Employee', remote_side=[id], backref='subordinates')
-    evaluations = db.relationship('PerformanceEvaluation', backref='employee', lazy=True)
+    evaluations = db.relationship('PerformanceEvaluation', foreign_keys='PerformanceEvaluation.employee_id',
+                                  backref='employee', lazy=True)
 
     def __repr__(self):
         return f'<Employee {self.first_name} {self.last_name}>'
@@ -62,6 +72,11 @@ class PerformanceEvaluation(db.Model):
     ai_insights = db.Column(db.Text)  # AI-generated insights
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Dernières évaluations d'un employé (historique borné des analyses IA)
+        db.Index('ix_performance_evaluation_employee_date', 'employee_id', 'evaluation_date'),
+    )
+
     evaluator = db.relationship('Employee', foreign_keys=[evaluator_id])
 
     def to_dict(self):
@@ -81,3 +96,16 @@ class PerformanceEvaluation(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+
+class TurnoverRiskAssessment(db.Model):
+    """
+    Dernière prédiction de risque de turnover d'un employé, resservie tant que l'empreinte
+    (données de l'employé et version des données de son département) ne change pas.
+    Table séparée: l'enregistrer sur Employee modifierait updated_at, donc l'empreinte.
+    """
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    result = db.Column(db.Text, nullable=False)  # JSON
+    team_stats = db.Column(db.Text)  # JSON du résumé d'équipe transmis au prompt
+    high_stakes = db.Column(db.Boolean, default=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,355 @@
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+from sqlalchemy import bindparam, literal, or_, select, update
+from sqlalchemy.exc import DBAPIError
+from src.models.user import db
+from src.models.employee import Employee
+from src.services.extraction_import import parse_date
+from src.services.org_chart import ORG_MAX_DEPTH
+from src.services.skills import canonicalize_skills, replace_skill_links
+import logging
+
+logger = logging.getLogger(__name__)
+
+EMPLOYEE_IMPORT_FORMATS = ('csv', 'ndjson')
+REQUIRED_FIELDS = ('employee_id', 'first_name', 'last_name', 'email', 'position', 'department', 'hire_date')
+FIELD_LENGTHS = {
+    'employee_id': 20, 'first_name': 50, 'last_name': 50, 'email': 120,
+    'phone': 20, 'position': 100, 'department': 100, 'status': 20
+}
+EMPLOYEE_STATUSES = ('active', 'inactive', 'terminated')
+
+
+class EmployeeRowError(ValueError):
+    """Ligne d'import invalide (rejetée et signalée dans le rapport, sans interrompre l'import)."""
+
+
+def _upsert_insert(dialect_name: str):
+    """`insert` du dialecte, seul à porter la clause ON CONFLICT."""
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Import en masse non supporté pour la base {dialect_name} (SQLite ou PostgreSQL)")
+    return insert
+
+
+def iter_employee_rows(stream: TextIO, file_format: str) -> Iterator[Tuple[int, object]]:
+    """(numéro de ligne, dict ou EmployeeRowError) d'un flux CSV (en-tête) ou NDJSON."""
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        reader.fieldnames = [name.strip() for name in reader.fieldnames or []]
+        for row_number, row in enumerate(reader, 2):
+            yield row_number, row
+    elif file_format == 'ndjson':
+        for row_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                value = json.loads(line)
+            except ValueError as e:
+                yield row_number, EmployeeRowError(f"JSON invalide: {str(e)}")
+                continue
+            yield row_number, value if isinstance(value, dict) else EmployeeRowError("Objet JSON attendu")
+    else:
+        raise ValueError(f"Format inconnu: {file_format} (csv ou ndjson)")
+
+
+def _text(value) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def validate_row(raw: Dict) -> Dict:
+    """
+    Valeurs de colonnes d'une ligne. Un champ optionnel absent ou vide n'est pas
+    renvoyé: la valeur existante est conservée lors d'une mise à jour.
+    """
+    values = {}
+    for field in REQUIRED_FIELDS:
+        value = _text(raw.get(field))
+        if value is None:
+            raise EmployeeRowError(f'Champ requis manquant: {field}')
+        values[field] = value
+    for field in ('phone', 'status'):
+        value = _text(raw.get(field))
+        if value is not None:
+            values[field] = value
+    for field, value in values.items():
+        if field in FIELD_LENGTHS and len(value) > FIELD_LENGTHS[field]:
+            raise EmployeeRowError(f'{field} trop long (maximum {FIELD_LENGTHS[field]} caractères)')
+
+    if '@' not in values['email']:
+        raise EmployeeRowError(f"Email invalide: {values['email']}")
+    values['hire_date'] = parse_date(values['hire_date'])
+    if values['hire_date'] is None:
+        raise EmployeeRowError(f"hire_date invalide: {raw.get('hire_date')} (AAAA-MM-JJ)")
+    if values.get('status') and values['status'] not in EMPLOYEE_STATUSES:
+        raise EmployeeRowError(f"Statut inconnu: {values['status']} ({', '.join(EMPLOYEE_STATUSES)})")
+
+    salary = _text(raw.get('salary'))
+    if salary is not None:
+        try:
+            values['salary'] = float(salary.replace(' ', '').replace(',', '.'))
+        except ValueError:
+            raise EmployeeRowError(f'Salaire invalide: {salary}')
+
+    # Manager: id interne, ou matricule (manager_employee_id) résolu après l'insertion
+    manager_code = _text(raw.get('manager_employee_id'))
+    manager_id = _text(raw.get('manager_id'))
+    if manager_code is not None:
+        if manager_code == values['employee_id']:
+            raise EmployeeRowError("Un employé ne peut pas être son propre manager")
+        values['_manager_code'] = manager_code
+    elif manager_id is not None:
+        try:
+            values['manager_id'] = int(manager_id)
+        except ValueError:
+            raise EmployeeRowError(f'manager_id invalide: {manager_id}')
+
+    if _text(raw.get('skills')) is not None or isinstance(raw.get('skills'), list):
+        skills = canonicalize_skills(raw['skills'])
+        values['skills'] = json.dumps([name for _, name in skills], ensure_ascii=False)
+        values['_skills'] = skills
+    return values
+
+
+def _manager_links(employee_ids) -> Dict[int, Optional[int]]:
+    """{id: manager_id} des employés donnés et de toute leur chaîne hiérarchique, en une requête récursive."""
+    table = Employee.__table__
+    chain = select(table.c.id, table.c.manager_id, literal(1).label('depth')).where(
+        table.c.id.in_(list(employee_ids))
+    ).cte('manager_links', recursive=True)
+    chain = chain.union_all(
+        select(table.c.id, table.c.manager_id, (chain.c.depth + 1).label('depth')).join(
+            chain, table.c.id == chain.c.manager_id
+        ).where(chain.c.depth < ORG_MAX_DEPTH)
+    )
+    return dict(db.session.execute(select(chain.c.id, chain.c.manager_id).distinct()).all())
+
+
+def _closes_cycle(links: Dict[int, Optional[int]], employee_pk: int, manager_pk: int) -> bool:
+    """Vrai si l'employé figure déjà dans la chaîne hiérarchique du manager."""
+    seen = set()
+    current = manager_pk
+    while current is not None and current not in seen:
+        if current == employee_pk:
+            return True
+        seen.add(current)
+        current = links.get(current)
+    return False
+
+
+class EmployeeImporter:
+    """
+    Import en masse d'employés (export SIRH) en upsert sur le matricule `employee_id`:
+    INSERT ... ON CONFLICT DO UPDATE par lots, un commit par lot.
+    Les contrôles d'unicité se font en une requête par lot (et non deux par ligne);
+    une ligne rejetée est signalée dans le rapport sans bloquer les autres.
+    """
+
+    def __init__(self, chunk_size: int = None, progress: Callable[[Dict], None] = None,
+                 max_reported_errors: int = 1000):
+        self.chunk_size = chunk_size or int(os.getenv('EMPLOYEE_IMPORT_CHUNK_SIZE', '1000'))
+        self.progress = progress
+        self.max_reported_errors = max_reported_errors
+        self.stats = {
+            'rows': 0, 'created': 0, 'updated': 0, 'errors': 0, 'chunks': 0,
+            'elapsed': 0.0, 'rows_per_second': 0.0, 'error_report': [], 'error_report_truncated': False
+        }
+        self._start = None
+        self._pending_managers = []  # (ligne, matricule, id employé, matricule du manager) pas encore importé
+
+    def import_path(self, path: str, file_format: str = None) -> Dict:
+        file_format = file_format or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        with open(path, encoding='utf-8-sig', newline='' if file_format == 'csv' else None) as stream:
+            return self.import_stream(stream, file_format)
+
+    def import_stream(self, stream: TextIO, file_format: str) -> Dict:
+        self._start = self._start or time.perf_counter()
+        chunk = []
+        for row_number, raw in iter_employee_rows(stream, file_format):
+            self.stats['rows'] += 1
+            try:
+                if isinstance(raw, Exception):
+                    raise raw
+                chunk.append((row_number, validate_row(raw)))
+            except EmployeeRowError as e:
+                self._record_error(row_number, raw.get('employee_id') if isinstance(raw, dict) else None, e)
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk)
+                chunk = []
+        if chunk:
+            self._flush(chunk)
+        return self.stats
+
+    def finish(self) -> Dict:
+        """Résout les managers référencés avant leur propre ligne, puis signale les introuvables."""
+        pending, self._pending_managers = self._pending_managers, []
+        if pending:
+            self._set_managers(pending, final=True)
+            db.session.commit()
+        self._update_timing()
+        return self.stats
+
+    def _record_error(self, row_number: int, employee_id: Optional[str], error: Exception):
+        self.stats['errors'] += 1
+        if len(self.stats['error_report']) < self.max_reported_errors:
+            self.stats['error_report'].append({'row': row_number, 'employee_id': employee_id, 'error': str(error)})
+        else:
+            self.stats['error_report_truncated'] = True
+
+    def _update_timing(self):
+        self.stats['elapsed'] = round(time.perf_counter() - self._start, 3) if self._start else 0.0
+        self.stats['rows_per_second'] = round(self.stats['rows'] / self.stats['elapsed'], 1) if self.stats['elapsed'] else 0.0
+
+    def _flush(self, chunk: List[Tuple[int, Dict]]):
+        rows = self._check_uniqueness(chunk)
+        if rows:
+            counters = {key: self.stats[key] for key in ('created', 'updated')}
+            pending = len(self._pending_managers)
+            try:
+                self._apply(rows)
+                db.session.commit()
+            except DBAPIError as e:
+                # Conflit non détecté à l'avance (écriture concurrente...): ligne par ligne
+                db.session.rollback()
+                self.stats.update(counters)
+                del self._pending_managers[pending:]
+                logger.warning(f"Lot d'employés rejoué ligne par ligne: {str(e.orig)}")
+                self._apply_row_by_row(rows)
+
+        self.stats['chunks'] += 1
+        self._update_timing()
+        if self.progress:
+            self.progress(dict(self.stats))
+
+    def _check_uniqueness(self, chunk: List[Tuple[int, Dict]]) -> List[Tuple[int, Dict, bool]]:
+        """
+        Une requête pour tout le lot: matricules existants (mise à jour) et emails déjà pris
+        par un autre matricule (rejet). Retourne (ligne, valeurs, existant).
+        """
+        # Matricule répété dans le lot: la dernière occurrence est retenue
+        latest = {}
+        for row_number, values in chunk:
+            previous = latest.get(values['employee_id'])
+            if previous is not None:
+                self._record_error(previous[0], values['employee_id'],
+                                   EmployeeRowError(f'Matricule répété (ligne {row_number} retenue)'))
+            latest[values['employee_id']] = (row_number, values)
+
+        owners = {}
+        existing = set()
+        for employee_id, email in db.session.execute(
+            select(Employee.employee_id, Employee.email).where(or_(
+                Employee.employee_id.in_(list(latest)),
+                Employee.email.in_([values['email'] for _, values in latest.values()])
+            ))
+        ):
+            owners[email] = employee_id
+            if employee_id in latest:
+                existing.add(employee_id)
+
+        rows = []
+        for row_number, values in sorted(latest.values(), key=lambda item: item[0]):
+            owner = owners.get(values['email'])
+            if owner is not None and owner != values['employee_id']:
+                self._record_error(row_number, values['employee_id'],
+                                   EmployeeRowError(f"Email déjà utilisé par l'employé {owner}"))
+                continue
+            owners[values['email']] = values['employee_id']
+            rows.append((row_number, values, values['employee_id'] in existing))
+        return rows
+
+    def _apply(self, rows: List[Tuple[int, Dict, bool]]):
+        ids = self._upsert([values for _, values, _ in rows])
+        skills = {ids[values['employee_id']]: values['_skills'] for _, values, _ in rows if '_skills' in values}
+        replace_skill_links('employee', skills)
+
+        managers = [
+            (row_number, values['employee_id'], ids[values['employee_id']], values['_manager_code'])
+            for row_number, values, _ in rows if '_manager_code' in values
+        ]
+        if managers:
+            self._set_managers(managers)
+
+        updated = sum(1 for _, _, exists in rows if exists)
+        self.stats['updated'] += updated
+        self.stats['created'] += len(rows) - updated
+
+    def _apply_row_by_row(self, rows: List[Tuple[int, Dict, bool]]):
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    self._apply([row])
+            except DBAPIError as e:
+                self._record_error(row[0], row[1]['employee_id'], EmployeeRowError(str(e.orig)))
+        db.session.commit()
+
+    def _upsert(self, rows: List[Dict]) -> Dict[str, int]:
+        """INSERT ... ON CONFLICT (employee_id) DO UPDATE; retourne {matricule: id}."""
+        insert = _upsert_insert(db.session.get_bind().dialect.name)
+        table = Employee.__table__
+        now = datetime.utcnow()
+
+        # Une instruction par jeu de colonnes: un champ absent n'écrase pas la valeur existante
+        groups = {}
+        for values in rows:
+            columns = {key: value for key, value in values.items() if not key.startswith('_')}
+            groups.setdefault(tuple(sorted(columns)), []).append(columns)
+
+        ids = {}
+        for columns, params in groups.items():
+            statement = insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.employee_id],
+                set_={
+                    **{column: statement.excluded[column] for column in columns if column != 'employee_id'},
+                    'updated_at': now
+                }
+            ).returning(table.c.employee_id, table.c.id)
+            ids.update(db.session.execute(statement, params).all())
+        return ids
+
+    def _set_managers(self, managers: List[Tuple[int, str, int, str]], final: bool = False):
+        codes = {code for _, _, _, code in managers}
+        known = dict(db.session.execute(
+            select(Employee.employee_id, Employee.id).where(Employee.employee_id.in_(codes))
+        ).all())
+
+        resolved = []
+        for manager in managers:
+            row_number, employee_id, employee_pk, code = manager
+            if code in known:
+                resolved.append(manager)
+            elif final:
+                self._record_error(row_number, employee_id, EmployeeRowError(f'Manager introuvable: {code}'))
+            else:
+                self._pending_managers.append(manager)
+
+        # Un rattachement qui placerait un employé sous lui-même (M1 -> M2 -> M1) est refusé:
+        # le contrôle tient compte des rattachements déjà acceptés dans ce lot
+        links = _manager_links({known[code] for _, _, _, code in resolved}) if resolved else {}
+        assignments = []
+        for row_number, employee_id, employee_pk, code in resolved:
+            if _closes_cycle(links, employee_pk, known[code]):
+                self._record_error(row_number, employee_id, EmployeeRowError(
+                    f'Rattachement à {code} refusé: cycle hiérarchique ({code} dépend déjà de {employee_id})'
+                ))
+                continue
+            links[employee_pk] = known[code]
+            assignments.append({'employee_pk': employee_pk, 'manager_pk': known[code]})
+
+        if assignments:
+            table = Employee.__table__
+            db.session.execute(
+                update(table).where(table.c.id == bindparam('employee_pk')).values(manager_id=bindparam('manager_pk')),
+                assignments
+            )
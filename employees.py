@@ -2,11 +2,19 @@ from flask import Blueprint, request, jsonify
 from src.models.user import db
 from src.models.employee import Employee, PerformanceEvaluation
 from src.services.ai_service import AIService
+from src.services.job_queue import enqueue
+from src.services.performance_evaluations import EVALUATION_BULK_MAX, EvaluationError, submit_evaluations, validate_evaluation
+from src.services.skills import filter_by_skills, set_skills
+from src.services.pagination import CursorError, cursor_metadata, keyset_page
+from src.services.employee_import import EMPLOYEE_IMPORT_FORMATS, EmployeeImporter
+from src.services.org_chart import chain_of_command, creates_cycle, full_chart, span_of_control, subtree
+from src.services.turnover_risk import TurnoverRiskPredictor
 from datetime import datetime, date
-import json
+import io
 
 employees_bp = Blueprint('employees', __name__)
 ai_service = AIService()
+turnover_risk = TurnoverRiskPredictor(ai_service)
 
 @employees_bp.route('/employees', methods=['GET'])
 def get_employees():
@@ -16,12 +24,30 @@ def get_employees():
         per_page = request.args.get('per_page', 20, type=int)
         department = request.args.get('department')
         status = request.args.get('status', 'active')
+        skills = request.args.get('skills')
+        skills_mode = request.args.get('skills_mode', 'and')
         
         query = Employee.query.filter_by(status=status)
         
         if department:
             query = query.filter_by(department=department)
         
+        # Filtre par compétences via la table de liaison indexée (ET / OU)
+        if skills:
+            if skills_mode not in ('and', 'or'):
+                return jsonify({'error': 'skills_mode doit valoir and ou or'}), 400
+            query = filter_by_skills(query, 'employee', Employee.id, skills, skills_mode)
+        
+        # Mode curseur (opt-in): pages de coût constant, dans l'ordre des id
+        if 'cursor' in request.args:
+            cursor_page = keyset_page(
+                query, 'employees', Employee.id, request.args.get('cursor'), per_page, descending=False
+            )
+            return jsonify({
+                'employees': [emp.to_dict() for emp in cursor_page['items']],
+                **cursor_metadata(cursor_page, query, request.args.get('total') == 'approx')
+            })
+        
         employees = query.paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -33,6 +59,9 @@ def get_employees():
             'current_page': page
         })
     
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -69,11 +98,12 @@ def create_employee():
             hire_date=hire_date,
             salary=data.get('salary'),
             manager_id=data.get('manager_id'),
-            skills=json.dumps(data.get('skills', [])),
             status=data.get('status', 'active')
         )
         
         db.session.add(employee)
+        db.session.flush()
+        set_skills(employee, data.get('skills', []), 'employee')
         db.session.commit()
         
         return jsonify(employee.to_dict()), 201
@@ -82,6 +112,30 @@ def create_employee():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@employees_bp.route('/employees/bulk', methods=['POST'])
+def bulk_import_employees():
+    """
+    Import / mise à jour en masse d'employés depuis un export SIRH (corps CSV ou NDJSON, lu en flux).
+    Upsert sur le matricule, commit par lots; les lignes rejetées figurent dans `error_report`.
+    """
+    try:
+        file_format = request.args.get('format')
+        if file_format is None:
+            mimetype = request.mimetype or ''
+            file_format = 'csv' if mimetype in ('text/csv', 'application/csv') else 'ndjson'
+        if file_format not in EMPLOYEE_IMPORT_FORMATS:
+            return jsonify({'error': f"Format non supporté (formats acceptés: {', '.join(EMPLOYEE_IMPORT_FORMATS)})"}), 400
+        
+        stream = io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='' if file_format == 'csv' else None)
+        importer = EmployeeImporter(chunk_size=request.args.get('chunk_size', type=int))
+        importer.import_stream(stream, file_format)
+        
+        return jsonify(importer.finish())
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @employees_bp.route('/employees/<int:employee_id>', methods=['GET'])
 def get_employee(employee_id):
     """Récupère les détails d'un employé."""
@@ -116,6 +170,9 @@ def update_employee(employee_id):
         employee = Employee.query.get_or_404(employee_id)
         data = request.get_json()
         
+        if 'manager_id' in data and creates_cycle(employee.id, data['manager_id']):
+            return jsonify({'error': "Rattachement impossible: le manager fait partie de l'équipe de cet employé"}), 400
+        
         # Mise à jour des champs
         for field in ['first_name', 'last_name', 'email', 'phone', 'position', 
                      'department', 'salary', 'manager_id', 'status']:
@@ -123,7 +180,7 @@ def update_employee(employee_id):
                 setattr(employee, field, data[field])
         
         if 'skills' in data:
-            employee.skills = json.dumps(data['skills'])
+            set_skills(employee, data['skills'], 'employee')
         
         if 'hire_date' in data:
             employee.hire_date = datetime.strptime(data['hire_date'], '%Y-%m-%d').date()
@@ -144,37 +201,45 @@ def create_performance_evaluation(employee_id):
         employee = Employee.query.get_or_404(employee_id)
         data = request.get_json()
         
-        required_fields = ['evaluator_id', 'evaluation_date', 'period_start', 'period_end', 'overall_score']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Champ requis manquant: {field}'}), 400
-        
-        evaluation = PerformanceEvaluation(
-            employee_id=employee_id,
-            evaluator_id=data['evaluator_id'],
-            evaluation_date=datetime.strptime(data['evaluation_date'], '%Y-%m-%d').date(),
-            period_start=datetime.strptime(data['period_start'], '%Y-%m-%d').date(),
-            period_end=datetime.strptime(data['period_end'], '%Y-%m-%d').date(),
-            overall_score=data['overall_score'],
-            goals_achievement=data.get('goals_achievement'),
-            technical_skills=data.get('technical_skills'),
-            soft_skills=data.get('soft_skills'),
-            comments=data.get('comments')
-        )
-        
-        # Génération d'insights IA
-        employee_data = employee.to_dict()
-        performance_history = [eval.to_dict() for eval in employee.evaluations]
-        ai_insights = ai_service.analyze_performance_data(employee_data, performance_history)
-        evaluation.ai_insights = json.dumps(ai_insights)
+        try:
+            evaluation = PerformanceEvaluation(**validate_evaluation(data, employee_id))
+        except EvaluationError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Mise à jour du score de performance de l'employé
-        employee.performance_score = data['overall_score']
+        employee.performance_score = evaluation.overall_score
         
         db.session.add(evaluation)
+        db.session.flush()
+        
+        # Génération d'insights IA en arrière-plan
+        job = enqueue('analyze_evaluation', evaluation.id)
         db.session.commit()
         
-        return jsonify(evaluation.to_dict()), 201
+        result = evaluation.to_dict()
+        result['ai_job'] = job.to_dict()
+        return jsonify(result), 202
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@employees_bp.route('/employees/performance/bulk', methods=['POST'])
+def bulk_create_performance_evaluations():
+    """
+    Soumission en masse d'une campagne d'évaluations (liste JSON, ou {"evaluations": [...]}).
+    Validée en une transaction sans attendre l'IA; les insights sont générés en arrière-plan.
+    """
+    try:
+        data = request.get_json()
+        items = data.get('evaluations') if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return jsonify({'error': 'Liste d\'évaluations attendue'}), 400
+        if len(items) > EVALUATION_BULK_MAX:
+            return jsonify({'error': f'Trop d\'évaluations (maximum {EVALUATION_BULK_MAX} par requête)'}), 400
+        
+        stats = submit_evaluations(items)
+        return jsonify(stats), 202 if stats['created'] else 400
     
     except Exception as e:
         db.session.rollback()
@@ -186,20 +251,77 @@ def get_turnover_risk(employee_id):
     try:
         employee = Employee.query.get_or_404(employee_id)
         
-        # Récupération des données de l'équipe pour le contexte
-        team_members = Employee.query.filter_by(
-            department=employee.department,
-            status='active'
-        ).all()
+        # Résumé statistique de l'équipe (taille fixe) et prédiction enregistrée par employé
+        prediction = turnover_risk.predict(
+            employee,
+            high_stakes=request.args.get('high_stakes') == 'true',
+            refresh=request.args.get('refresh') == 'true'
+        )
+        db.session.commit()
         
-        team_data = [member.to_dict() for member in team_members if member.id != employee_id]
+        result = dict(prediction['risk'])
+        result.update({
+            'team_stats': prediction['team_stats'],
+            'cached': prediction['cached'],
+            'computed_at': prediction['computed_at'].isoformat() if prediction['computed_at'] else None
+        })
+        return jsonify(result)
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@employees_bp.route('/org-chart', methods=['GET'])
+def get_org_chart():
+    """Organigramme complet (un arbre par employé sans manager), en une requête récursive."""
+    try:
+        roots = full_chart(request.args.get('max_depth', type=int))
         
-        risk_analysis = ai_service.predict_turnover_risk(
-            employee.to_dict(),
-            team_data
+        return jsonify({
+            'roots': roots,
+            'total_employees': sum(1 + root['headcount'] for root in roots)
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@employees_bp.route('/org-chart/span-of-control', methods=['GET'])
+def get_span_of_control():
+    """Rattachements directs et effectif total par manager."""
+    try:
+        managers = span_of_control(
+            department=request.args.get('department'),
+            limit=min(request.args.get('limit', 100, type=int), 1000)
         )
         
-        return jsonify(risk_analysis)
+        return jsonify({'managers': managers})
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@employees_bp.route('/employees/<int:employee_id>/org-chart', methods=['GET'])
+def get_employee_org_chart(employee_id):
+    """Équipe d'un manager: sous-arbre complet avec effectifs par nœud."""
+    try:
+        tree = subtree(employee_id, request.args.get('max_depth', type=int))
+        if tree is None:
+            return jsonify({'error': 'Employé introuvable'}), 404
+        
+        return jsonify(tree)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@employees_bp.route('/employees/<int:employee_id>/chain-of-command', methods=['GET'])
+def get_chain_of_command(employee_id):
+    """Ligne hiérarchique d'un employé, du manager direct jusqu'à la direction."""
+    try:
+        employee = Employee.query.get_or_404(employee_id)
+        
+        return jsonify({
+            'employee': employee.to_dict(),
+            'chain_of_command': chain_of_command(employee_id)
+        })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
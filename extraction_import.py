@@ -0,0 +1,417 @@
+import ast
+import csv
+import json
+import os
+import re
+import time
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from sqlalchemy import func
+from src.models.user import db
+from src.models.candidate import Candidate
+from src.services.match_scorer import strip_accents
+from src.services.job_queue import enqueue_unique_many
+from src.services.skills import canonicalize_skills, parse_skills, set_skills_many
+import logging
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('json', 'ndjson', 'csv')
+SCHEMAS = ('cv', 'diploma', 'cin')
+
+# Taille maximale d'un champ `data` sérialisé (CSV: repr Python d'un dict)
+MAX_FIELD_SIZE = 1024 * 1024
+_WHITESPACE = re.compile(r'\s*')
+_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y/%m/%d')
+
+
+class ImportRecordError(ValueError):
+    """Enregistrement d'extraction illisible ou inexploitable (ignoré, compté dans les erreurs)."""
+
+
+class ExtractionRecord:
+    """Résultat d'extraction d'un document: fichier source, schéma (cv, diploma, cin) et données."""
+
+    def __init__(self, source_file: str, schema_name: str, data: Dict, page_numbers: List = None):
+        self.source_file = source_file
+        self.schema_name = schema_name
+        self.data = data
+        self.page_numbers = page_numbers or []
+
+
+# Lecture en flux
+
+class _JSONStream:
+    """
+    Lecteur JSON incrémental d'un objet ou d'un tableau de premier niveau:
+    chaque valeur est décodée dès qu'elle est complète dans le tampon, sans
+    charger le fichier entier (mémoire bornée par la plus grande valeur).
+    """
+
+    def __init__(self, stream: TextIO, chunk_size: int = 64 * 1024):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        data = self.stream.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos] if self.pos < len(self.buffer) else ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ImportRecordError(f"JSON invalide: '{char}' attendu à la position {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise ImportRecordError(f"JSON invalide: {e.msg}")
+            # Un nombre en fin de tampon peut être tronqué
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def items(self) -> Iterator[Tuple[Optional[str], object]]:
+        opening = self.peek()
+        if opening not in ('{', '['):
+            raise ImportRecordError("JSON invalide: objet ou tableau attendu")
+        closing = '}' if opening == '{' else ']'
+        self.pos += 1
+        if self.peek() == closing:
+            return
+        while True:
+            key = None
+            if opening == '{':
+                key = self.value()
+                self.expect(':')
+            yield key, self.value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == closing:
+                return
+            if separator != ',':
+                raise ImportRecordError(f"JSON invalide: ',' ou '{closing}' attendu")
+
+
+def parse_structured(value):
+    """Champ sérialisé en JSON ou en repr Python (export pandas): évalué sans exécuter de code."""
+    if not isinstance(value, str):
+        return value
+    value = value.strip()
+    if not value:
+        return None
+    if len(value) > MAX_FIELD_SIZE:
+        raise ImportRecordError("Champ trop volumineux")
+    try:
+        return json.loads(value)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        raise ImportRecordError(f"Champ illisible: {value[:80]}")
+
+
+def infer_schema(data: Dict) -> Optional[str]:
+    if 'cin_number' in data:
+        return 'cin'
+    if 'student_name' in data or 'graduation_year' in data:
+        return 'diploma'
+    if 'email' in data or 'skills' in data:
+        return 'cv'
+    return None
+
+
+def to_records(source_file: str, value) -> Iterator[ExtractionRecord]:
+    """Normalise une entrée d'extraction (liste ou objet, avec ou sans enveloppe `data`)."""
+    items = value if isinstance(value, list) else [value]
+    for item in items:
+        if not isinstance(item, dict):
+            raise ImportRecordError(f"{source_file}: enregistrement inattendu")
+        if 'error' in item and 'data' not in item:
+            raise ImportRecordError(f"{source_file}: extraction en échec ({item['error']})")
+        data = parse_structured(item['data']) if 'data' in item else item
+        if not isinstance(data, dict):
+            raise ImportRecordError(f"{source_file}: champ data invalide")
+        schema_name = item.get('schema_name') or infer_schema(data)
+        if schema_name not in SCHEMAS:
+            raise ImportRecordError(f"{source_file}: schéma inconnu ({schema_name})")
+        page_numbers = parse_structured(item.get('page_numbers')) if 'page_numbers' in item else []
+        yield ExtractionRecord(source_file, schema_name, data, page_numbers)
+
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension in ('jsonl', 'ndjson'):
+        return 'ndjson'
+    if extension in IMPORT_FORMATS:
+        return extension
+    raise ValueError(f"Format non reconnu pour {path} (json, ndjson ou csv)")
+
+
+def iter_records(stream: TextIO, file_format: str,
+                 on_error: Callable[[str, Exception], None] = None) -> Iterator[ExtractionRecord]:
+    """Enregistrements d'un flux JSON, NDJSON ou CSV; les entrées illisibles passent par `on_error`."""
+    on_error = on_error or (lambda location, error: logger.warning(f"{location}: {str(error)}"))
+
+    def entries() -> Iterator[Tuple[str, str, object]]:
+        if file_format == 'json':
+            for index, (key, value) in enumerate(_JSONStream(stream).items()):
+                if key is None and isinstance(value, dict):
+                    key = value.get('source_file') or value.get('file')
+                yield f'entrée {index + 1}', key or f'entrée {index + 1}', value
+        elif file_format == 'ndjson':
+            for line_number, line in enumerate(stream, 1):
+                if not line.strip():
+                    continue
+                try:
+                    value = json.loads(line)
+                except ValueError as e:
+                    on_error(f'ligne {line_number}', ImportRecordError(f"JSON invalide: {str(e)}"))
+                    continue
+                if isinstance(value, dict) and 'schema_name' not in value and 'data' not in value \
+                        and all(isinstance(v, (list, dict)) for v in value.values()):
+                    # Ligne {fichier: [enregistrements]}
+                    for key, item in value.items():
+                        yield f'ligne {line_number}', key, item
+                else:
+                    source_file = (value.get('source_file') or value.get('file')) if isinstance(value, dict) else None
+                    yield f'ligne {line_number}', source_file or f'ligne {line_number}', value
+        elif file_format == 'csv':
+            csv.field_size_limit(MAX_FIELD_SIZE)
+            for row_number, row in enumerate(csv.DictReader(stream), 2):
+                yield f'ligne {row_number}', row.get('source_file') or row.get('file') or '', row
+        else:
+            raise ValueError(f"Format inconnu: {file_format}")
+
+    for location, source_file, value in entries():
+        try:
+            yield from to_records(source_file, value)
+        except ImportRecordError as e:
+            on_error(location, e)
+
+
+# Correspondance avec le modèle Candidate
+
+def normalize_name(name: str) -> str:
+    return re.sub(r'\s+', ' ', strip_accents(name or '').lower()).strip()
+
+
+def parse_date(value) -> Optional[date]:
+    if not value:
+        return None
+    for date_format in _DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _merge_education(current: Optional[str], entries: Iterable[Dict]) -> str:
+    education = parse_structured(current) if current else []
+    if not isinstance(education, list):
+        education = []
+    known = {
+        (normalize_name(item.get('degree')), normalize_name(item.get('institution')))
+        for item in education if isinstance(item, dict)
+    }
+    for entry in entries:
+        key = (normalize_name(entry.get('degree')), normalize_name(entry.get('institution')))
+        if key[0] and key not in known:
+            known.add(key)
+            education.append(entry)
+    return json.dumps(education, ensure_ascii=False)
+
+
+class ExtractionImporter:
+    """
+    Import idempotent des résultats d'extraction (CV, diplôme, CIN) dans Candidate.
+    - cv: création ou mise à jour par email (identité, téléphone, compétences, formation)
+    - diploma: ajouté à la formation du candidat dont le nom correspond
+    - cin: numéro, date de naissance, adresse du candidat dont le nom correspond
+    Les enregistrements sont traités par lots, une transaction par lot. Réimporter
+    le même fichier ne crée pas de doublon et laisse les données inchangées.
+    """
+
+    def __init__(self, batch_size: int = None, progress: Callable[[Dict], None] = None,
+                 max_reported_errors: int = 50):
+        self.batch_size = batch_size or int(os.getenv('ETL_BATCH_SIZE', '500'))
+        self.progress = progress
+        self.max_reported_errors = max_reported_errors
+        self.stats = {
+            'rows': 0, 'created': 0, 'updated': 0, 'unmatched': 0, 'errors': 0,
+            'batches': 0, 'elapsed': 0.0, 'rows_per_second': 0.0, 'error_samples': []
+        }
+        self._start = None
+        self._pending = []  # Diplômes / CIN sans candidat: réessayés en fin d'import
+
+    def import_path(self, path: str, file_format: str = None) -> Dict:
+        file_format = file_format or detect_format(path)
+        with open(path, encoding='utf-8-sig', newline='' if file_format == 'csv' else None) as stream:
+            return self.import_stream(stream, file_format)
+
+    def import_stream(self, stream: TextIO, file_format: str) -> Dict:
+        self._start = self._start or time.perf_counter()
+        batch = []
+        for record in iter_records(stream, file_format, self._record_error):
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+        return self.stats
+
+    def finish(self) -> Dict:
+        """Dernier passage pour les diplômes et CIN arrivés avant le CV de leur titulaire."""
+        pending, self._pending = self._pending, []
+        if pending:
+            self._flush(pending, final=True)
+        return self.stats
+
+    def _record_error(self, location: str, error: Exception):
+        self.stats['errors'] += 1
+        if len(self.stats['error_samples']) < self.max_reported_errors:
+            self.stats['error_samples'].append({'location': location, 'error': str(error)})
+
+    def _flush(self, records: List[ExtractionRecord], final: bool = False):
+        counters = {key: self.stats[key] for key in ('created', 'updated', 'unmatched')}
+        try:
+            by_email = self._load_by_email(records)
+            skills = {}
+            for record in records:
+                if record.schema_name == 'cv':
+                    self._import_cv(record, by_email, skills)
+            db.session.flush()
+            if skills:
+                set_skills_many(list(skills.values()), 'candidate')
+            # Scores précalculés et plongements des candidats créés ou modifiés, avec le lot
+            enqueue_unique_many('refresh_candidate_matches', [candidate.id for candidate in by_email.values()])
+            for record in records:
+                if record.schema_name in ('diploma', 'cin'):
+                    self._import_document(record, final)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self.stats.update(counters)
+            logger.error(f"Lot d'import annulé ({len(records)} enregistrements): {str(e)}")
+            self._record_error(records[0].source_file, e)
+            self.stats['errors'] += len(records) - 1
+            return
+
+        if not final:
+            self.stats['rows'] += len(records)
+        self.stats['batches'] += 1
+        self.stats['elapsed'] = round(time.perf_counter() - self._start, 3)
+        self.stats['rows_per_second'] = round(self.stats['rows'] / self.stats['elapsed'], 1) if self.stats['elapsed'] else 0.0
+        if self.progress:
+            self.progress(dict(self.stats))
+
+    @staticmethod
+    def _load_by_email(records: List[ExtractionRecord]) -> Dict[str, Candidate]:
+        emails = {
+            str(record.data.get('email') or '').strip().lower()
+            for record in records if record.schema_name == 'cv'
+        }
+        emails.discard('')
+        if not emails:
+            return {}
+        return {
+            candidate.email.lower(): candidate
+            for candidate in Candidate.query.filter(func.lower(Candidate.email).in_(emails)).all()
+        }
+
+    def _import_cv(self, record: ExtractionRecord, by_email: Dict[str, Candidate], skills: Dict):
+        data = record.data
+        email = str(data.get('email') or '').strip().lower()
+        if not email or '@' not in email:
+            self._record_error(record.source_file, ImportRecordError("CV sans email valide"))
+            return
+
+        candidate = by_email.get(email)
+        if candidate is None:
+            candidate = Candidate(email=email, experience_years=0)
+            db.session.add(candidate)
+            by_email[email] = candidate
+            self.stats['created'] += 1
+        else:
+            self.stats['updated'] += 1
+
+        candidate.first_name = (str(data.get('name') or '').strip() or candidate.first_name or '')[:50]
+        candidate.last_name = (str(data.get('surname') or '').strip() or candidate.last_name or '')[:50]
+        if data.get('phone'):
+            candidate.phone = str(data['phone']).strip()[:20]
+        education = [item for item in (data.get('education') or []) if isinstance(item, dict)]
+        if education:
+            candidate.education = _merge_education(candidate.education, education)
+
+        # Compétences fusionnées avec l'existant, écrites pour tout le lot après le flush
+        new_skills = parse_skills(data.get('skills'))
+        if new_skills:
+            current = skills.get(email, (candidate, [name for _, name in canonicalize_skills(candidate.skills)]))[1]
+            skills[email] = (candidate, current + new_skills)
+
+    def _import_document(self, record: ExtractionRecord, final: bool):
+        data = record.data
+        full_name = data.get('student_name') if record.schema_name == 'diploma' else data.get('full_name')
+        candidate = self._find_by_name(full_name)
+        if candidate is None:
+            if final:
+                self.stats['unmatched'] += 1
+                self._record_error(record.source_file, ImportRecordError(f"Aucun candidat nommé {full_name}"))
+            else:
+                self._pending.append(record)
+            return
+
+        if record.schema_name == 'diploma':
+            candidate.education = _merge_education(candidate.education, [{
+                'degree': data.get('degree'),
+                'institution': data.get('institution'),
+                'year': data.get('graduation_year')
+            }])
+        else:
+            candidate.cin_number = str(data.get('cin_number') or '').strip()[:20] or candidate.cin_number
+            candidate.birth_date = parse_date(data.get('birth_date')) or candidate.birth_date
+            candidate.address = (str(data.get('address') or '').strip()[:255]) or candidate.address
+            candidate.cin_expiration_date = parse_date(data.get('expiration_date')) or candidate.cin_expiration_date
+        self.stats['updated'] += 1
+
+    @staticmethod
+    def _find_by_name(full_name: str) -> Optional[Candidate]:
+        wanted = normalize_name(full_name)
+        if ' ' not in wanted:
+            return None
+        # Présélection indexable sur les mots du nom (casse usuelle), puis comparaison
+        # sans accents ni casse du nom complet, dans les deux ordres
+        variants = set()
+        for token in str(full_name).split():
+            variants.update({token, token.lower(), token.upper(), token.capitalize()})
+        matches = Candidate.query.filter(
+            Candidate.last_name.in_(variants) | Candidate.first_name.in_(variants)
+        ).limit(200).all()
+        for candidate in matches:
+            first, last = normalize_name(candidate.first_name), normalize_name(candidate.last_name)
+            if wanted in (f'{first} {last}', f'{last} {first}'):
+                return candidate
+        return None
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Importe ou met à jour les employés depuis un export SIRH (CSV avec en-tête, ou NDJSON).
+Colonnes: employee_id, first_name, last_name, email, position, department, hire_date
+(requises), phone, salary, status, manager_employee_id ou manager_id, skills.
+
+Usage:
+    python src/scripts/import_employees.py export_sirh.csv
+    python src/scripts/import_employees.py employes.ndjson --chunk-size 2000
+"""
+
+import argparse
+import os
+import sys
+
+# Ajout du chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.services.employee_import import EMPLOYEE_IMPORT_FORMATS, EmployeeImporter
+
+
+def print_progress(stats):
+    print(f"   ⏱️ {stats['rows']} lignes ({stats['rows_per_second']:.0f}/s) - "
+          f"{stats['created']} créés, {stats['updated']} mis à jour, {stats['errors']} erreurs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import en masse des employés (upsert sur le matricule)")
+    parser.add_argument('paths', nargs='+', help="Fichiers CSV ou NDJSON (.ndjson, .jsonl)")
+    parser.add_argument('--format', choices=EMPLOYEE_IMPORT_FORMATS, help="Format forcé (défaut: d'après l'extension)")
+    parser.add_argument('--chunk-size', type=int, help="Lignes par transaction (défaut: EMPLOYEE_IMPORT_CHUNK_SIZE ou 1000)")
+    args = parser.parse_args()
+
+    # Configuration de l'application Flask pour accéder à la base de données
+    os.environ.setdefault('AI_JOB_WORKER', 'external')
+    from src.main import app
+
+    with app.app_context():
+        importer = EmployeeImporter(chunk_size=args.chunk_size, progress=print_progress)
+        for path in args.paths:
+            print(f"📥 Import de {path}...")
+            importer.import_path(path, args.format)
+        stats = importer.finish()
+
+    print(f"✅ {stats['rows']} lignes en {stats['elapsed']:.1f}s ({stats['rows_per_second']:.0f}/s): "
+          f"{stats['created']} employés créés, {stats['updated']} mis à jour, {stats['errors']} erreurs")
+    for error in stats['error_report'][:50]:
+        print(f"   ⚠️ ligne {error['row']} ({error['employee_id'] or '-'}): {error['error']}")
+    return 1 if stats['errors'] and not (stats['created'] or stats['updated']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
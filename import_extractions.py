@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Importe dans la base du portail les résultats d'extraction du notebook ETL
+(CV, diplômes, CIN) au format JSON, NDJSON ou CSV.
+Les scores précalculés et plongements des candidats importés sont recalculés
+ensuite par le worker des analyses IA (jobs refresh_candidate_matches).
+
+Usage:
+    python src/scripts/import_extractions.py extracted_data.json extracted_data.csv
+    python src/scripts/import_extractions.py exports/*.ndjson --batch-size 1000
+"""
+
+import argparse
+import os
+import sys
+
+# Ajout du chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.services.extraction_import import IMPORT_FORMATS, ExtractionImporter
+
+
+def print_progress(stats):
+    print(f"   ⏱️ {stats['rows']} enregistrements ({stats['rows_per_second']:.0f}/s) - "
+          f"{stats['created']} créés, {stats['updated']} mis à jour, {stats['errors']} erreurs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import des extractions CV / diplôme / CIN dans Candidate")
+    parser.add_argument('paths', nargs='+', help="Fichiers JSON, NDJSON (.ndjson, .jsonl) ou CSV")
+    parser.add_argument('--format', choices=IMPORT_FORMATS, help="Format forcé (défaut: d'après l'extension)")
+    parser.add_argument('--batch-size', type=int, help="Enregistrements par transaction (défaut: ETL_BATCH_SIZE ou 500)")
+    args = parser.parse_args()
+
+    # Configuration de l'application Flask pour accéder à la base de données
+    os.environ.setdefault('AI_JOB_WORKER', 'external')
+    from src.main import app
+
+    with app.app_context():
+        importer = ExtractionImporter(batch_size=args.batch_size, progress=print_progress)
+        for path in args.paths:
+            print(f"📥 Import de {path}...")
+            importer.import_path(path, args.format)
+        stats = importer.finish()
+
+    print(f"✅ {stats['rows']} enregistrements en {stats['elapsed']:.1f}s ({stats['rows_per_second']:.0f}/s): "
+          f"{stats['created']} candidats créés, {stats['updated']} mises à jour, "
+          f"{stats['unmatched']} sans candidat, {stats['errors']} erreurs")
+    for sample in stats['error_samples']:
+        print(f"   ⚠️ {sample['location']}: {sample['error']}")
+    return 1 if stats['errors'] and not stats['rows'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
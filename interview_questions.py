@@ -0,0 +1,143 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from src.models.user import db
+from src.models.candidate import JobPosting, Candidate, Application
+from src.services.ai_service import AIService
+from src.services.llm_cache import LLMCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+INTERVIEW_STATUS = 'interview'
+
+
+def candidate_profile(candidate: Candidate) -> Dict:
+    """Profil transmis au prompt des questions d'entretien."""
+    return {
+        'name': f"{candidate.first_name} {candidate.last_name}",
+        'skills': json.loads(candidate.skills) if candidate.skills else [],
+        'experience_years': candidate.experience_years,
+        'summary': candidate.ai_summary
+    }
+
+
+def questions_fingerprint(job_title: str, profile: Dict) -> str:
+    """Empreinte des entrées du prompt: les questions enregistrées restent valides tant qu'elle ne change pas."""
+    payload = json.dumps([job_title, profile], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def stored_questions(application: Application, fingerprint: str) -> Optional[List[str]]:
+    """Questions enregistrées pour la candidature, si elles correspondent encore au profil et au poste."""
+    if application.interview_questions is None or application.interview_questions_fingerprint != fingerprint:
+        return None
+    return json.loads(application.interview_questions)
+
+
+def save_questions(application: Application, fingerprint: str, questions: List[str]):
+    application.interview_questions = json.dumps(questions, ensure_ascii=False)
+    application.interview_questions_fingerprint = fingerprint
+    application.interview_questions_generated_at = datetime.utcnow()
+
+
+class InterviewQuestionGenerator:
+    """
+    Questions d'entretien d'une candidature, générées une fois puis servies depuis la base.
+    Une nouvelle génération n'a lieu que si le profil du candidat ou l'intitulé du poste
+    change (empreinte différente), ou sur demande explicite.
+    """
+
+    def __init__(self, ai_service: AIService = None):
+        self.ai_service = ai_service or AIService()
+        self._regenerating_service = None
+
+    def _service(self, regenerate: bool) -> AIService:
+        if not regenerate:
+            return self.ai_service
+        if self._regenerating_service is None:
+            # Une régénération explicite ne doit pas resservir la réponse du cache LLM
+            self._regenerating_service = AIService(
+                cache=LLMCache(ttls={'generate_interview_questions': 0}),
+                raise_errors=self.ai_service.raise_errors
+            )
+        return self._regenerating_service
+
+    def _is_fallback(self, questions: List[str]) -> bool:
+        """Questions génériques renvoyées en cas d'échec de l'IA: jamais enregistrées."""
+        return not questions or questions == self.ai_service._default_interview_questions()
+
+    def questions_for(self, application: Application, regenerate: bool = False) -> Dict:
+        """
+        Retourne {'questions', 'cached', 'generated_at', 'candidate', 'job_posting'}.
+        Les nouvelles questions sont ajoutées à la session (validation par l'appelant).
+        """
+        candidate = db.session.get(Candidate, application.candidate_id)
+        job_posting = db.session.get(JobPosting, application.job_posting_id)
+        profile = candidate_profile(candidate)
+        fingerprint = questions_fingerprint(job_posting.title, profile)
+
+        questions = None if regenerate else stored_questions(application, fingerprint)
+        cached = questions is not None
+        if not cached:
+            questions = self._service(regenerate).generate_interview_questions(job_posting.title, profile)
+            if not self._is_fallback(questions):
+                save_questions(application, fingerprint, questions)
+
+        return {
+            'questions': questions,
+            'cached': cached,
+            'generated_at': application.interview_questions_generated_at,
+            'candidate': candidate,
+            'job_posting': job_posting
+        }
+
+    def pregenerate(self, status: str = INTERVIEW_STATUS, chunk_size: int = 50, progress=None) -> Dict:
+        """
+        Génère les questions manquantes ou périmées de toutes les candidatures au statut
+        donné, par blocs d'appels parallèles (AsyncAIService), un commit par bloc.
+        """
+        from src.services.async_ai_service import get_async_ai_service
+
+        stats = {'applications': 0, 'up_to_date': 0, 'generated': 0, 'failed': 0}
+        last_id = 0
+        while True:
+            rows = db.session.query(Application, Candidate, JobPosting).join(
+                Candidate, Candidate.id == Application.candidate_id
+            ).join(
+                JobPosting, JobPosting.id == Application.job_posting_id
+            ).filter(
+                Application.status == status,
+                Application.id > last_id
+            ).order_by(Application.id).limit(chunk_size).all()
+            if not rows:
+                break
+            last_id = rows[-1][0].id
+            stats['applications'] += len(rows)
+
+            pending: List[Tuple[Application, str, str, Dict]] = []
+            for application, candidate, job_posting in rows:
+                profile = candidate_profile(candidate)
+                fingerprint = questions_fingerprint(job_posting.title, profile)
+                if stored_questions(application, fingerprint) is not None:
+                    stats['up_to_date'] += 1
+                else:
+                    pending.append((application, fingerprint, job_posting.title, profile))
+
+            if pending:
+                results = get_async_ai_service().generate_interview_questions_many(
+                    [(job_title, profile) for _, _, job_title, profile in pending]
+                )
+                for (application, fingerprint, _, _), questions in zip(pending, results):
+                    if self._is_fallback(questions):
+                        stats['failed'] += 1
+                    else:
+                        save_questions(application, fingerprint, questions)
+                        stats['generated'] += 1
+                db.session.commit()
+
+            if progress:
+                progress(stats)
+        return stats
+
@@ -0,0 +1,41 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+import json
+from src.models.user import db
+
+class AIJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)  # analyze_*, extract_resume, generate_interview_questions, rescore_job_posting, refresh_*_matches
+    target_id = db.Column(db.Integer, nullable=False)  # ID de l'objet à enrichir
+    payload = db.Column(db.Text)  # JSON string of job arguments
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, running, completed, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=3, nullable=False)
+    last_error = db.Column(db.Text)
+    progress = db.Column(db.Text)  # JSON string of progress counters (jobs longs)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_ai_job_status_run_after', 'status', 'run_after'),
+        db.Index('ix_ai_job_type_target', 'job_type', 'target_id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'target_id': self.target_id,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'last_error': self.last_error,
+            'progress': json.loads(self.progress) if self.progress else None,
+            'run_after': self.run_after.isoformat() if self.run_after else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,246 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from src.models.user import db
+from src.models.job import AIJob
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Gestionnaires enregistrés par type de job: handler(target_id, payload) -> Dict (résultat)
+JOB_HANDLERS: Dict[str, Callable] = {}
+
+# Job en cours d'exécution dans le thread (pour report_progress)
+_current = threading.local()
+
+
+class PermanentJobError(Exception):
+    """Échec qu'une nouvelle tentative ne corrigerait pas: le job est marqué 'failed' sans retry."""
+
+
+def job_handler(job_type: str):
+    """Décorateur d'enregistrement d'un gestionnaire de job."""
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+def enqueue(job_type: str, target_id: int, payload: Dict = None, max_attempts: int = None) -> AIJob:
+    """
+    Ajoute un job à la file dans la session courante.
+    Le commit est laissé à l'appelant pour que l'objet et son job soient écrits ensemble.
+    """
+    job = AIJob(
+        job_type=job_type,
+        target_id=target_id,
+        payload=json.dumps(payload or {}),
+        status='pending',
+        max_attempts=max_attempts or int(os.getenv('AI_JOB_MAX_ATTEMPTS', '3')),
+        run_after=datetime.utcnow()
+    )
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+
+def enqueue_many(job_type: str, target_ids: List[int], payload: Dict = None, max_attempts: int = None) -> List[AIJob]:
+    """Comme `enqueue` pour plusieurs cibles, avec une seule écriture groupée."""
+    now = datetime.utcnow()
+    jobs = [
+        AIJob(
+            job_type=job_type,
+            target_id=target_id,
+            payload=json.dumps(payload or {}),
+            status='pending',
+            max_attempts=max_attempts or int(os.getenv('AI_JOB_MAX_ATTEMPTS', '3')),
+            run_after=now
+        )
+        for target_id in target_ids
+    ]
+    db.session.add_all(jobs)
+    db.session.flush()
+    return jobs
+
+
+def enqueue_unique(job_type: str, target_id: int, payload: Dict = None, max_attempts: int = None) -> AIJob:
+    """
+    Comme `enqueue`, mais réutilise un job identique encore en attente.
+    Un job déjà en cours ne compte pas: il a pu lire les données avant la modification.
+    """
+    job = AIJob.query.filter_by(job_type=job_type, target_id=target_id, status='pending').first()
+    if job is not None:
+        return job
+    return enqueue(job_type, target_id, payload, max_attempts)
+
+
+def enqueue_unique_many(job_type: str, target_ids: List[int], payload: Dict = None,
+                        max_attempts: int = None) -> List[AIJob]:
+    """Comme `enqueue_unique` pour plusieurs cibles: une requête pour les jobs en attente, une écriture groupée."""
+    target_ids = list(dict.fromkeys(target_ids))
+    if not target_ids:
+        return []
+    pending = {
+        job.target_id: job for job in AIJob.query.filter(
+            AIJob.job_type == job_type, AIJob.target_id.in_(target_ids), AIJob.status == 'pending'
+        ).all()
+    }
+    created = iter(enqueue_many(
+        job_type, [target_id for target_id in target_ids if target_id not in pending], payload, max_attempts
+    ))
+    return [pending[target_id] if target_id in pending else next(created) for target_id in target_ids]
+
+
+def claim_next_job() -> Optional[AIJob]:
+    """Réserve atomiquement le prochain job exécutable (UPDATE conditionnel sur le statut)."""
+    now = datetime.utcnow()
+    candidates = AIJob.query.filter(
+        AIJob.status == 'pending',
+        AIJob.run_after <= now
+    ).order_by(AIJob.run_after, AIJob.id).limit(5).all()
+
+    for job in candidates:
+        claimed = AIJob.query.filter_by(id=job.id, status='pending').update({
+            'status': 'running',
+            'attempts': AIJob.attempts + 1,
+            'started_at': now,
+            'updated_at': now
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            db.session.refresh(job)
+            return job
+    return None
+
+
+def report_progress(**progress):
+    """
+    Enregistre l'avancement du job en cours et valide le travail déjà effectué.
+    Sert aussi de battement de cœur: un job qui progresse n'est pas considéré interrompu.
+    """
+    job_id = getattr(_current, 'job_id', None)
+    if job_id is not None:
+        AIJob.query.filter_by(id=job_id).update({
+            'progress': json.dumps(progress),
+            'updated_at': datetime.utcnow()
+        }, synchronize_session=False)
+    db.session.commit()
+
+
+def run_job(job: AIJob):
+    """Exécute un job réservé; en cas d'échec, replanifie avec un backoff exponentiel (sauf PermanentJobError)."""
+    handler = JOB_HANDLERS.get(job.job_type)
+    _current.job_id = job.id
+    try:
+        if handler is None:
+            raise ValueError(f"Type de job inconnu: {job.job_type}")
+
+        handler(job.target_id, json.loads(job.payload or '{}'))
+        job.status = 'completed'
+        job.completed_at = datetime.utcnow()
+        job.last_error = None
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Erreur lors de l'exécution du job {job.id} ({job.job_type}): {str(e)}")
+        job = db.session.get(AIJob, job.id)
+        job.last_error = str(e)
+        if isinstance(e, PermanentJobError) or job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.completed_at = datetime.utcnow()
+        else:
+            backoff = float(os.getenv('AI_JOB_RETRY_BACKOFF', '5')) * (2 ** (job.attempts - 1))
+            job.status = 'pending'
+            job.run_after = datetime.utcnow() + timedelta(seconds=backoff)
+        db.session.commit()
+
+    finally:
+        _current.job_id = None
+
+
+def requeue_stale_jobs(timeout_seconds: int = None) -> int:
+    """Remet en file les jobs 'running' sans activité depuis trop longtemps (worker interrompu)."""
+    timeout_seconds = timeout_seconds or int(os.getenv('AI_JOB_STALE_TIMEOUT', '600'))
+    limit = datetime.utcnow() - timedelta(seconds=timeout_seconds)
+    count = AIJob.query.filter(
+        AIJob.status == 'running',
+        AIJob.updated_at < limit
+    ).update({'status': 'pending', 'run_after': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    return count
+
+
+class JobWorker:
+    """
+    Pool de threads qui dépile la table AIJob.
+    Peut tourner dans le processus web (start_job_worker) ou dans un processus dédié
+    (src/scripts/job_worker.py).
+    """
+
+    def __init__(self, app, concurrency: int = None, poll_interval: float = None):
+        self.app = app
+        self.concurrency = concurrency or int(os.getenv('AI_JOB_WORKERS', '2'))
+        self.poll_interval = poll_interval or float(os.getenv('AI_JOB_POLL_INTERVAL', '1.0'))
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        # Import des gestionnaires IA pour les enregistrer dans JOB_HANDLERS
+        import src.services.ai_jobs  # noqa: F401
+
+        with self.app.app_context():
+            requeued = requeue_stale_jobs()
+            if requeued:
+                logger.info(f"{requeued} job(s) IA interrompu(s) remis en file")
+
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, name=f'ai-job-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_forever(self):
+        self.start()
+        try:
+            while not self._stop.is_set():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.stop()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    job = claim_next_job()
+                    if job is not None:
+                        run_job(job)
+                        continue
+            except Exception as e:
+                logger.error(f"Erreur dans le worker de jobs IA: {str(e)}")
+            self._stop.wait(self.poll_interval)
+
+
+_worker = None
+
+
+def start_job_worker(app) -> Optional[JobWorker]:
+    """Démarre le worker intégré au processus web, sauf si AI_JOB_WORKER=external."""
+    global _worker
+    if os.getenv('AI_JOB_WORKER', 'embedded').lower() != 'embedded':
+        return None
+    # Processus enfant (pool d'extraction en 'spawn', qui réimporte le module principal)
+    if multiprocessing.parent_process() is not None:
+        return None
+    if _worker is None:
+        _worker = JobWorker(app)
+        _worker.start()
+    return _worker
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Worker dédié pour les analyses IA en arrière-plan (table AIJob).
+À utiliser avec AI_JOB_WORKER=external pour le processus web.
+"""
+
+import os
+import sys
+import logging
+
+# Ajout du chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.services.job_queue import JobWorker
+
+if __name__ == '__main__':
+    # Réutilise la configuration Flask de l'application pour accéder à la base de données
+    os.environ.setdefault('AI_JOB_WORKER', 'external')
+    from src.main import app
+    
+    logging.basicConfig(level=logging.INFO)
+    worker = JobWorker(app)
+    print(f"🔄 Worker IA démarré ({worker.concurrency} threads)")
+    worker.run_forever()
@@ -0,0 +1,298 @@
+import copy
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Durée de vie (secondes) des réponses en cache, par méthode de l'AIService.
+# 0 désactive le cache pour la méthode.
+DEFAULT_TTLS = {
+    'analyze_resume': 7 * 24 * 3600,
+    'generate_interview_questions': 7 * 24 * 3600,
+    'analyze_performance_data': 24 * 3600,
+    'generate_job_description': 30 * 24 * 3600,
+    'predict_turnover_risk': 24 * 3600,
+    'chatbot_response': 0,
+    'score_candidates_batch': 7 * 24 * 3600,
+}
+
+_MISSING = object()
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalise un prompt (espaces, indentation) pour stabiliser la clé de cache."""
+    return re.sub(r'\s+', ' ', prompt or '').strip()
+
+
+def make_cache_key(method: str, model: str, temperature: float, prompt: str) -> str:
+    """Calcule la clé de contenu (SHA-256) d'un appel LLM."""
+    payload = json.dumps(
+        [method, model, round(float(temperature), 3), normalize_prompt(prompt)],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class MemoryLRUTier:
+    """Cache LRU en mémoire, borné en nombre d'entrées, avec expiration."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at and expires_at < time.time():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            # Copie défensive: les appelants peuvent modifier le résultat retourné
+            return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._data[key] = (time.time() + ttl if ttl else 0, copy.deepcopy(value))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteTier:
+    """Cache persistant dans une table SQLite, borné en nombre d'entrées."""
+
+    def __init__(self, path: str, max_entries: int = 50000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS llm_cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' method TEXT NOT NULL,'
+            ' value TEXT NOT NULL,'
+            ' expires_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed ON llm_cache (accessed_at)')
+        self._conn.commit()
+
+    def get(self, key: str) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM llm_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return _MISSING
+            if row[1] and row[1] < now:
+                self._conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                self._conn.commit()
+                return _MISSING
+            self._conn.execute('UPDATE llm_cache SET accessed_at = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: int, method: str = ''):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, method, value, expires_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, method, json.dumps(value, ensure_ascii=False), now + ttl if ttl else 0, now)
+            )
+            # Éviction des entrées les moins récemment utilisées au-delà de la limite
+            self._conn.execute(
+                'DELETE FROM llm_cache WHERE key IN ('
+                ' SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM llm_cache')
+            self._conn.commit()
+
+
+class RedisTier:
+    """Cache persistant partagé via Redis (service `redis` du docker-compose)."""
+
+    def __init__(self, url: str, prefix: str = 'llm_cache:'):
+        import redis
+        self._redis = redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any:
+        raw = self._redis.get(self.prefix + key)
+        if raw is None:
+            return _MISSING
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: int, method: str = ''):
+        # La borne de taille est déléguée à la politique maxmemory de Redis
+        self._redis.set(self.prefix + key, json.dumps(value, ensure_ascii=False), ex=ttl or None)
+
+    def clear(self):
+        for key in self._redis.scan_iter(self.prefix + '*'):
+            self._redis.delete(key)
+
+
+class LLMCache:
+    """
+    Cache des réponses LLM adressé par contenu.
+    Niveau 1: LRU en mémoire du processus. Niveau 2 (optionnel): SQLite ou Redis.
+    """
+
+    def __init__(self, memory_tier: MemoryLRUTier = None, persistent_tier=None, ttls: Dict[str, int] = None):
+        self.memory = memory_tier or MemoryLRUTier()
+        self.persistent = persistent_tier
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def ttl_for(self, method: str) -> int:
+        return self.ttls.get(method, 3600)
+
+    def enabled_for(self, method: str) -> bool:
+        return self.ttl_for(method) > 0
+
+    def get(self, method: str, key: str, count: bool = True) -> Any:
+        """
+        Retourne la valeur en cache ou `None` si absente.
+        `count=False` permet de sonder le cache sans fausser les compteurs.
+        """
+        if not self.enabled_for(method):
+            return None
+
+        value = self.memory.get(key)
+        if value is not _MISSING:
+            if count:
+                self._count(method, 'memory_hits')
+            return value
+
+        if self.persistent is not None:
+            try:
+                value = self.persistent.get(key)
+            except Exception as e:
+                logger.warning(f"Cache LLM persistant indisponible: {str(e)}")
+                value = _MISSING
+            if value is not _MISSING:
+                self.memory.set(key, value, self.ttl_for(method))
+                if count:
+                    self._count(method, 'persistent_hits')
+                return value
+
+        if count:
+            self._count(method, 'misses')
+        return None
+
+    def is_shared(self) -> bool:
+        """Indique si le cache est visible des autres processus (niveau persistant)."""
+        return self.persistent is not None
+
+    def set(self, method: str, key: str, value: Any):
+        if not self.enabled_for(method) or value is None:
+            return
+        ttl = self.ttl_for(method)
+        self.memory.set(key, value, ttl)
+        if self.persistent is not None:
+            try:
+                self.persistent.set(key, value, ttl, method)
+            except Exception as e:
+                logger.warning(f"Écriture du cache LLM persistant impossible: {str(e)}")
+
+    def clear(self):
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            by_method = {method: dict(counters) for method, counters in self._stats.items()}
+        totals = {'memory_hits': 0, 'persistent_hits': 0, 'misses': 0}
+        for counters in by_method.values():
+            for name in totals:
+                totals[name] += counters.get(name, 0)
+        lookups = sum(totals.values())
+        return {
+            **totals,
+            'hit_rate': round((lookups - totals['misses']) / lookups, 3) if lookups else 0.0,
+            'memory_entries': len(self.memory),
+            'memory_evictions': self.memory.evictions,
+            'persistent_backend': type(self.persistent).__name__ if self.persistent else None,
+            'by_method': by_method
+        }
+
+    def _count(self, method: str, name: str):
+        with self._lock:
+            counters = self._stats.setdefault(method, {'memory_hits': 0, 'persistent_hits': 0, 'misses': 0})
+            counters[name] += 1
+
+
+def build_cache_from_env() -> LLMCache:
+    """
+    Construit le cache à partir des variables d'environnement:
+    LLM_CACHE_BACKEND (memory|sqlite|redis), LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_SQLITE_PATH, REDIS_URL, LLM_CACHE_TTL_<METHODE> (secondes).
+    """
+    backend = os.getenv('LLM_CACHE_BACKEND', 'memory').lower()
+    memory = MemoryLRUTier(int(os.getenv('LLM_CACHE_MAX_ENTRIES', '1024')))
+
+    ttls = {}
+    for method in DEFAULT_TTLS:
+        value = os.getenv(f'LLM_CACHE_TTL_{method.upper()}')
+        if value is not None:
+            ttls[method] = int(value)
+
+    persistent = None
+    try:
+        if backend == 'sqlite':
+            default_path = os.path.join(os.path.dirname(__file__), 'database', 'llm_cache.db')
+            persistent = SQLiteTier(os.getenv('LLM_CACHE_SQLITE_PATH', default_path))
+        elif backend == 'redis':
+            persistent = RedisTier(os.getenv('REDIS_URL', 'redis://localhost:6379'))
+    except Exception as e:
+        logger.warning(f"Cache LLM persistant '{backend}' indisponible, cache mémoire seul: {str(e)}")
+
+    return LLMCache(memory, persistent, ttls)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Retourne le cache LLM partagé par le processus."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = build_cache_from_env()
+    return _default_cache
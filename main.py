@@ -6,11 +6,17 @@ pip install flask flask-cors
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
+from src.services.job_queue import start_job_worker
+from src.services.resilience import init_request_deadlines
+from src.services.schema_upgrade import ensure_schema
+from src.services.search_index import get_search_index
 from src.routes.user import user_bp
 from src.routes.employees import employees_bp
 from src.routes.recruitment import recruitment_bp
 from src.routes.chatbot import chatbot_bp
 from src.routes.analytics import analytics_bp
+from src.routes.ai import ai_bp
+from src.routes.search import search_bp
 
 app = Flask(__name__, static_folder=os.path.join(o-s.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -18,12 +24,17 @@ app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 # Configuration CORS pour permettre les requêtes cross-origin
 CORS(app)
 
+# Échéance des appels IA de chaque requête (en-tête X-Request-Timeout)
+init_request_deadlines(app)
+
 # Enregistrement des blueprints
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(employees_bp, url_prefix='/api')
 app.register_blueprint(recruitment_bp, url_prefix='/api')
 app.register_blueprint(chatbot_bp, url_prefix='/api')
 app.register_blueprint(analytics_bp, url_prefix='/api')
+app.register_blueprint(ai_bp, url_prefix='/api')
+app.register_blueprint(search_bp, url_prefix='/api')
 
 # uncomment if you need to use database
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
@@ -31,6 +42,13 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 with app.app_context():
     db.create_all()
+    # Colonnes et index ajoutés aux tables d'une base existante
+    ensure_schema()
+    # Index plein texte (FTS5 / tsvector) et sa synchronisation par la base
+    get_search_index().ensure()
+
+# Worker des analyses IA en arrière-plan (désactivable avec AI_JOB_WORKER=external)
+start_job_worker(app)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
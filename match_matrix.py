@@ -0,0 +1,125 @@
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List
+from sqlalchemy import delete, insert
+from src.models.user import db
+from src.models.candidate import Candidate, JobPosting, MatchScore
+from src.services.match_scorer import MatchScorer
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Champs d'une offre dont la modification invalide ses scores précalculés
+JOB_POSTING_MATCH_FIELDS = ('title', 'description', 'requirements', 'ai_keywords', 'status')
+
+
+class MatchMatrix:
+    """
+    Table persistante des scores locaux candidat × offre active (MatchScore).
+    Mise à jour incrémentale: une ligne de la matrice (candidat) ou une colonne (offre)
+    est recalculée quand ses champs de matching changent. Le score de chaque couple
+    est indépendant des autres (TF-IDF par couple), quel que soit le chemin de mise à jour.
+    """
+
+    def __init__(self, match_scorer: MatchScorer = None, chunk_size: int = None):
+        self.match_scorer = match_scorer or MatchScorer()
+        self.chunk_size = chunk_size or int(os.getenv('MATCH_MATRIX_CHUNK_SIZE', '1000'))
+
+    def refresh_job_posting(self, job_posting_id: int) -> int:
+        """Recalcule la colonne d'une offre (supprimée si l'offre n'est plus active)."""
+        db.session.execute(delete(MatchScore).where(MatchScore.job_posting_id == job_posting_id))
+        job_posting = db.session.get(JobPosting, job_posting_id)
+        if job_posting is None or job_posting.status != 'active':
+            return 0
+
+        count = 0
+        for rows in self._iter_candidates():
+            results = self.match_scorer.score_many(rows, job_posting, pairwise=True)
+            self._insert([
+                self._row(row.id, job_posting_id, result) for row, result in zip(rows, results)
+            ])
+            count += len(rows)
+        return count
+
+    def refresh_candidate(self, candidate_id: int) -> int:
+        """Recalcule la ligne d'un candidat pour toutes les offres actives."""
+        db.session.execute(delete(MatchScore).where(MatchScore.candidate_id == candidate_id))
+        candidate = db.session.get(Candidate, candidate_id)
+        if candidate is None:
+            return 0
+
+        rows = []
+        for job_posting in self._active_job_postings():
+            result = self.match_scorer.score_many([candidate], job_posting, pairwise=True)[0]
+            rows.append(self._row(candidate_id, job_posting.id, result))
+        self._insert(rows)
+        return len(rows)
+
+    def rebuild(self) -> Dict:
+        """Reconstruit toute la matrice (initialisation ou changement du scorer)."""
+        db.session.execute(delete(MatchScore))
+        db.session.commit()
+        stats = {'job_postings': 0, 'pairs': 0}
+        for job_posting in self._active_job_postings():
+            stats['pairs'] += self.refresh_job_posting(job_posting.id)
+            stats['job_postings'] += 1
+            db.session.commit()
+        return stats
+
+    def top_candidates(self, job_posting_id: int, limit: int = 10, min_score: float = None) -> List:
+        query = db.session.query(MatchScore, Candidate).join(
+            Candidate, Candidate.id == MatchScore.candidate_id
+        ).filter(MatchScore.job_posting_id == job_posting_id)
+        if min_score is not None:
+            query = query.filter(MatchScore.score >= min_score)
+        return query.order_by(MatchScore.score.desc()).limit(limit).all()
+
+    def top_job_postings(self, candidate_id: int, limit: int = 10, min_score: float = None) -> List:
+        query = db.session.query(MatchScore, JobPosting).join(
+            JobPosting, JobPosting.id == MatchScore.job_posting_id
+        ).filter(MatchScore.candidate_id == candidate_id)
+        if min_score is not None:
+            query = query.filter(MatchScore.score >= min_score)
+        return query.order_by(MatchScore.score.desc()).limit(limit).all()
+
+    @staticmethod
+    def _row(candidate_id: int, job_posting_id: int, result: Dict) -> Dict:
+        return {
+            'candidate_id': candidate_id,
+            'job_posting_id': job_posting_id,
+            'score': result['score'],
+            'skill_overlap': result['skill_overlap'],
+            'text_similarity': result['text_similarity'],
+            'experience_fit': result['experience_fit'],
+            'computed_at': datetime.utcnow()
+        }
+
+    @staticmethod
+    def _insert(rows: List[Dict]):
+        if rows:
+            db.session.execute(insert(MatchScore), rows)
+
+    @staticmethod
+    def _active_job_postings() -> List:
+        return db.session.query(
+            JobPosting.id,
+            JobPosting.title,
+            JobPosting.description,
+            JobPosting.requirements,
+            JobPosting.ai_keywords
+        ).filter(JobPosting.status == 'active').order_by(JobPosting.id).all()
+
+    def _iter_candidates(self) -> Iterator[List]:
+        last_id = 0
+        while True:
+            rows = db.session.query(
+                Candidate.id,
+                Candidate.skills,
+                Candidate.experience_years,
+                Candidate.ai_summary,
+                Candidate.cover_letter
+            ).filter(Candidate.id > last_id).order_by(Candidate.id).limit(self.chunk_size).all()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1].id
@@ -0,0 +1,222 @@
+import json
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+STOPWORDS = {
+    'le', 'la', 'les', 'de', 'des', 'du', 'un', 'une', 'et', 'ou', 'en', 'au', 'aux', 'pour', 'par',
+    'sur', 'dans', 'avec', 'sans', 'est', 'sont', 'ce', 'ces', 'cette', 'qui', 'que', 'nous', 'vous',
+    'il', 'elle', 'ils', 'se', 'sa', 'son', 'ses', 'leur', 'leurs', 'pas', 'plus', 'tres', 'bon',
+    'the', 'and', 'or', 'of', 'to', 'in', 'for', 'with', 'on', 'at', 'by', 'an', 'is', 'are', 'be',
+    'ans', 'annees', 'years', 'year', 'experience', 'poste', 'candidat', 'competences',
+}
+
+_TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*')
+_YEARS_RE = re.compile(r'(\d{1,2})\s*\+?\s*(?:ans|annees|years|yrs)')
+
+
+def strip_accents(text: str) -> str:
+    return ''.join(
+        c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c)
+    )
+
+
+def normalize_text(text: str) -> str:
+    return strip_accents((text or '').lower())
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = [t.rstrip('.') for t in _TOKEN_RE.findall(normalize_text(text))]
+    return [t for t in tokens if len(t) > 1 and t not in STOPWORDS]
+
+
+def parse_skill_list(value) -> List[str]:
+    """Parse une liste de compétences stockée en JSON (ou séparée par des virgules)."""
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        items = value
+    else:
+        try:
+            items = json.loads(value)
+        except (TypeError, ValueError):
+            items = re.split(r'[,;\n]', value)
+        if isinstance(items, str):
+            items = [items]
+        elif not isinstance(items, list):
+            return []
+    return [normalize_text(str(item)).strip() for item in items if str(item).strip()]
+
+
+def _contains_term(text: str, term: str) -> bool:
+    return bool(term) and re.search(r'(?<![a-z0-9])' + re.escape(term) + r'(?![a-z0-9+#])', text) is not None
+
+
+def _skill_matches(a: str, b: str) -> bool:
+    """Deux compétences normalisées correspondent si l'une contient l'autre comme terme entier."""
+    return a == b or _contains_term(b, a) or _contains_term(a, b)
+
+
+class MatchScorer:
+    """
+    Score local et déterministe d'adéquation candidat–poste (0 à 100), sans appel réseau.
+    Combine le recouvrement des compétences, la similarité TF-IDF des textes et
+    l'adéquation de l'expérience. Sert de pré-filtre avant l'analyse GPT-4.
+    """
+
+    def __init__(self, skill_weight: float = 0.5, text_weight: float = 0.3, experience_weight: float = 0.2,
+                 llm_threshold: float = None, llm_top_k: int = None):
+        self.skill_weight = skill_weight
+        self.text_weight = text_weight
+        self.experience_weight = experience_weight
+        self.llm_threshold = llm_threshold if llm_threshold is not None else float(os.getenv('MATCH_LLM_THRESHOLD', '50'))
+        self.llm_top_k = llm_top_k if llm_top_k is not None else int(os.getenv('MATCH_LLM_TOP_K', '10'))
+
+    def score(self, candidate, job_posting) -> Dict:
+        """Calcule le score détaillé d'un candidat pour une offre."""
+        return self.score_many([candidate], job_posting)[0]
+
+    def score_many(self, candidates: Sequence, job_posting, pairwise: bool = False) -> List[Dict]:
+        """
+        Calcule les scores d'un ensemble de candidats pour une offre (TF-IDF vectorisé).
+        `pairwise` calcule l'IDF sur chaque couple offre–candidat seul: le score ne dépend
+        plus des autres candidats du lot (scores persistés et mis à jour un par un).
+        """
+        if not candidates:
+            return []
+
+        job_skills = parse_skill_list(job_posting.ai_keywords)
+        job_text = self.job_text(job_posting)
+        job_text_normalized = normalize_text(job_text)
+        required_years = self.required_experience_years(job_posting.requirements)
+
+        candidate_texts = [self.candidate_text(c) for c in candidates]
+        if pairwise:
+            similarities = self._pairwise_similarities(job_text, candidate_texts)
+        else:
+            similarities = self._tfidf_similarities(job_text, candidate_texts)
+
+        results = []
+        for candidate, similarity in zip(candidates, similarities):
+            candidate_skills = parse_skill_list(candidate.skills)
+            skill_overlap, matched, missing = self._skill_overlap(candidate_skills, job_skills, job_text_normalized)
+            experience_fit = self._experience_fit(candidate.experience_years, required_years)
+            score = 100 * (
+                self.skill_weight * skill_overlap
+                + self.text_weight * float(similarity)
+                + self.experience_weight * experience_fit
+            )
+            results.append({
+                'score': round(score, 1),
+                'skill_overlap': round(skill_overlap, 3),
+                'text_similarity': round(float(similarity), 3),
+                'experience_fit': round(experience_fit, 3),
+                'matched_skills': matched,
+                'missing_skills': missing,
+                'required_experience_years': required_years,
+                'source': 'local'
+            })
+        return results
+
+    def needs_llm(self, local_score: float, rank: int = None) -> bool:
+        """Indique si l'analyse GPT-4 doit être lancée (au-dessus du seuil ou dans le top-K)."""
+        if local_score >= self.llm_threshold:
+            return True
+        return rank is not None and rank < self.llm_top_k
+
+    def select_for_llm(self, scores: Sequence[float]) -> List[int]:
+        """Retourne les indices à envoyer au LLM: seuil atteint ou parmi les K meilleurs."""
+        if not len(scores):
+            return []
+        values = np.asarray(scores, dtype=np.float32)
+        selected = set(np.flatnonzero(values >= self.llm_threshold).tolist())
+        if self.llm_top_k > 0:
+            selected.update(np.argsort(-values, kind='stable')[:self.llm_top_k].tolist())
+        return sorted(selected)
+
+    @staticmethod
+    def job_text(job_posting) -> str:
+        return f"{job_posting.title}\n{job_posting.description}\n{job_posting.requirements}"
+
+    @staticmethod
+    def candidate_text(candidate) -> str:
+        skills = ' '.join(parse_skill_list(candidate.skills))
+        return f"{skills}\n{candidate.ai_summary or ''}\n{candidate.cover_letter or ''}"
+
+    @staticmethod
+    def required_experience_years(requirements: str) -> Optional[int]:
+        years = [int(y) for y in _YEARS_RE.findall(normalize_text(requirements))]
+        return min(years) if years else None
+
+    @staticmethod
+    def _skill_overlap(candidate_skills: List[str], job_skills: List[str], job_text: str):
+        candidate_set = set(candidate_skills)
+        if job_skills:
+            matched = [s for s in job_skills if any(_skill_matches(s, c) for c in candidate_set)]
+            missing = [s for s in job_skills if s not in matched]
+            return len(matched) / len(job_skills), matched, missing
+
+        # Sans mots-clés IA sur l'offre, on cherche les compétences du candidat dans le texte de l'offre
+        if not candidate_set:
+            return 0.0, [], []
+        matched = [s for s in candidate_skills if _contains_term(job_text, s)]
+        return min(1.0, len(matched) / min(len(candidate_set), 5)), matched, []
+
+    @staticmethod
+    def _experience_fit(candidate_years, required_years) -> float:
+        candidate_years = candidate_years or 0
+        if not required_years:
+            return min(1.0, 0.5 + candidate_years / 10)
+        if candidate_years >= required_years:
+            return 1.0
+        return max(0.0, candidate_years / required_years)
+
+    @staticmethod
+    def _pairwise_similarities(job_text: str, candidate_texts: List[str]) -> List[float]:
+        """Similarité TF-IDF de chaque couple (offre, candidat), l'IDF étant calculé sur les deux documents."""
+        job_weights = {token: np.log1p(count) for token, count in Counter(tokenize(job_text)).items()}
+        # IDF lissé sur deux documents: 1 pour un terme commun, log(3/2) + 1 sinon
+        rare_idf = float(np.log(1.5) + 1.0)
+        similarities = []
+        for text in candidate_texts:
+            weights = {token: np.log1p(count) for token, count in Counter(tokenize(text)).items()}
+            shared = job_weights.keys() & weights.keys()
+            dot = sum(job_weights[token] * weights[token] for token in shared)
+            job_norm = sum((w if t in shared else w * rare_idf) ** 2 for t, w in job_weights.items())
+            norm = sum((w if t in shared else w * rare_idf) ** 2 for t, w in weights.items())
+            if not dot or not job_norm or not norm:
+                similarities.append(0.0)
+                continue
+            similarities.append(min(1.0, float(dot / np.sqrt(job_norm * norm))))
+        return similarities
+
+    @staticmethod
+    def _tfidf_similarities(job_text: str, candidate_texts: List[str]) -> np.ndarray:
+        documents = [Counter(tokenize(job_text))] + [Counter(tokenize(t)) for t in candidate_texts]
+        vocabulary = {}
+        for counts in documents:
+            for token in counts:
+                vocabulary.setdefault(token, len(vocabulary))
+        if not vocabulary:
+            return np.zeros(len(candidate_texts), dtype=np.float32)
+
+        matrix = np.zeros((len(documents), len(vocabulary)), dtype=np.float32)
+        for row, counts in enumerate(documents):
+            for token, count in counts.items():
+                matrix[row, vocabulary[token]] = count
+
+        # TF sous-linéaire et IDF lissé, puis normalisation L2
+        matrix = np.log1p(matrix)
+        document_frequency = np.count_nonzero(matrix, axis=0)
+        idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1.0
+        matrix *= idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return np.clip(matrix[1:] @ matrix[0], 0.0, 1.0)
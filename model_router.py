@@ -0,0 +1,192 @@
+import os
+import threading
+from typing import Any, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Modèles par niveau: 'fast' par défaut, 'strong' en escalade
+DEFAULT_MODEL_TIERS = {
+    'fast': 'gpt-4o-mini',
+    'strong': 'gpt-4',
+}
+
+# Politique de routage par méthode:
+# - tier: niveau utilisé par défaut
+# - escalate: relance sur le niveau 'strong' si la réponse JSON est invalide
+# - max_input_tokens: au-delà, l'appel part directement sur le niveau 'strong'
+DEFAULT_ROUTING_POLICY = {
+    'analyze_resume': {'tier': 'fast', 'escalate': True, 'max_input_tokens': 2500},
+    'generate_interview_questions': {'tier': 'fast', 'escalate': True, 'max_input_tokens': None},
+    'analyze_performance_data': {'tier': 'fast', 'escalate': True, 'max_input_tokens': 1500},
+    'generate_job_description': {'tier': 'fast', 'escalate': True, 'max_input_tokens': None},
+    'chatbot_response': {'tier': 'fast', 'escalate': False, 'max_input_tokens': None},
+    'predict_turnover_risk': {'tier': 'fast', 'escalate': True, 'max_input_tokens': 1500},
+    'generate_ai_insights': {'tier': 'fast', 'escalate': True, 'max_input_tokens': 2000},
+    'score_candidates_batch': {'tier': 'fast', 'escalate': True, 'max_input_tokens': None},
+}
+
+# Champs obligatoires des réponses JSON, par méthode
+REQUIRED_FIELDS = {
+    'analyze_resume': ['skills', 'score', 'summary'],
+    'analyze_performance_data': ['performance_trend', 'predicted_score'],
+    'generate_job_description': ['description'],
+    'predict_turnover_risk': ['risk_score', 'risk_level'],
+    'generate_ai_insights': ['key_insights', 'recommendations'],
+}
+
+
+class InvalidResponseError(ValueError):
+    """Réponse du modèle non parsable ou ne respectant pas le format attendu."""
+
+
+def validate_response(method: str, result: Any):
+    """Vérifie la structure d'une réponse JSON; lève InvalidResponseError sinon."""
+    if method == 'generate_interview_questions':
+        if not isinstance(result, list) or not result or not all(isinstance(q, str) for q in result):
+            raise InvalidResponseError("liste de questions attendue")
+        return
+
+    if method == 'score_candidates_batch':
+        if not isinstance(result, list) or not all(
+            isinstance(item, dict) and 'id' in item and 'job_match_score' in item for item in result
+        ):
+            raise InvalidResponseError("liste de {id, job_match_score} attendue")
+        return
+
+    fields = REQUIRED_FIELDS.get(method)
+    if fields is None:
+        return
+    if not isinstance(result, dict):
+        raise InvalidResponseError("objet JSON attendu")
+    missing = [field for field in fields if field not in result]
+    if missing:
+        raise InvalidResponseError(f"champs manquants: {', '.join(missing)}")
+
+
+class Route:
+    """Modèles à essayer pour un appel, dans l'ordre, et raison du choix."""
+
+    def __init__(self, method: str, models: List[str], reason: str):
+        self.method = method
+        self.models = models
+        self.reason = reason
+
+    def to_dict(self) -> Dict:
+        return {'method': self.method, 'models': self.models, 'reason': self.reason}
+
+
+class ModelRouter:
+    """
+    Choix du modèle par méthode: modèle rapide par défaut, modèle fort pour les
+    entrées volumineuses ou signalées à fort enjeu, et en escalade quand la
+    réponse du modèle rapide échoue à la validation.
+    """
+
+    def __init__(self, tiers: Dict[str, str] = None, policy: Dict[str, Dict] = None,
+                 overrides: Dict[str, str] = None):
+        self.tiers = dict(DEFAULT_MODEL_TIERS)
+        if tiers:
+            self.tiers.update(tiers)
+        self.policy = {method: dict(rules) for method, rules in DEFAULT_ROUTING_POLICY.items()}
+        for method, rules in (policy or {}).items():
+            self.policy.setdefault(method, {}).update(rules)
+        # Modèle imposé pour une méthode (AI_MODEL_<METHODE>)
+        self.overrides = dict(overrides or {})
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def rules_for(self, method: str) -> Dict:
+        rules = {'tier': 'fast', 'escalate': True, 'max_input_tokens': None}
+        rules.update(self.policy.get(method, {}))
+        return rules
+
+    def route(self, method: str, input_tokens: int = 0, high_stakes: bool = False) -> Route:
+        rules = self.rules_for(method)
+        strong = self.tiers['strong']
+
+        if method in self.overrides:
+            first, reason = self.overrides[method], 'override'
+        elif high_stakes:
+            first, reason = strong, 'high_stakes'
+        elif rules['max_input_tokens'] and input_tokens > rules['max_input_tokens']:
+            first, reason = strong, 'input_size'
+        else:
+            first, reason = self.tiers.get(rules['tier'], rules['tier']), 'default'
+
+        models = [first]
+        if rules['escalate'] and first != strong:
+            models.append(strong)
+
+        self._count(method, 'routes', reason)
+        return Route(method, models, reason)
+
+    def record_result(self, method: str, model: str):
+        self._count(method, 'models', model)
+
+    def record_escalation(self, method: str, from_model: str, to_model: str, error: Exception):
+        logger.warning(f"Escalade {method}: {from_model} -> {to_model} ({str(error)})")
+        self._count(method, 'escalations', from_model)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            by_method = {
+                method: {name: dict(counts) for name, counts in values.items()}
+                for method, values in self._stats.items()
+            }
+        return {
+            'tiers': dict(self.tiers),
+            'policy': {method: self.rules_for(method) for method in self.policy},
+            'overrides': dict(self.overrides),
+            'by_method': by_method
+        }
+
+    def _count(self, method: str, name: str, key: str):
+        with self._lock:
+            counts = self._stats.setdefault(method, {
+                'routes': {}, 'models': {}, 'escalations': {}
+            })[name]
+            counts[key] = counts.get(key, 0) + 1
+
+
+def build_router_from_env() -> ModelRouter:
+    """
+    Construit la politique de routage: AI_FAST_MODEL, AI_STRONG_MODEL,
+    AI_MODEL_<METHODE> (modèle imposé), AI_MAX_INPUT_TOKENS_<METHODE>,
+    AI_MODEL_ESCALATION (true|false).
+    """
+    tiers = {
+        tier: os.getenv(f'AI_{tier.upper()}_MODEL')
+        for tier in DEFAULT_MODEL_TIERS
+        if os.getenv(f'AI_{tier.upper()}_MODEL')
+    }
+
+    escalation = os.getenv('AI_MODEL_ESCALATION', 'true').lower() in ('1', 'true', 'yes')
+    policy = {}
+    overrides = {}
+    for method in DEFAULT_ROUTING_POLICY:
+        rules = {}
+        if not escalation:
+            rules['escalate'] = False
+        if os.getenv(f'AI_MAX_INPUT_TOKENS_{method.upper()}'):
+            rules['max_input_tokens'] = int(os.getenv(f'AI_MAX_INPUT_TOKENS_{method.upper()}'))
+        if rules:
+            policy[method] = rules
+        if os.getenv(f'AI_MODEL_{method.upper()}'):
+            overrides[method] = os.getenv(f'AI_MODEL_{method.upper()}')
+
+    return ModelRouter(tiers, policy, overrides)
+
+
+_default_router = None
+_default_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Retourne la politique de routage partagée du processus."""
+    global _default_router
+    if _default_router is None:
+        with _default_router_lock:
+            if _default_router is None:
+                _default_router = build_router_from_env()
+    return _default_router
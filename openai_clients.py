@@ -0,0 +1,113 @@
+import os
+import threading
+from typing import Dict
+import httpx
+import openai
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def pool_settings() -> Dict:
+    """Paramètres du pool de connexions HTTP vers l'API OpenAI (variables d'environnement)."""
+    return {
+        'max_connections': int(os.getenv('OPENAI_MAX_CONNECTIONS', '20')),
+        'max_keepalive_connections': int(os.getenv('OPENAI_MAX_KEEPALIVE', '10')),
+        'keepalive_expiry': float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', '60')),
+        'http2': os.getenv('OPENAI_HTTP2', 'false').lower() in ('1', 'true', 'yes'),
+        'timeout': float(os.getenv('OPENAI_TIMEOUT', '60')),
+    }
+
+
+def _client_kwargs() -> Dict:
+    # Les retries sont gérés par la politique de résilience (budget, échéances)
+    kwargs = {'max_retries': int(os.getenv('OPENAI_MAX_RETRIES', '0'))}
+    base_url = os.getenv('OPENAI_BASE_URL') or os.getenv('OPENAI_API_BASE')
+    if base_url:
+        kwargs['base_url'] = base_url
+    return kwargs
+
+
+def _http_options(settings: Dict) -> Dict:
+    options = {
+        'limits': httpx.Limits(
+            max_connections=settings['max_connections'],
+            max_keepalive_connections=settings['max_keepalive_connections'],
+            keepalive_expiry=settings['keepalive_expiry']
+        ),
+        'timeout': httpx.Timeout(settings['timeout'], connect=10.0),
+    }
+    if settings['http2']:
+        try:
+            import h2  # noqa: F401
+            options['http2'] = True
+        except ImportError:
+            logger.warning("OPENAI_HTTP2 activé mais le paquet 'h2' est absent, utilisation de HTTP/1.1")
+    return options
+
+
+class OpenAIClientRegistry:
+    """
+    Registre des clients OpenAI partagés par tout le processus.
+    Les clients sont créés au premier usage et recréés après un fork
+    (serveurs pre-fork comme gunicorn), les sockets ne devant pas être partagés
+    entre processus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._client = None
+        self._async_client = None
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self._reset()
+
+    def get_client(self) -> openai.OpenAI:
+        self._check_fork()
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    settings = pool_settings()
+                    self._client = openai.OpenAI(
+                        http_client=httpx.Client(**_http_options(settings)),
+                        **_client_kwargs()
+                    )
+        return self._client
+
+    def get_async_client(self) -> openai.AsyncOpenAI:
+        self._check_fork()
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    settings = pool_settings()
+                    self._async_client = openai.AsyncOpenAI(
+                        http_client=httpx.AsyncClient(**_http_options(settings)),
+                        **_client_kwargs()
+                    )
+        return self._async_client
+
+    def after_fork_in_child(self):
+        # Le verrou peut avoir été copié dans un état verrouillé
+        self._lock = threading.Lock()
+        self._reset()
+
+
+registry = OpenAIClientRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=registry.after_fork_in_child)
+
+
+def get_openai_client() -> openai.OpenAI:
+    """Retourne le client OpenAI synchrone partagé du processus."""
+    return registry.get_client()
+
+
+def get_async_openai_client() -> openai.AsyncOpenAI:
+    """Retourne le client AsyncOpenAI partagé du processus."""
+    return registry.get_async_client()
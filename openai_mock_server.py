@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Serveur local compatible OpenAI (chat completions) pour les tests de charge et la CI hors ligne.
+Retourne un JSON conforme au format attendu par chaque méthode de l'AIService,
+avec latence, taux d'erreurs et streaming configurables.
+
+Utilisation:
+    python src/scripts/openai_mock_server.py --port 8089 --latency lognormal --latency-ms 800
+    OPENAI_BASE_URL=http://localhost:8089/v1 OPENAI_API_KEY=mock python src/main.py
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+SKILLS = ['Python', 'JavaScript', 'React', 'SQL', 'Docker', 'Gestion de projet', 'Communication',
+          'Leadership', 'Analyse de données', 'Travail en équipe', 'Java', 'Kubernetes']
+TRENDS = ['amélioration', 'stable', 'déclin']
+RISK_LEVELS = [(35, 'faible'), (65, 'moyen'), (101, 'élevé')]
+
+
+def detect_prompt_type(system_prompt: str, prompt: str) -> str:
+    """Identifie la méthode de l'AIService à l'origine du prompt."""
+    text = f"{system_prompt}\n{prompt}".lower()
+    if "adéquation de chaque candidat" in text:
+        return 'score_candidates_batch'
+    if 'analysez ce cv' in text:
+        return 'analyze_resume'
+    if "questions d'entretien" in text:
+        return 'generate_interview_questions'
+    if 'données de performance' in text:
+        return 'analyze_performance_data'
+    if 'description de poste' in text:
+        return 'generate_job_description'
+    if 'risque de turnover' in text:
+        return 'predict_turnover_risk'
+    if 'insights actionnables' in text and 'données rh' in text:
+        return 'generate_ai_insights'
+    return 'chatbot_response'
+
+
+def _pick(rng: random.Random, items: List, low: int, high: int) -> List:
+    return rng.sample(items, min(len(items), rng.randint(low, high)))
+
+
+def build_content(prompt_type: str, prompt: str, rng: random.Random) -> str:
+    """Contenu de réponse conforme au schéma attendu pour `prompt_type`."""
+    if prompt_type == 'analyze_resume':
+        result = {
+            'skills': _pick(rng, SKILLS, 3, 7),
+            'experience_years': rng.randint(0, 15),
+            'education': rng.choice(['Master en informatique', 'Licence en gestion', 'École d\'ingénieur']),
+            'summary': 'Profil polyvalent avec une expérience solide sur des projets variés.',
+            'score': rng.randint(40, 95),
+            'strengths': _pick(rng, SKILLS, 1, 3),
+            'areas_for_improvement': _pick(rng, SKILLS, 1, 2)
+        }
+        if 'description du poste' in prompt.lower():
+            result['job_match_score'] = rng.randint(30, 95)
+        return json.dumps(result, ensure_ascii=False)
+
+    if prompt_type == 'score_candidates_batch':
+        return json.dumps([{
+            'id': int(candidate_id),
+            'job_match_score': rng.randint(20, 95),
+            'summary': 'Profil cohérent avec les attentes principales du poste.',
+            'strengths': _pick(rng, SKILLS, 1, 3),
+            'concerns': _pick(rng, SKILLS, 0, 2)
+        } for candidate_id in re.findall(r'"id":\s*(\d+)', prompt)], ensure_ascii=False)
+
+    if prompt_type == 'generate_interview_questions':
+        questions = [
+            'Pouvez-vous décrire un projet technique dont vous êtes fier?',
+            'Comment gérez-vous les priorités contradictoires?',
+            'Décrivez une situation de conflit en équipe et sa résolution.',
+            'Quelle technologie avez-vous apprise récemment, et comment?',
+            'Comment abordez-vous la revue de code?',
+            'Parlez-nous d\'un échec professionnel et de ce que vous en avez retenu.',
+            'Qu\'est-ce qui vous motive dans ce poste?',
+            'Où vous voyez-vous dans trois ans?',
+            'Comment mesurez-vous la qualité de votre travail?',
+            'Comment communiquez-vous avec des interlocuteurs non techniques?'
+        ]
+        return json.dumps(_pick(rng, questions, 8, 10), ensure_ascii=False)
+
+    if prompt_type == 'analyze_performance_data':
+        return json.dumps({
+            'performance_trend': rng.choice(TRENDS),
+            'predicted_score': rng.randint(55, 95),
+            'strengths': _pick(rng, SKILLS, 1, 3),
+            'development_areas': _pick(rng, SKILLS, 1, 2),
+            'recommendations': ['Définir des objectifs trimestriels', 'Mettre en place un mentorat'],
+            'training_suggestions': ['Formation leadership', 'Certification cloud'],
+            'risk_factors': []
+        }, ensure_ascii=False)
+
+    if prompt_type == 'generate_job_description':
+        return json.dumps({
+            'description': 'Poste au sein d\'une équipe dynamique, en charge de projets à fort impact.',
+            'responsibilities': ['Concevoir et livrer des fonctionnalités', 'Collaborer avec les équipes métier'],
+            'qualifications': ['3 ans d\'expérience minimum', 'Bac+5 ou équivalent'],
+            'preferred_skills': _pick(rng, SKILLS, 2, 4),
+            'keywords': _pick(rng, SKILLS, 3, 5)
+        }, ensure_ascii=False)
+
+    if prompt_type == 'predict_turnover_risk':
+        risk_score = rng.randint(5, 95)
+        return json.dumps({
+            'risk_score': risk_score,
+            'risk_level': next(level for bound, level in RISK_LEVELS if risk_score < bound),
+            'risk_factors': ['Rémunération sous la moyenne de l\'équipe'] if risk_score >= 50 else [],
+            'retention_strategies': ['Entretien individuel', 'Plan de carrière'],
+            'timeline': rng.choice(['0-6 mois', '6-12 mois', '12-24 mois'])
+        }, ensure_ascii=False)
+
+    if prompt_type == 'generate_ai_insights':
+        return json.dumps({
+            'key_insights': ['Le taux de conversion des candidatures est stable'],
+            'recommendations': ['Accélérer le traitement des candidatures en attente'],
+            'trends': ['Hausse des recrutements IT'],
+            'alerts': [],
+            'opportunities': ['Programme de cooptation']
+        }, ensure_ascii=False)
+
+    return ("Merci pour votre question. Selon la politique RH en vigueur, je vous invite à consulter "
+            "votre espace employé ou à contacter le service RH pour une réponse personnalisée.")
+
+
+class LatencyModel:
+    """
+    Distribution de latence simulée: fixed, uniform, normal, lognormal ou exponential,
+    paramétrée par une moyenne et une dispersion (en millisecondes).
+    """
+
+    DISTRIBUTIONS = ('fixed', 'uniform', 'normal', 'lognormal', 'exponential')
+
+    def __init__(self, distribution: str = 'fixed', mean_ms: float = 0, spread: float = 0.5):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Distribution inconnue: {distribution}")
+        self.distribution = distribution
+        self.mean_ms = mean_ms
+        self.spread = spread
+
+    def sample(self, rng: random.Random) -> float:
+        """Latence tirée, en secondes."""
+        mean = self.mean_ms
+        if mean <= 0:
+            return 0.0
+        if self.distribution == 'uniform':
+            value = rng.uniform(mean * (1 - self.spread), mean * (1 + self.spread))
+        elif self.distribution == 'normal':
+            value = rng.gauss(mean, mean * self.spread)
+        elif self.distribution == 'lognormal':
+            # `spread` est l'écart-type du logarithme; mu ajusté pour conserver la moyenne
+            mu = math.log(mean) - self.spread ** 2 / 2
+            value = rng.lognormvariate(mu, self.spread)
+        elif self.distribution == 'exponential':
+            value = rng.expovariate(1.0 / mean)
+        else:
+            value = mean
+        return max(0.0, value) / 1000.0
+
+
+class MockConfig:
+    def __init__(self, latency: LatencyModel = None, stream_delay_ms: float = 0, error_rate: float = 0.0,
+                 error_codes: List[int] = None, invalid_json_rate: float = 0.0, hang_rate: float = 0.0,
+                 hang_seconds: float = 120.0, seed: Optional[int] = None):
+        self.latency = latency or LatencyModel()
+        self.stream_delay_ms = stream_delay_ms
+        self.error_rate = error_rate
+        self.error_codes = error_codes or [429, 500, 503]
+        self.invalid_json_rate = invalid_json_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.seed = seed
+
+    def to_dict(self) -> Dict:
+        return {
+            'latency': {
+                'distribution': self.latency.distribution,
+                'mean_ms': self.latency.mean_ms,
+                'spread': self.latency.spread
+            },
+            'stream_delay_ms': self.stream_delay_ms,
+            'error_rate': self.error_rate,
+            'error_codes': self.error_codes,
+            'invalid_json_rate': self.invalid_json_rate,
+            'hang_rate': self.hang_rate,
+            'seed': self.seed
+        }
+
+
+ERROR_TYPES = {
+    429: ('rate_limit_exceeded', 'Rate limit reached for requests'),
+    500: ('server_error', 'The server had an error while processing your request.'),
+    502: ('server_error', 'Bad gateway.'),
+    503: ('server_error', 'The engine is currently overloaded, please try again later.'),
+}
+
+
+def create_app(config: MockConfig = None) -> Flask:
+    config = config or MockConfig()
+    app = Flask(__name__)
+    lock = threading.Lock()
+    state = {'sequence': 0}
+    stats = {'requests': 0, 'errors': 0, 'invalid_json': 0, 'hangs': 0, 'streams': 0, 'by_type': {}}
+
+    def request_rng(body: Dict) -> random.Random:
+        # Avec une graine, chaque requête a son propre tirage reproductible (n° de séquence + contenu)
+        with lock:
+            state['sequence'] += 1
+            sequence = state['sequence']
+        if config.seed is None:
+            return random.Random()
+        digest = hashlib.sha256(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()
+        return random.Random(f"{config.seed}:{sequence}:{digest}")
+
+    def count(name: str, prompt_type: str = None):
+        with lock:
+            stats[name] += 1
+            if prompt_type:
+                stats['by_type'][prompt_type] = stats['by_type'].get(prompt_type, 0) + 1
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    @app.route('/chat/completions', methods=['POST'])
+    def chat_completions():
+        body = request.get_json(force=True)
+        messages = body.get('messages', [])
+        system_prompt = next((m.get('content', '') for m in messages if m.get('role') == 'system'), '')
+        prompt = next((m.get('content', '') for m in reversed(messages) if m.get('role') == 'user'), '')
+        model = body.get('model', 'gpt-4')
+        prompt_type = detect_prompt_type(system_prompt, prompt)
+        rng = request_rng(body)
+        count('requests', prompt_type)
+
+        time.sleep(config.latency.sample(rng))
+
+        if rng.random() < config.hang_rate:
+            count('hangs')
+            time.sleep(config.hang_seconds)
+
+        if rng.random() < config.error_rate:
+            count('errors')
+            status = rng.choice(config.error_codes)
+            error_type, message = ERROR_TYPES.get(status, ('server_error', 'Mock error'))
+            return jsonify({'error': {'message': message, 'type': error_type, 'code': status}}), status
+
+        # Le contenu ne dépend que du prompt: deux appels identiques reçoivent la même réponse
+        content_rng = random.Random(hashlib.sha256(f"{config.seed}:{system_prompt}\n{prompt}".encode('utf-8')).hexdigest())
+        content = build_content(prompt_type, prompt, content_rng)
+        if prompt_type != 'chatbot_response' and rng.random() < config.invalid_json_rate:
+            count('invalid_json')
+            content = content[:len(content) // 2]
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        prompt_tokens = (len(system_prompt) + len(prompt)) // 4 + 1
+        completion_tokens = len(content) // 4 + 1
+
+        if body.get('stream'):
+            count('streams')
+            return Response(
+                stream_with_context(stream_chunks(completion_id, created, model, content, rng)),
+                mimetype='text/event-stream'
+            )
+
+        return jsonify({
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': created,
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            }
+        })
+
+    def stream_chunks(completion_id: str, created: int, model: str, content: str, rng: random.Random):
+        def chunk(delta: Dict, finish_reason: str = None) -> str:
+            payload = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        yield chunk({'role': 'assistant', 'content': ''})
+        # Fragments de quelques mots, comme un flux de tokens
+        words = content.split(' ')
+        for i in range(0, len(words), 3):
+            if config.stream_delay_ms:
+                time.sleep(rng.uniform(0.5, 1.5) * config.stream_delay_ms / 1000.0)
+            text = ' '.join(words[i:i + 3])
+            yield chunk({'content': text if i == 0 else ' ' + text})
+        yield chunk({}, 'stop')
+        yield "data: [DONE]\n\n"
+
+    @app.route('/v1/models', methods=['GET'])
+    @app.route('/models', methods=['GET'])
+    def list_models():
+        return jsonify({
+            'object': 'list',
+            'data': [{'id': model, 'object': 'model', 'owned_by': 'mock'}
+                     for model in ['gpt-4', 'gpt-4o-mini']]
+        })
+
+    @app.route('/_mock/stats', methods=['GET'])
+    def mock_stats():
+        with lock:
+            current = json.loads(json.dumps(stats))
+        current['config'] = config.to_dict()
+        return jsonify(current)
+
+    return app
+
+
+def config_from_args(args) -> MockConfig:
+    return MockConfig(
+        latency=LatencyModel(args.latency, args.latency_ms, args.latency_spread),
+        stream_delay_ms=args.stream_delay_ms,
+        error_rate=args.error_rate,
+        error_codes=[int(code) for code in args.error_codes.split(',') if code],
+        invalid_json_rate=args.invalid_json_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        seed=args.seed
+    )
+
+
+def parse_args(argv=None):
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="Serveur local compatible OpenAI pour les tests de charge")
+    parser.add_argument('--host', default=env('MOCK_OPENAI_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(env('MOCK_OPENAI_PORT', '8089')))
+    parser.add_argument('--latency', choices=LatencyModel.DISTRIBUTIONS, default=env('MOCK_OPENAI_LATENCY', 'fixed'),
+                        help="distribution de la latence avant réponse")
+    parser.add_argument('--latency-ms', type=float, default=float(env('MOCK_OPENAI_LATENCY_MS', '0')),
+                        help="latence moyenne en millisecondes")
+    parser.add_argument('--latency-spread', type=float, default=float(env('MOCK_OPENAI_LATENCY_SPREAD', '0.5')),
+                        help="dispersion relative (uniform/normal) ou sigma (lognormal)")
+    parser.add_argument('--stream-delay-ms', type=float, default=float(env('MOCK_OPENAI_STREAM_DELAY_MS', '0')),
+                        help="délai moyen entre deux fragments en streaming")
+    parser.add_argument('--error-rate', type=float, default=float(env('MOCK_OPENAI_ERROR_RATE', '0')),
+                        help="proportion de réponses en erreur HTTP")
+    parser.add_argument('--error-codes', default=env('MOCK_OPENAI_ERROR_CODES', '429,500,503'))
+    parser.add_argument('--invalid-json-rate', type=float, default=float(env('MOCK_OPENAI_INVALID_JSON_RATE', '0')),
+                        help="proportion de réponses JSON tronquées (teste l'escalade de modèle)")
+    parser.add_argument('--hang-rate', type=float, default=float(env('MOCK_OPENAI_HANG_RATE', '0')),
+                        help="proportion de requêtes bloquées (teste les échéances)")
+    parser.add_argument('--hang-seconds', type=float, default=float(env('MOCK_OPENAI_HANG_SECONDS', '120')))
+    parser.add_argument('--seed', type=int, default=int(env('MOCK_OPENAI_SEED')) if env('MOCK_OPENAI_SEED') else None,
+                        help="graine pour des tirages reproductibles")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    app = create_app(config_from_args(args))
+    print(f"🧪 Serveur OpenAI simulé sur http://{args.host}:{args.port}/v1")
+    app.run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,156 @@
+import os
+from typing import Dict, List, Optional
+from sqlalchemy import case, func, literal, select
+from src.models.user import db
+from src.models.employee import Employee
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Garde-fou contre un cycle de manager_id (données importées): profondeur maximale parcourue
+ORG_MAX_DEPTH = int(os.getenv('ORG_MAX_DEPTH', '50'))
+
+NODE_COLUMNS = (
+    Employee.id, Employee.employee_id, Employee.first_name, Employee.last_name,
+    Employee.position, Employee.department, Employee.status, Employee.manager_id
+)
+
+
+def _node(row, depth: int) -> Dict:
+    return {
+        'id': row.id,
+        'employee_id': row.employee_id,
+        'name': f"{row.first_name} {row.last_name}",
+        'position': row.position,
+        'department': row.department,
+        'status': row.status,
+        'manager_id': row.manager_id,
+        'depth': depth
+    }
+
+
+def _subtree_rows(root_id: Optional[int], max_depth: int):
+    """
+    Une requête récursive pour tout le sous-arbre (ou tout l'organigramme si `root_id` est None),
+    quel que soit le nombre de niveaux: le parcours se fait dans la base, via l'index sur manager_id.
+    """
+    table = Employee.__table__
+    anchor = select(table.c.id, literal(0).label('depth'))
+    anchor = anchor.where(table.c.id == root_id) if root_id is not None else anchor.where(table.c.manager_id.is_(None))
+    tree = anchor.cte('org_tree', recursive=True)
+    tree = tree.union_all(
+        select(table.c.id, (tree.c.depth + 1).label('depth')).join(
+            tree, table.c.manager_id == tree.c.id
+        ).where(tree.c.depth < max_depth)
+    )
+    return db.session.execute(
+        select(*NODE_COLUMNS, tree.c.depth).join(tree, Employee.id == tree.c.id).order_by(tree.c.depth, Employee.id)
+    ).all()
+
+
+def _build_tree(rows) -> List[Dict]:
+    """Imbrique les lignes (triées par profondeur) et calcule rattachements directs et effectif total."""
+    nodes = {}
+    roots = []
+    for row in rows:
+        if row.id in nodes:
+            continue  # Cycle de manager_id: chaque employé n'apparaît qu'une fois
+        node = _node(row, row.depth)
+        node['reports'] = []
+        nodes[row.id] = node
+        parent = nodes.get(row.manager_id) if row.depth else None
+        (parent['reports'] if parent is not None else roots).append(node)
+
+    # Effectifs cumulés du bas vers le haut (ordre de profondeur décroissante)
+    for node in reversed(list(nodes.values())):
+        node['direct_reports'] = len(node['reports'])
+        node['headcount'] = sum(1 + child['headcount'] for child in node['reports'])
+    return roots
+
+
+def subtree(employee_id: int, max_depth: int = None) -> Optional[Dict]:
+    """Employé et toute sa ligne hiérarchique descendante, imbriquée (`reports`)."""
+    roots = _build_tree(_subtree_rows(employee_id, min(max_depth or ORG_MAX_DEPTH, ORG_MAX_DEPTH)))
+    return roots[0] if roots else None
+
+
+def full_chart(max_depth: int = None) -> List[Dict]:
+    """Organigramme complet: un arbre par employé sans manager."""
+    return _build_tree(_subtree_rows(None, min(max_depth or ORG_MAX_DEPTH, ORG_MAX_DEPTH)))
+
+
+def chain_of_command(employee_id: int) -> List[Dict]:
+    """Managers successifs d'un employé, du manager direct jusqu'au sommet, en une requête."""
+    table = Employee.__table__
+    chain = select(table.c.manager_id, literal(1).label('depth')).where(table.c.id == employee_id).cte(
+        'chain_of_command', recursive=True
+    )
+    chain = chain.union_all(
+        select(table.c.manager_id, (chain.c.depth + 1).label('depth')).join(
+            chain, table.c.id == chain.c.manager_id
+        ).where(chain.c.depth < ORG_MAX_DEPTH)
+    )
+    rows = db.session.execute(
+        select(*NODE_COLUMNS, chain.c.depth).join(chain, Employee.id == chain.c.manager_id).order_by(chain.c.depth)
+    ).all()
+
+    managers = []
+    seen = {employee_id}
+    for row in rows:
+        if row.id in seen:
+            break  # Cycle de manager_id
+        seen.add(row.id)
+        managers.append(_node(row, row.depth))
+    return managers
+
+
+def creates_cycle(employee_id: int, manager_id: Optional[int]) -> bool:
+    """Vrai si rattacher l'employé à ce manager le placerait sous lui-même."""
+    if manager_id is None:
+        return False
+    if manager_id == employee_id:
+        return True
+    return any(manager['id'] == employee_id for manager in chain_of_command(manager_id))
+
+
+def span_of_control(department: str = None, limit: int = 100) -> List[Dict]:
+    """
+    Par manager: rattachements directs et effectif total sous sa responsabilité,
+    agrégés dans la base sur la fermeture transitive (requête récursive unique).
+    """
+    table = Employee.__table__
+    reports = select(
+        table.c.manager_id.label('manager_id'), table.c.id.label('employee_id'), literal(1).label('depth')
+    ).where(table.c.manager_id.is_not(None)).cte('reporting_lines', recursive=True)
+    reports = reports.union_all(
+        select(reports.c.manager_id, table.c.id, (reports.c.depth + 1).label('depth')).join(
+            reports, table.c.manager_id == reports.c.employee_id
+        ).where(reports.c.depth < ORG_MAX_DEPTH)
+    )
+    totals = select(
+        reports.c.manager_id,
+        func.sum(case((reports.c.depth == 1, 1), else_=0)).label('direct_reports'),
+        func.count().label('headcount'),
+        func.max(reports.c.depth).label('levels')
+    ).group_by(reports.c.manager_id).subquery()
+
+    query = select(*NODE_COLUMNS, totals.c.direct_reports, totals.c.headcount, totals.c.levels).join(
+        totals, Employee.id == totals.c.manager_id
+    )
+    if department:
+        query = query.where(Employee.department == department)
+    rows = db.session.execute(
+        query.order_by(totals.c.headcount.desc(), Employee.id).limit(limit)
+    ).all()
+
+    result = []
+    for row in rows:
+        node = _node(row, 0)
+        del node['depth']
+        node.update({
+            'direct_reports': int(row.direct_reports),
+            'headcount': int(row.headcount),
+            'levels': int(row.levels)
+        })
+        result.append(node)
+    return result
@@ -0,0 +1,128 @@
+import base64
+import binascii
+import json
+import os
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import func, literal, select, text, tuple_
+from src.models.user import db
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Au-delà, le total approximatif est plafonné hors PostgreSQL (« au moins N »)
+APPROX_COUNT_CAP = int(os.getenv('APPROX_COUNT_CAP', '10000'))
+MAX_PER_PAGE = 100
+
+
+class CursorError(ValueError):
+    """Curseur illisible ou émis pour une autre liste."""
+
+
+def encode_cursor(scope: str, values: Sequence) -> str:
+    """Curseur opaque: position (clé de tri, id) de la dernière ligne servie."""
+    payload = json.dumps([scope] + [
+        value.isoformat() if isinstance(value, (date, datetime)) else value for value in values
+    ], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, scope: str, columns: Sequence) -> List:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise CursorError('Curseur invalide')
+    if not isinstance(payload, list) or payload[:1] != [scope] or len(payload) != len(columns) + 1:
+        raise CursorError('Curseur invalide pour cette liste')
+
+    values = []
+    for column, value in zip(columns, payload[1:]):
+        # Les dates voyagent en ISO 8601 dans le curseur
+        python_type = column.type.python_type
+        if value is not None and python_type in (date, datetime):
+            try:
+                value = python_type.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise CursorError('Curseur invalide')
+        values.append(value)
+    return values
+
+
+def _ordered(column, descending: bool):
+    return column.desc() if descending else column.asc()
+
+
+def _after(columns: Sequence, values: Sequence, descending: bool):
+    """Prédicat « strictement après `values` », en comparaison de lignes (plage d'index)."""
+    if len(columns) == 1:
+        return columns[0] < values[0] if descending else columns[0] > values[0]
+    row, position = tuple_(*columns), tuple_(*[literal(value) for value in values])
+    return row < position if descending else row > position
+
+
+def keyset_page(query, scope: str, id_column, cursor: Optional[str], per_page: int,
+                sort_column=None, descending: bool = True) -> Dict:
+    """
+    Page d'une liste triée par (sort_column, id), ou par id seul.
+    Le coût d'une page ne dépend pas de sa profondeur: pas d'OFFSET ni de COUNT(*),
+    la position est reprise depuis le curseur par une plage de l'index composite.
+    Les lignes dont la clé de tri est NULL viennent en fin de liste, parcourues par id.
+    Retourne {'items', 'next_cursor', 'has_more'}.
+    """
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    columns = [sort_column, id_column] if sort_column is not None else [id_column]
+    position = decode_cursor(cursor, scope, columns) if cursor else None
+
+    rows = []
+    if sort_column is None:
+        ranged = query.filter(_after(columns, position, descending)) if position else query
+        rows = ranged.order_by(_ordered(id_column, descending)).limit(per_page + 1).all()
+    else:
+        if position is None or position[0] is not None:
+            ranged = query.filter(sort_column.is_not(None))
+            if position:
+                ranged = ranged.filter(_after(columns, position, descending))
+            rows = ranged.order_by(
+                _ordered(sort_column, descending), _ordered(id_column, descending)
+            ).limit(per_page + 1).all()
+        if len(rows) <= per_page and sort_column.nullable:
+            tail = query.filter(sort_column.is_(None))
+            if position and position[0] is None:
+                tail = tail.filter(_after([id_column], position[1:], descending))
+            rows += tail.order_by(_ordered(id_column, descending)).limit(per_page + 1 - len(rows)).all()
+
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor(scope, [getattr(items[-1], column.key) for column in columns])
+    return {'items': items, 'next_cursor': next_cursor, 'has_more': has_more}
+
+
+def cursor_metadata(page: Dict, query, with_total: bool = False) -> Dict:
+    """Champs de réponse d'une page par curseur, avec le total approximatif sur demande."""
+    metadata = {'next_cursor': page['next_cursor'], 'has_more': page['has_more']}
+    if with_total:
+        metadata['total'], metadata['total_exact'] = approximate_total(query)
+    return metadata
+
+
+def approximate_total(query) -> Tuple[int, bool]:
+    """
+    Nombre approximatif de lignes d'une requête filtrée, sans COUNT(*) complet.
+    PostgreSQL: estimation du planificateur (EXPLAIN). Ailleurs: comptage plafonné à
+    APPROX_COUNT_CAP lignes. Retourne (total, exact).
+    """
+    statement = query.order_by(None).statement
+    if db.engine.dialect.name == 'postgresql':
+        compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+        plan = db.session.execute(text(f'EXPLAIN (FORMAT JSON) {compiled}')).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows']), False
+
+    capped = statement.limit(APPROX_COUNT_CAP + 1).subquery()
+    total = db.session.execute(select(func.count()).select_from(capped)).scalar()
+    if total > APPROX_COUNT_CAP:
+        return APPROX_COUNT_CAP, False
+    return total, True
@@ -0,0 +1,130 @@
+import os
+from datetime import date, datetime
+from typing import Dict, List
+from src.models.user import db
+from src.models.employee import Employee, PerformanceEvaluation
+from src.services.job_queue import enqueue_many
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Évaluations les plus récentes transmises à l'analyse IA d'une évaluation
+EVALUATION_HISTORY_LIMIT = int(os.getenv('EVALUATION_HISTORY_LIMIT', '10'))
+# Taille maximale d'une soumission en masse (une campagne d'évaluations)
+EVALUATION_BULK_MAX = int(os.getenv('EVALUATION_BULK_MAX', '1000'))
+
+REQUIRED_FIELDS = ('evaluator_id', 'evaluation_date', 'period_start', 'period_end', 'overall_score')
+DATE_FIELDS = ('evaluation_date', 'period_start', 'period_end')
+SCORE_FIELDS = ('overall_score', 'goals_achievement', 'technical_skills', 'soft_skills')
+
+
+class EvaluationError(ValueError):
+    """Évaluation invalide (400 pour une évaluation seule, rejetée et signalée dans une soumission en masse)."""
+
+
+def validate_evaluation(raw: Dict, employee_id: int = None) -> Dict:
+    """Colonnes d'une évaluation soumise. `employee_id` vient de l'URL, sinon du corps."""
+    if not isinstance(raw, dict):
+        raise EvaluationError('Évaluation invalide: objet JSON attendu')
+    fields = REQUIRED_FIELDS if employee_id is not None else ('employee_id',) + REQUIRED_FIELDS
+    for field in fields:
+        if raw.get(field) is None:
+            raise EvaluationError(f'Champ requis manquant: {field}')
+
+    values = {'employee_id': employee_id, 'comments': raw.get('comments')}
+    for field in ('employee_id', 'evaluator_id'):
+        if raw.get(field) is not None:
+            try:
+                values[field] = int(raw[field])
+            except (TypeError, ValueError):
+                raise EvaluationError(f'{field} invalide: {raw[field]}')
+    for field in DATE_FIELDS:
+        try:
+            values[field] = datetime.strptime(str(raw[field]), '%Y-%m-%d').date()
+        except ValueError:
+            raise EvaluationError(f'{field} invalide: {raw[field]} (AAAA-MM-JJ)')
+    for field in SCORE_FIELDS:
+        if raw.get(field) is None:
+            values[field] = None
+            continue
+        try:
+            values[field] = float(raw[field])
+        except (TypeError, ValueError):
+            raise EvaluationError(f'{field} invalide: {raw[field]}')
+
+    if values['period_start'] > values['period_end']:
+        raise EvaluationError('period_start doit précéder period_end')
+    return values
+
+
+def recent_evaluations(employee_id: int, until: date = None, limit: int = None) -> List[PerformanceEvaluation]:
+    """Dernières évaluations d'un employé (jusqu'à `until` inclus), de la plus récente à la plus ancienne."""
+    query = PerformanceEvaluation.query.filter(PerformanceEvaluation.employee_id == employee_id)
+    if until is not None:
+        query = query.filter(PerformanceEvaluation.evaluation_date <= until)
+    return query.order_by(
+        PerformanceEvaluation.evaluation_date.desc(), PerformanceEvaluation.id.desc()
+    ).limit(limit or EVALUATION_HISTORY_LIMIT).all()
+
+
+def submit_evaluations(items: List[Dict], max_reported_errors: int = 100) -> Dict:
+    """
+    Enregistre une campagne d'évaluations en une transaction: validation, contrôle des
+    employés et évaluateurs en une requête, insertion groupée et un job d'analyse IA par
+    évaluation. Les évaluations invalides sont rejetées et signalées dans `error_report`
+    sans bloquer les autres. Le score de performance d'un employé devient celui de sa
+    plus récente évaluation soumise.
+    """
+    stats = {
+        'submitted': len(items), 'created': 0, 'errors': 0,
+        'evaluations': [], 'ai_jobs': 0, 'error_report': [], 'error_report_truncated': False
+    }
+
+    def record_error(index: int, raw, error: Exception):
+        stats['errors'] += 1
+        if len(stats['error_report']) < max_reported_errors:
+            employee_id = raw.get('employee_id') if isinstance(raw, dict) else None
+            stats['error_report'].append({'index': index, 'employee_id': employee_id, 'error': str(error)})
+        else:
+            stats['error_report_truncated'] = True
+
+    valid = []
+    for index, raw in enumerate(items):
+        try:
+            valid.append((index, raw, validate_evaluation(raw)))
+        except EvaluationError as e:
+            record_error(index, raw, e)
+
+    referenced = {values['employee_id'] for _, _, values in valid} | {values['evaluator_id'] for _, _, values in valid}
+    employees = {
+        employee.id: employee for employee in Employee.query.filter(Employee.id.in_(referenced)).all()
+    } if referenced else {}
+
+    evaluations = []
+    latest: Dict[int, PerformanceEvaluation] = {}
+    for index, raw, values in valid:
+        if values['employee_id'] not in employees:
+            record_error(index, raw, EvaluationError(f"Employé introuvable: {values['employee_id']}"))
+            continue
+        if values['evaluator_id'] not in employees:
+            record_error(index, raw, EvaluationError(f"Évaluateur introuvable: {values['evaluator_id']}"))
+            continue
+        evaluation = PerformanceEvaluation(**values)
+        evaluations.append(evaluation)
+        current = latest.get(evaluation.employee_id)
+        if current is None or evaluation.evaluation_date >= current.evaluation_date:
+            latest[evaluation.employee_id] = evaluation
+
+    if evaluations:
+        db.session.add_all(evaluations)
+        for employee_id, evaluation in latest.items():
+            employees[employee_id].performance_score = evaluation.overall_score
+        db.session.flush()
+        # Insights IA en arrière-plan: la campagne est validée sans attendre GPT-4
+        jobs = enqueue_many('analyze_evaluation', [evaluation.id for evaluation in evaluations])
+        stats['ai_jobs'] = len(jobs)
+        stats['created'] = len(evaluations)
+        stats['evaluations'] = [evaluation.id for evaluation in evaluations]
+    db.session.commit()
+    logger.info(f"Évaluations en masse: {stats['created']} créées, {stats['errors']} rejetées")
+    return stats
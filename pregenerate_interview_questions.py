@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Prégénère les questions d'entretien de toutes les candidatures au statut `interview`
+(ou au statut donné). Les questions encore à jour sont conservées: la commande peut
+être relancée sans nouvel appel IA.
+
+Usage:
+    python src/scripts/pregenerate_interview_questions.py
+    python src/scripts/pregenerate_interview_questions.py --chunk-size 100
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Ajout du chemin parent pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from src.services.interview_questions import INTERVIEW_STATUS, InterviewQuestionGenerator
+
+
+def print_progress(stats):
+    print(f"   ⏱️ {stats['applications']} candidatures - {stats['generated']} générées, "
+          f"{stats['up_to_date']} à jour, {stats['failed']} échecs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prégénération des questions d'entretien")
+    parser.add_argument('--status', default=INTERVIEW_STATUS, help=f"Statut des candidatures (défaut: {INTERVIEW_STATUS})")
+    parser.add_argument('--chunk-size', type=int, default=50, help="Candidatures par bloc d'appels IA parallèles")
+    args = parser.parse_args()
+
+    # Configuration de l'application Flask pour accéder à la base de données
+    os.environ.setdefault('AI_JOB_WORKER', 'external')
+    from src.main import app
+
+    with app.app_context():
+        print(f"🎤 Prégénération des questions d'entretien (statut {args.status})...")
+        start = time.time()
+        stats = InterviewQuestionGenerator().pregenerate(args.status, args.chunk_size, progress=print_progress)
+        elapsed = time.time() - start
+        print(f"   ✅ {stats['generated']} générées, {stats['up_to_date']} déjà à jour, "
+              f"{stats['failed']} échecs en {elapsed:.1f}s")
+        return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import json
+import os
+import re
+import textwrap
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+import logging
+
+try:
+    import tiktoken
+except ImportError:  # Comptage approximatif si tiktoken n'est pas installé
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Budget de tokens alloué aux données injectées dans le prompt, par méthode de l'AIService
+DEFAULT_TOKEN_BUDGETS = {
+    'analyze_resume': 3000,
+    'generate_interview_questions': 800,
+    'analyze_performance_data': 1500,
+    'generate_job_description': 500,
+    'chatbot_response': 800,
+    'predict_turnover_risk': 1500,
+    'score_candidates_batch': 3000,
+}
+
+# Champs utiles au LLM (sans identifiants, emails, téléphones ni horodatages techniques)
+EMPLOYEE_FIELDS = ['position', 'department', 'hire_date', 'salary', 'status', 'skills', 'performance_score']
+EVALUATION_FIELDS = ['evaluation_date', 'overall_score', 'goals_achievement', 'technical_skills', 'soft_skills', 'comments']
+CANDIDATE_PROFILE_FIELDS = ['name', 'skills', 'experience_years', 'summary']
+BATCH_PROFILE_FIELDS = ['id', 'skills', 'experience_years', 'summary']
+
+_JSON_TEXT_FIELDS = {'skills', 'education', 'ai_keywords'}
+
+
+def project(record: Dict, fields: Optional[Sequence[str]] = None) -> Dict:
+    """Ne conserve que les champs demandés et non vides; décode les listes stockées en JSON."""
+    if not isinstance(record, dict):
+        return record
+    keys = fields if fields is not None else record.keys()
+    projected = {}
+    for key in keys:
+        value = record.get(key)
+        if value is None or value == '' or value == []:
+            continue
+        if key in _JSON_TEXT_FIELDS and isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        projected[key] = value
+    return projected
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def summarize_records(records: List[Dict]) -> Dict:
+    """Résumé statistique d'une collection: min/moyenne/max des champs numériques, effectifs des catégories."""
+    summary = {}
+    keys = {key for record in records for key in record}
+    for key in sorted(keys):
+        values = [record[key] for record in records if key in record]
+        numbers = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+        if numbers and len(numbers) == len(values):
+            summary[key] = {
+                'min': min(numbers),
+                'mean': round(sum(numbers) / len(numbers), 2),
+                'max': max(numbers)
+            }
+            continue
+        hashable = [v for v in values if isinstance(v, str)]
+        distinct = Counter(hashable)
+        if hashable and len(distinct) <= 10:
+            summary[key] = dict(distinct.most_common())
+    return summary
+
+
+class PromptReport:
+    """Comptabilité des tokens d'un appel: données brutes (JSON indenté) contre données compactées."""
+
+    def __init__(self, method: str):
+        self.method = method
+        self.original_tokens = 0
+        self.compact_tokens = 0
+        self.prompt_tokens = 0
+        self.sampled = False
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.original_tokens - self.compact_tokens)
+
+    def to_dict(self) -> Dict:
+        return {
+            'method': self.method,
+            'prompt_tokens': self.prompt_tokens,
+            'original_data_tokens': self.original_tokens,
+            'compact_data_tokens': self.compact_tokens,
+            'tokens_saved': self.tokens_saved,
+            'sampled': self.sampled
+        }
+
+
+class PromptBuilder:
+    """
+    Construction de prompts compacts: projection des champs utiles, JSON sans
+    indentation, comptage local des tokens et respect d'un budget par méthode
+    (échantillonnage + résumé des grandes collections).
+    """
+
+    def __init__(self, model: str = 'gpt-4', budgets: Dict[str, int] = None):
+        self.model = model
+        self.budgets = dict(DEFAULT_TOKEN_BUDGETS)
+        if budgets:
+            self.budgets.update(budgets)
+        self._encoder = None
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def count_tokens(self, text: str) -> int:
+        if not text:
+            return 0
+        encoder = self._get_encoder()
+        if encoder is None:
+            # Approximation usuelle: ~4 caractères par token
+            return len(text) // 4 + 1
+        return len(encoder.encode(text, disallowed_special=()))
+
+    def budget_for(self, method: str) -> int:
+        return self.budgets.get(method, 1000)
+
+    def report(self, method: str) -> PromptReport:
+        return PromptReport(method)
+
+    def compact(self, value: Any, fields: Optional[Sequence[str]] = None, report: PromptReport = None) -> str:
+        """Sérialise une valeur (dict ou liste de dicts) après projection des champs."""
+        if isinstance(value, list):
+            projected = [project(item, fields) for item in value]
+        else:
+            projected = project(value, fields)
+        text = compact_json(projected)
+        self._account(report, value, text)
+        return text
+
+    def fit_list(self, items: Sequence[Dict], fields: Optional[Sequence[str]], budget: int,
+                 strategy: str = 'spread', report: PromptReport = None) -> str:
+        """
+        Sérialise une collection dans la limite de `budget` tokens.
+        Au-delà, renvoie {count, summary, sample}: 'recent' garde les premiers éléments
+        (collection triée par l'appelant), 'spread' un échantillon réparti uniformément.
+        """
+        items = list(items or [])
+        projected = [project(item, fields) for item in items]
+        text = compact_json(projected)
+
+        if self.count_tokens(text) > budget and len(projected) > 1:
+            summary = summarize_records(projected)
+            low, high = 0, len(projected)
+            best = compact_json({'count': len(projected), 'summary': summary, 'sample': []})
+            # Recherche dichotomique de la plus grande taille d'échantillon qui tient dans le budget
+            while low < high:
+                size = (low + high + 1) // 2
+                candidate = compact_json({
+                    'count': len(projected),
+                    'summary': summary,
+                    'sample': self._sample(projected, size, strategy)
+                })
+                if self.count_tokens(candidate) <= budget:
+                    best, low = candidate, size
+                else:
+                    high = size - 1
+            text = best
+            if report is not None:
+                report.sampled = True
+
+        self._account(report, items, text)
+        return text
+
+    def truncate_text(self, text: str, budget: int, report: PromptReport = None) -> str:
+        """Tronque un texte libre (CV, message) à `budget` tokens."""
+        text = text or ''
+        result = text
+        if self.count_tokens(text) > budget:
+            encoder = self._get_encoder()
+            if encoder is not None:
+                result = encoder.decode(encoder.encode(text, disallowed_special=())[:budget])
+            else:
+                result = text[:budget * 4]
+            if report is not None:
+                report.sampled = True
+        if report is not None:
+            report.original_tokens += self.count_tokens(text)
+            report.compact_tokens += self.count_tokens(result)
+        return result
+
+    def finish(self, report: PromptReport, prompt: str) -> str:
+        """
+        Nettoie l'indentation du gabarit, enregistre les compteurs de l'appel,
+        journalise les tokens économisés et retourne le prompt final.
+        """
+        prompt = re.sub(r'\n{3,}', '\n\n', textwrap.dedent(prompt).strip())
+        report.prompt_tokens = self.count_tokens(prompt)
+        with self._lock:
+            stats = self._stats.setdefault(report.method, {
+                'calls': 0, 'prompt_tokens': 0, 'tokens_saved': 0, 'sampled_calls': 0
+            })
+            stats['calls'] += 1
+            stats['prompt_tokens'] += report.prompt_tokens
+            stats['tokens_saved'] += report.tokens_saved
+            stats['sampled_calls'] += 1 if report.sampled else 0
+        logger.info(
+            f"Prompt {report.method}: {report.prompt_tokens} tokens, "
+            f"{report.tokens_saved} tokens économisés"
+        )
+        return prompt
+
+    def stats(self) -> Dict:
+        with self._lock:
+            by_method = {method: dict(values) for method, values in self._stats.items()}
+        return {
+            'token_counter': 'tiktoken' if self._get_encoder() is not None else 'approximation',
+            'budgets': dict(self.budgets),
+            'total_tokens_saved': sum(values['tokens_saved'] for values in by_method.values()),
+            'by_method': by_method
+        }
+
+    def _account(self, report: Optional[PromptReport], original: Any, compact_text: str):
+        if report is None:
+            return
+        report.original_tokens += self.count_tokens(json.dumps(original, indent=2, default=str))
+        report.compact_tokens += self.count_tokens(compact_text)
+
+    def _get_encoder(self):
+        if self._encoder is None and tiktoken is not None:
+            try:
+                self._encoder = tiktoken.encoding_for_model(self.model)
+            except Exception:
+                try:
+                    self._encoder = tiktoken.get_encoding('cl100k_base')
+                except Exception as e:
+                    logger.warning(f"Encodeur tiktoken indisponible: {str(e)}")
+                    self._encoder = False
+        return self._encoder or None
+
+    @staticmethod
+    def _sample(items: List[Dict], size: int, strategy: str) -> List[Dict]:
+        if size <= 0:
+            return []
+        if strategy == 'recent' or size >= len(items):
+            return items[:size]
+        step = len(items) / size
+        return [items[int(i * step)] for i in range(size)]
+
+
+_default_builder = None
+_default_builder_lock = threading.Lock()
+
+
+def get_prompt_builder() -> PromptBuilder:
+    """Retourne le constructeur de prompts partagé du processus."""
+    global _default_builder
+    if _default_builder is None:
+        with _default_builder_lock:
+            if _default_builder is None:
+                # Budgets surchargeables par méthode: PROMPT_TOKEN_BUDGET_<METHODE>
+                budgets = {
+                    method: int(os.getenv(f'PROMPT_TOKEN_BUDGET_{method.upper()}'))
+                    for method in DEFAULT_TOKEN_BUDGETS
+                    if os.getenv(f'PROMPT_TOKEN_BUDGET_{method.upper()}')
+                }
+                _default_builder = PromptBuilder(budgets=budgets)
+    return _default_builder
@@ -1,7 +1,18 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db
-from src.models.candidate import JobPosting, Candidate, Application
+from src.models.candidate import JobPosting, Candidate, Application, MatchScore
 from src.services.ai_service import AIService
+from src.services.match_scorer import MatchScorer
+from src.services.job_queue import enqueue, enqueue_unique
+from src.services.bulk_scoring import RESCORE_MODES
+from src.services.match_matrix import MatchMatrix, JOB_POSTING_MATCH_FIELDS
+from src.services.skills import filter_by_skills, set_skills
+from src.services.embeddings import get_semantic_index
+from src.services.resume_extraction import ALLOWED_EXTENSIONS, UploadError, stream_upload
+from src.services.document_store import apply_resume_analysis, document_for_path, register_document
+from src.services.interview_questions import INTERVIEW_STATUS, InterviewQuestionGenerator
+from src.services.pagination import CursorError, cursor_metadata, keyset_page
+from src.models.job import AIJob
 from datetime import datetime, date
 import json
 import os
@@ -9,9 +20,11 @@ from werkzeug.utils import secure_filename
 
 recruitment_bp = Blueprint('recruitment', __name__)
 ai_service = AIService()
+interview_questions = InterviewQuestionGenerator(ai_service)
+match_scorer = MatchScorer()
+match_matrix = MatchMatrix(match_scorer)
 
-UPLOAD_FOLDER = 'uploads/resumes'
-ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
+UPLOAD_FOLDER = os.getenv('RESUME_UPLOAD_FOLDER', 'uploads/resumes')
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -30,6 +43,17 @@ def get_job_postings():
         if department:
             query = query.filter_by(department=department)
         
+        # Mode curseur (opt-in): pages de coût constant, triées par (posted_date, id)
+        if 'cursor' in request.args:
+            cursor_page = keyset_page(
+                query, 'job_postings', JobPosting.id, request.args.get('cursor'), per_page,
+                sort_column=JobPosting.posted_date
+            )
+            return jsonify({
+                'job_postings': [job.to_dict() for job in cursor_page['items']],
+                **cursor_metadata(cursor_page, query, request.args.get('total') == 'approx')
+            })
+        
         job_postings = query.order_by(JobPosting.posted_date.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -41,6 +65,9 @@ def get_job_postings():
             'current_page': page
         })
     
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -82,6 +109,12 @@ def create_job_posting():
         )
         
         db.session.add(job_posting)
+        
+        # Scores précalculés de tous les candidats pour la nouvelle offre
+        if job_posting.status == 'active':
+            db.session.flush()
+            enqueue_unique('refresh_job_posting_matches', job_posting.id)
+        
         db.session.commit()
         
         return jsonify(job_posting.to_dict()), 201
@@ -109,6 +142,136 @@ def get_job_posting(job_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@recruitment_bp.route('/job-postings/<int:job_id>', methods=['PUT'])
+def update_job_posting(job_id):
+    """Met à jour une offre d'emploi."""
+    try:
+        job_posting = JobPosting.query.get_or_404(job_id)
+        data = request.get_json()
+        
+        before = {field: getattr(job_posting, field) for field in JOB_POSTING_MATCH_FIELDS}
+        
+        for field in ['title', 'department', 'description', 'salary_min', 'salary_max',
+                      'location', 'employment_type', 'status']:
+            if field in data:
+                setattr(job_posting, field, data[field])
+        
+        if 'requirements' in data:
+            job_posting.requirements = data['requirements'] if isinstance(data['requirements'], str) else '\n'.join(data['requirements'])
+        
+        if 'ai_keywords' in data:
+            job_posting.ai_keywords = data['ai_keywords'] if isinstance(data['ai_keywords'], str) else json.dumps(data['ai_keywords'])
+        
+        if 'closing_date' in data:
+            job_posting.closing_date = datetime.strptime(data['closing_date'], '%Y-%m-%d').date() if data['closing_date'] else None
+        
+        result = job_posting.to_dict()
+        
+        # Champs de matching modifiés: recalcul des scores précalculés de l'offre
+        if any(getattr(job_posting, field) != value for field, value in before.items()):
+            job = enqueue_unique('refresh_job_posting_matches', job_posting.id)
+            result['ai_job'] = job.to_dict()
+        
+        db.session.commit()
+        
+        return jsonify(result)
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@recruitment_bp.route('/job-postings/<int:job_id>/top-candidates', methods=['GET'])
+def get_top_candidates(job_id):
+    """Meilleurs candidats pour une offre, d'après les scores précalculés."""
+    try:
+        JobPosting.query.get_or_404(job_id)
+        limit = min(request.args.get('limit', 10, type=int), 100)
+        min_score = request.args.get('min_score', type=float)
+        
+        matches = match_matrix.top_candidates(job_id, limit, min_score)
+        
+        return jsonify({
+            'job_posting_id': job_id,
+            'candidates': [
+                {**match.to_dict(), 'candidate': candidate.to_dict()}
+                for match, candidate in matches
+            ]
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@recruitment_bp.route('/candidates/<int:candidate_id>/top-jobs', methods=['GET'])
+def get_top_jobs(candidate_id):
+    """Meilleures offres actives pour un candidat, d'après les scores précalculés."""
+    try:
+        Candidate.query.get_or_404(candidate_id)
+        limit = min(request.args.get('limit', 10, type=int), 100)
+        min_score = request.args.get('min_score', type=float)
+        
+        matches = match_matrix.top_job_postings(candidate_id, limit, min_score)
+        
+        return jsonify({
+            'candidate_id': candidate_id,
+            'job_postings': [
+                {**match.to_dict(), 'job_posting': job_posting.to_dict()}
+                for match, job_posting in matches
+            ]
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@recruitment_bp.route('/job-postings/<int:job_id>/similar-candidates', methods=['GET'])
+def get_similar_candidates(job_id):
+    """Candidats sémantiquement proches d'une offre (plongements locaux, sans appel LLM)."""
+    try:
+        job_posting = JobPosting.query.get_or_404(job_id)
+        limit = min(request.args.get('limit', 10, type=int), 100)
+        
+        matches = get_semantic_index().similar_candidates(job_posting, limit)
+        
+        return jsonify({
+            'job_posting_id': job_id,
+            'candidates': _semantic_results(matches)
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@recruitment_bp.route('/job-postings/<int:job_id>/rescore', methods=['POST'])
+def rescore_job_posting(job_id):
+    """Recalcule en arrière-plan les scores de toutes les candidatures d'une offre."""
+    try:
+        job_posting = JobPosting.query.get_or_404(job_id)
+        data = request.get_json(silent=True) or {}
+        
+        mode = data.get('mode', 'auto')
+        if mode not in RESCORE_MODES:
+            return jsonify({'error': f"Mode invalide, valeurs possibles: {', '.join(RESCORE_MODES)}"}), 400
+        
+        # Un seul recalcul à la fois par offre
+        job = AIJob.query.filter(
+            AIJob.job_type == 'rescore_job_posting',
+            AIJob.target_id == job_id,
+            AIJob.status.in_(['pending', 'running'])
+        ).first()
+        
+        if job is None:
+            job = enqueue('rescore_job_posting', job_posting.id, {'mode': mode}, max_attempts=1)
+            db.session.commit()
+        
+        return jsonify({
+            'job_posting_id': job_id,
+            'mode': json.loads(job.payload).get('mode'),
+            'applicants': Application.query.filter_by(job_posting_id=job_id).count(),
+            'ai_job': job.to_dict()
+        }), 202
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @recruitment_bp.route('/candidates', methods=['GET'])
 def get_candidates():
     """Récupère la liste des candidats."""
@@ -116,12 +279,31 @@ def get_candidates():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         min_score = request.args.get('min_score', type=float)
+        skills = request.args.get('skills')
+        skills_mode = request.args.get('skills_mode', 'and')
         
         query = Candidate.query
         
         if min_score:
             query = query.filter(Candidate.ai_score >= min_score)
         
+        # Filtre par compétences via la table de liaison indexée (ET / OU)
+        if skills:
+            if skills_mode not in ('and', 'or'):
+                return jsonify({'error': 'skills_mode doit valoir and ou or'}), 400
+            query = filter_by_skills(query, 'candidate', Candidate.id, skills, skills_mode)
+        
+        # Mode curseur (opt-in): pages de coût constant, triées par (ai_score, id)
+        if 'cursor' in request.args:
+            cursor_page = keyset_page(
+                query, 'candidates', Candidate.id, request.args.get('cursor'), per_page,
+                sort_column=Candidate.ai_score
+            )
+            return jsonify({
+                'candidates': [candidate.to_dict() for candidate in cursor_page['items']],
+                **cursor_metadata(cursor_page, query, request.args.get('total') == 'approx')
+            })
+        
         candidates = query.order_by(Candidate.ai_score.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -133,9 +315,43 @@ def get_candidates():
             'current_page': page
         })
     
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@recruitment_bp.route('/candidates/search', methods=['GET'])
+def search_candidates():
+    """Recherche de candidats en langage naturel (ex. "data engineer Spark français")."""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Paramètre q requis'}), 400
+        limit = min(request.args.get('limit', 10, type=int), 100)
+        
+        matches = get_semantic_index().search_candidates(query, limit)
+        
+        return jsonify({
+            'query': query,
+            'candidates': _semantic_results(matches)
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _semantic_results(matches):
+    """Charge en une requête les candidats trouvés, dans l'ordre de similarité."""
+    candidates = {
+        candidate.id: candidate
+        for candidate in Candidate.query.filter(Candidate.id.in_([i for i, _ in matches])).all()
+    }
+    return [
+        {**candidates[candidate_id].to_dict(), 'semantic_score': score}
+        for candidate_id, score in matches
+        if candidate_id in candidates
+    ]
+
 @recruitment_bp.route('/candidates', methods=['POST'])
 def create_candidate():
     """Crée un nouveau candidat avec analyse IA du CV."""
@@ -161,18 +377,23 @@ def create_candidate():
             experience_years=data.get('experience_years', 0)
         )
         
-        # Analyse IA du CV si fourni
+        db.session.add(candidate)
+        db.session.flush()
+        
+        if data.get('skills'):
+            set_skills(candidate, data['skills'], 'candidate')
+        
+        # Analyse IA du CV si fourni, exécutée en arrière-plan
         if data.get('resume_text'):
-            ai_analysis = ai_service.analyze_resume(data['resume_text'])
-            candidate.skills = json.dumps(ai_analysis.get('skills', []))
-            candidate.ai_score = ai_analysis.get('score', 0)
-            candidate.ai_summary = ai_analysis.get('summary', '')
-            candidate.experience_years = ai_analysis.get('experience_years', candidate.experience_years)
+            job = enqueue('analyze_candidate', candidate.id, {'resume_text': data['resume_text']})
+            db.session.commit()
             
-            if ai_analysis.get('education'):
-                candidate.education = json.dumps(ai_analysis.get('education'))
+            result = candidate.to_dict()
+            result['ai_job'] = job.to_dict()
+            return jsonify(result), 202
         
-        db.session.add(candidate)
+        # Sans CV, les scores précalculés reposent sur la lettre de motivation et l'expérience
+        enqueue_unique('refresh_candidate_matches', candidate.id)
         db.session.commit()
         
         return jsonify(candidate.to_dict()), 201
@@ -181,6 +402,101 @@ def create_candidate():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@recruitment_bp.route('/candidates/<int:candidate_id>/resume', methods=['POST'])
+def upload_resume(candidate_id):
+    """
+    Reçoit le CV d'un candidat (multipart, champ `resume`), écrit sur disque au fil de l'eau.
+    L'extraction du texte et l'analyse IA sont exécutées en arrière-plan; un fichier déjà
+    analysé (même SHA-256) est appliqué immédiatement, sans extraction ni appel LLM.
+    """
+    try:
+        candidate = Candidate.query.get_or_404(candidate_id)
+        
+        try:
+            upload = stream_upload(request.stream, request.content_type, UPLOAD_FOLDER, field_name='resume')
+        except UploadError as e:
+            return jsonify({'error': str(e)}), e.status_code
+        
+        document = register_document(upload)
+        candidate.resume_path = document.path
+        
+        result = {
+            'candidate_id': candidate.id,
+            'resume_path': candidate.resume_path,
+            'size': upload['size'],
+            'document': document.to_dict()
+        }
+        
+        if document.analysis is not None:
+            apply_resume_analysis(candidate, json.loads(document.analysis))
+            enqueue_unique('refresh_candidate_matches', candidate.id)
+            db.session.commit()
+            result['status'] = 'completed'
+            return jsonify(result)
+        
+        job = enqueue('extract_resume', candidate.id, {'document_sha256': document.sha256})
+        db.session.commit()
+        
+        result['status'] = 'extracting'
+        result['ai_job'] = job.to_dict()
+        return jsonify(result), 202
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@recruitment_bp.route('/candidates/<int:candidate_id>/resume/status', methods=['GET'])
+def get_resume_status(candidate_id):
+    """Avancement du traitement du dernier CV envoyé: extraction puis analyse IA."""
+    try:
+        candidate = Candidate.query.get_or_404(candidate_id)
+        document = document_for_path(candidate.resume_path)
+        
+        extraction = AIJob.query.filter_by(job_type='extract_resume', target_id=candidate_id).order_by(
+            AIJob.id.desc()
+        ).first()
+        analysis = None
+        if extraction is not None:
+            analysis = AIJob.query.filter(
+                AIJob.job_type == 'analyze_candidate',
+                AIJob.target_id == candidate_id,
+                AIJob.id > extraction.id
+            ).order_by(AIJob.id.desc()).first()
+        
+        if extraction is None:
+            status = 'none'
+        elif extraction.status == 'failed' or (analysis is not None and analysis.status == 'failed'):
+            status = 'failed'
+        elif extraction.status != 'completed':
+            status = 'extracting'
+        elif analysis is None or analysis.status != 'completed':
+            status = 'analyzing'
+        else:
+            status = 'completed'
+        
+        # Fichier déjà analysé: analyse appliquée à l'envoi ou par le job d'extraction
+        active = [job for job in (extraction, analysis) if job is not None and job.status in ('pending', 'running')]
+        if document is not None and document.analysis is not None and not active:
+            status = 'completed'
+        
+        result = {
+            'candidate_id': candidate.id,
+            'resume_path': candidate.resume_path,
+            'status': status,
+            'document_sha256': document.sha256 if document else None,
+            'extraction': extraction.to_dict() if extraction else None,
+            'analysis': analysis.to_dict() if analysis else None
+        }
+        if status == 'completed':
+            result['ai_score'] = candidate.ai_score
+            result['ai_summary'] = candidate.ai_summary
+            result['skills'] = json.loads(candidate.skills) if candidate.skills else []
+        
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @recruitment_bp.route('/candidates/<int:candidate_id>/analyze', methods=['POST'])
 def analyze_candidate_for_job(candidate_id):
     """Analyse l'adéquation d'un candidat pour un poste spécifique."""
@@ -193,18 +509,29 @@ def analyze_candidate_for_job(candidate_id):
         
         job_posting = JobPosting.query.get_or_404(data['job_posting_id'])
         
-        # Analyse IA de l'adéquation candidat-poste
-        job_description = f"{job_posting.title}\n{job_posting.description}\n{job_posting.requirements}"
-        resume_text = f"Compétences: {candidate.skills}\nExpérience: {candidate.experience_years} ans\nRésumé: {candidate.ai_summary}"
+        # Pré-filtrage local: l'analyse GPT-4 n'est lancée qu'au-dessus du seuil
+        local_match = match_scorer.score(candidate, job_posting)
         
-        ai_analysis = ai_service.analyze_resume(resume_text, job_description)
+        if data.get('force_ai') or match_scorer.needs_llm(local_match['score']):
+            # Analyse IA de l'adéquation candidat-poste
+            job_description = f"{job_posting.title}\n{job_posting.description}\n{job_posting.requirements}"
+            resume_text = f"Compétences: {candidate.skills}\nExpérience: {candidate.experience_years} ans\nRésumé: {candidate.ai_summary}"
+            
+            ai_analysis = ai_service.analyze_resume(
+                resume_text, job_description, high_stakes=bool(data.get('high_stakes'))
+            )
+            match_score = ai_analysis.get('job_match_score', 0)
+        else:
+            ai_analysis = local_match
+            match_score = local_match['score']
         
         return jsonify({
             'candidate_id': candidate_id,
             'job_posting_id': data['job_posting_id'],
-            'match_score': ai_analysis.get('job_match_score', 0),
+            'match_score': match_score,
+            'local_match_score': local_match['score'],
             'analysis': ai_analysis,
-            'recommendation': 'Recommandé' if ai_analysis.get('job_match_score', 0) >= 70 else 'À examiner'
+            'recommendation': 'Recommandé' if match_score >= 70 else 'À examiner'
         })
     
     except Exception as e:
@@ -240,15 +567,33 @@ def create_application():
             status=data.get('status', 'submitted')
         )
         
-        # Analyse IA automatique de l'adéquation
-        job_description = f"{job_posting.title}\n{job_posting.description}\n{job_posting.requirements}"
-        resume_text = f"Compétences: {candidate.skills}\nExpérience: {candidate.experience_years} ans\nRésumé: {candidate.ai_summary}"
-        
-        ai_analysis = ai_service.analyze_resume(resume_text, job_description)
-        application.ai_match_score = ai_analysis.get('job_match_score', 0)
-        application.ai_analysis = json.dumps(ai_analysis)
+        # Analyse IA uniquement au-dessus du seuil local ou dans le top-K de l'offre
+        local_match = match_scorer.score(candidate, job_posting)
+        # Rang parmi les candidatures de l'offre selon leur score local précalculé (MatchScore):
+        # ai_match_score porte le score GPT-4 une fois l'analyse faite, sur une autre échelle
+        rank = Application.query.join(
+            MatchScore,
+            (MatchScore.candidate_id == Application.candidate_id) & (MatchScore.job_posting_id == Application.job_posting_id)
+        ).filter(
+            Application.job_posting_id == job_posting.id,
+            MatchScore.score >= local_match['score']
+        ).count()
+        
+        # Le score local est disponible immédiatement; l'analyse GPT-4 est mise en file
+        application.ai_match_score = local_match['score']
+        application.ai_analysis = json.dumps(local_match)
         
         db.session.add(application)
+        
+        if match_scorer.needs_llm(local_match['score'], rank):
+            db.session.flush()
+            job = enqueue('analyze_application', application.id, {'local_match': local_match})
+            db.session.commit()
+            
+            result = application.to_dict()
+            result['ai_job'] = job.to_dict()
+            return jsonify(result), 202
+        
         db.session.commit()
         
         return jsonify(application.to_dict()), 201
@@ -262,29 +607,24 @@ def generate_interview_questions(application_id):
     """Génère des questions d'entretien personnalisées pour une candidature."""
     try:
         application = Application.query.get_or_404(application_id)
-        candidate = Candidate.query.get(application.candidate_id)
-        job_posting = JobPosting.query.get(application.job_posting_id)
-        
-        candidate_profile = {
-            'name': f"{candidate.first_name} {candidate.last_name}",
-            'skills': json.loads(candidate.skills) if candidate.skills else [],
-            'experience_years': candidate.experience_years,
-            'summary': candidate.ai_summary
-        }
+        regenerate = request.args.get('regenerate', 'false').lower() == 'true'
         
-        questions = ai_service.generate_interview_questions(
-            job_posting.title,
-            candidate_profile
-        )
+        # Questions enregistrées réutilisées tant que le profil et le poste n'ont pas changé
+        result = interview_questions.questions_for(application, regenerate=regenerate)
+        db.session.commit()
+        candidate = result['candidate']
         
         return jsonify({
             'application_id': application_id,
-            'questions': questions,
+            'questions': result['questions'],
+            'cached': result['cached'],
+            'generated_at': result['generated_at'].isoformat() if result['generated_at'] else None,
             'candidate_name': f"{candidate.first_name} {candidate.last_name}",
-            'job_title': job_posting.title
+            'job_title': result['job_posting'].title
         })
     
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @recruitment_bp.route('/applications/<int:application_id>/status', methods=['PUT'])
@@ -297,6 +637,7 @@ def update_application_status(application_id):
         if 'status' not in data:
             return jsonify({'error': 'Statut requis'}), 400
         
+        entering_interview = data['status'] == INTERVIEW_STATUS and application.status != INTERVIEW_STATUS
         application.status = data['status']
         
         if 'recruiter_notes' in data:
@@ -306,6 +647,9 @@ def update_application_status(application_id):
             application.interview_feedback = data['interview_feedback']
         
         application.updated_at = datetime.utcnow()
+        if entering_interview:
+            # Questions préparées en arrière-plan avant la consultation du recruteur
+            enqueue_unique('generate_interview_questions', application.id)
         db.session.commit()
         
         return jsonify(application.to_dict())
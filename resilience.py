@@ -0,0 +1,337 @@
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import openai
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Délai maximal par méthode, retries et escalade compris (secondes)
+DEFAULT_DEADLINES = {
+    'analyze_resume': 30.0,
+    'generate_interview_questions': 20.0,
+    'analyze_performance_data': 20.0,
+    'generate_job_description': 20.0,
+    'chatbot_response': 10.0,
+    'predict_turnover_risk': 20.0,
+    'generate_ai_insights': 30.0,
+    'score_candidates_batch': 60.0,
+}
+
+# Erreurs transitoires du fournisseur: relancées dans la limite du budget de retries
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,  # inclut APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+# Échéance de la requête HTTP en cours (horloge monotone), posée par init_request_deadlines
+_request_deadline = contextvars.ContextVar('ai_request_deadline', default=None)
+
+
+class CircuitOpenError(Exception):
+    """Disjoncteur ouvert: l'appel est court-circuité vers la réponse de repli."""
+
+
+class DeadlineExceededError(TimeoutError):
+    """Plus de temps disponible pour l'appel dans l'échéance de la méthode ou de la requête."""
+
+
+def set_request_deadline(seconds: Optional[float]) -> contextvars.Token:
+    deadline = time.monotonic() + seconds if seconds else None
+    return _request_deadline.set(deadline)
+
+
+def reset_request_deadline(token: contextvars.Token):
+    _request_deadline.reset(token)
+
+
+def request_time_remaining() -> Optional[float]:
+    """Temps restant avant l'échéance de la requête en cours (None hors requête)."""
+    deadline = _request_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def init_request_deadlines(app):
+    """
+    Pose l'échéance de chaque requête Flask: en-tête X-Request-Timeout (secondes),
+    sinon AI_REQUEST_TIMEOUT. Les appels LLM de la requête ne la dépassent pas.
+    """
+    default_timeout = float(os.getenv('AI_REQUEST_TIMEOUT', '25'))
+
+    @app.before_request
+    def _set_deadline():
+        from flask import g, request
+        try:
+            seconds = float(request.headers.get('X-Request-Timeout', default_timeout))
+        except ValueError:
+            seconds = default_timeout
+        g.ai_deadline_token = set_request_deadline(seconds)
+
+    @app.teardown_request
+    def _reset_deadline(exc=None):
+        from flask import g
+        token = g.pop('ai_deadline_token', None)
+        if token is not None:
+            try:
+                reset_request_deadline(token)
+            except ValueError:
+                # Jeton créé dans un autre contexte (réponse en streaming)
+                _request_deadline.set(None)
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur à trois états: fermé, ouvert après `failure_threshold` échecs
+    consécutifs, puis semi-ouvert après `reset_timeout` (un seul appel d'essai).
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self.short_circuited = 0
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._probe_in_flight = False
+            if self.state == 'closed':
+                return True
+            if self.state == 'half_open' and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                logger.info(f"Disjoncteur {self.name} refermé")
+            self.state = 'closed'
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logger.warning(f"Disjoncteur {self.name} ouvert après {self.failures} échecs")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            retry_in = None
+            if self.state == 'open':
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'failure_threshold': self.failure_threshold,
+                'retry_in_seconds': retry_in,
+                'short_circuited': self.short_circuited
+            }
+
+
+class RetryBudget:
+    """
+    Budget de retries partagé: chaque appel crédite `ratio` jeton, chaque retry en
+    consomme un. Pendant un incident, les retries restent limités à ~ratio du trafic.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            return round(self._tokens, 2)
+
+
+class ResiliencePolicy:
+    """
+    Encadrement des appels LLM: échéance par méthode (bornée par celle de la requête),
+    retries avec backoff exponentiel dans un budget partagé, disjoncteur par modèle.
+    """
+
+    def __init__(self, deadlines: Dict[str, float] = None, max_retries: int = 2,
+                 backoff: float = 0.5, max_backoff: float = 4.0, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, retry_budget: RetryBudget = None):
+        self.deadlines = dict(DEFAULT_DEADLINES)
+        if deadlines:
+            self.deadlines.update(deadlines)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.retry_budget = retry_budget or RetryBudget()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'retries': 0, 'budget_exhausted': 0, 'deadline_exceeded': 0, 'failures': 0}
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(name, self.failure_threshold, self.reset_timeout)
+            return self._breakers[name]
+
+    def deadline_for(self, method: str) -> float:
+        """Échéance absolue (horloge monotone) d'un appel de `method`."""
+        deadline = time.monotonic() + self.deadlines.get(method, 20.0)
+        remaining = request_time_remaining()
+        if remaining is not None:
+            deadline = min(deadline, time.monotonic() + remaining)
+        return deadline
+
+    def call(self, name: str, fn: Callable[[float], Any], deadline: float) -> Any:
+        """Appelle `fn(timeout)` sous le disjoncteur `name`, avec retries jusqu'à `deadline`."""
+        breaker = self.breaker(name)
+        self._count('calls')
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            timeout = self._timeout(deadline)
+            if not breaker.allow():
+                raise CircuitOpenError(f"Disjoncteur {name} ouvert")
+            try:
+                result = fn(timeout)
+            except RETRYABLE_ERRORS as e:
+                breaker.record_failure()
+                delay = self._retry_delay(breaker, attempt, deadline, e)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except Exception:
+                # Erreur non transitoire (requête refusée...): le fournisseur a bien répondu
+                breaker.record_success()
+                raise
+            breaker.record_success()
+            return result
+
+    async def acall(self, name: str, fn: Callable[[float], Any], deadline: float) -> Any:
+        """Équivalent asynchrone de `call`; `fn(timeout)` retourne une coroutine."""
+        breaker = self.breaker(name)
+        self._count('calls')
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            timeout = self._timeout(deadline)
+            if not breaker.allow():
+                raise CircuitOpenError(f"Disjoncteur {name} ouvert")
+            try:
+                result = await asyncio.wait_for(fn(timeout), timeout)
+            except (asyncio.TimeoutError,) + RETRYABLE_ERRORS as e:
+                breaker.record_failure()
+                delay = self._retry_delay(breaker, attempt, deadline, e)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except Exception:
+                # Erreur non transitoire (requête refusée...): le fournisseur a bien répondu
+                breaker.record_success()
+                raise
+            breaker.record_success()
+            return result
+
+    def record_failure(self, name: str):
+        """Échec constaté hors de `call` (ex. flux interrompu)."""
+        self._count('failures')
+        self.breaker(name).record_failure()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            breakers = list(self._breakers.values())
+        stats['retry_budget_tokens'] = self.retry_budget.tokens
+        stats['deadlines'] = dict(self.deadlines)
+        stats['breakers'] = {breaker.name: breaker.to_dict() for breaker in breakers}
+        return stats
+
+    def _timeout(self, deadline: float) -> float:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            self._count('deadline_exceeded')
+            raise DeadlineExceededError("Échéance de l'appel LLM dépassée")
+        return timeout
+
+    def _retry_delay(self, breaker: CircuitBreaker, attempt: int, deadline: float, error: Exception) -> float:
+        """Délai avant le prochain essai; relève l'erreur si aucun retry n'est possible."""
+        self._count('failures')
+        if attempt >= self.max_retries or breaker.state == 'open':
+            raise error
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt)) * random.uniform(0.5, 1.0)
+        if time.monotonic() + delay >= deadline:
+            self._count('deadline_exceeded')
+            raise error
+        if not self.retry_budget.try_withdraw():
+            self._count('budget_exhausted')
+            raise error
+        self._count('retries')
+        logger.warning(f"Appel {breaker.name} en échec ({type(error).__name__}), nouvel essai dans {delay:.2f}s")
+        return delay
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+
+def build_resilience_from_env() -> ResiliencePolicy:
+    """
+    Construit la politique: AI_DEADLINE_<METHODE>, AI_MAX_RETRIES, AI_RETRY_BACKOFF,
+    AI_RETRY_BUDGET_RATIO, AI_BREAKER_FAILURES, AI_BREAKER_RESET.
+    """
+    deadlines = {
+        method: float(os.getenv(f'AI_DEADLINE_{method.upper()}'))
+        for method in DEFAULT_DEADLINES
+        if os.getenv(f'AI_DEADLINE_{method.upper()}')
+    }
+    return ResiliencePolicy(
+        deadlines=deadlines,
+        max_retries=int(os.getenv('AI_MAX_RETRIES', '2')),
+        backoff=float(os.getenv('AI_RETRY_BACKOFF', '0.5')),
+        failure_threshold=int(os.getenv('AI_BREAKER_FAILURES', '5')),
+        reset_timeout=float(os.getenv('AI_BREAKER_RESET', '30')),
+        retry_budget=RetryBudget(ratio=float(os.getenv('AI_RETRY_BUDGET_RATIO', '0.2')))
+    )
+
+
+_default_policy = None
+_default_policy_lock = threading.Lock()
+
+
+def get_resilience_policy() -> ResiliencePolicy:
+    """Retourne la politique de résilience partagée du processus."""
+    global _default_policy
+    if _default_policy is None:
+        with _default_policy_lock:
+            if _default_policy is None:
+                _default_policy = build_resilience_from_env()
+    return _default_policy
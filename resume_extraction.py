@@ -0,0 +1,227 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Dict, Optional
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+from werkzeug.utils import secure_filename
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ce module est importé par les processus d'extraction (contexte 'spawn'):
+# il ne doit dépendre ni de Flask-SQLAlchemy ni des services IA.
+
+# Formats dont le texte peut être extrait (.doc binaire refusé à l'envoi)
+ALLOWED_EXTENSIONS = {'pdf', 'docx'}
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class UploadError(ValueError):
+    """Envoi refusé (format, taille, champ manquant); `status_code` est le code HTTP à renvoyer."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ExtractionError(ValueError):
+    """Document dont aucun texte ne peut être extrait (format non pris en charge, PDF scanné): échec définitif."""
+
+
+def file_extension(filename: str) -> str:
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+
+def content_path(directory: str, sha256: str, extension: str) -> str:
+    """Chemin adressé par contenu: <directory>/<sha[:2]>/<sha>.<ext>."""
+    return os.path.join(directory, sha256[:2], f'{sha256}.{extension}')
+
+
+def stream_upload(stream: BinaryIO, content_type: str, directory: str, field_name: str = 'resume',
+                  max_bytes: int = None) -> Dict:
+    """
+    Écrit sur disque le fichier `field_name` d'un corps multipart, bloc par bloc,
+    sans le charger en mémoire ni passer par le parseur de formulaires de Werkzeug.
+    Le SHA-256 est calculé au fil de l'écriture; le fichier est rangé à son adresse
+    de contenu, et un contenu déjà stocké n'est pas dupliqué.
+    Retourne {'path', 'sha256', 'filename', 'size', 'existing', 'fields'}.
+    """
+    mimetype, options = parse_options_header(content_type or '')
+    if mimetype != 'multipart/form-data' or not options.get('boundary'):
+        raise UploadError('Requête multipart/form-data attendue')
+    max_bytes = max_bytes or int(os.getenv('RESUME_MAX_BYTES', str(10 * 1024 * 1024)))
+
+    os.makedirs(directory, exist_ok=True)
+    decoder = MultipartDecoder(options['boundary'].encode('latin-1'), max_form_memory_size=64 * 1024)
+    fields = {}
+    result = None
+    current = None  # (nom du champ, fichier ouvert ou liste de blocs texte)
+    tmp_path = None
+    digest = hashlib.sha256()
+
+    try:
+        while True:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            decoder.receive_data(chunk or None)
+            event = decoder.next_event()
+            while not isinstance(event, (NeedData, Epilogue)):
+                if isinstance(event, File) and event.name == field_name and result is None:
+                    filename = secure_filename(event.filename or '')
+                    if file_extension(filename) not in ALLOWED_EXTENSIONS:
+                        raise UploadError(f"Format non supporté (formats acceptés: {', '.join(sorted(ALLOWED_EXTENSIONS))})")
+                    tmp_path = os.path.join(directory, f'.{uuid.uuid4().hex}.part')
+                    result = {'filename': filename, 'size': 0}
+                    current = (field_name, open(tmp_path, 'wb'))
+                elif isinstance(event, (File, Field)):
+                    current = (event.name, [] if isinstance(event, Field) else None)
+                elif isinstance(event, Data) and current is not None:
+                    name, target = current
+                    if hasattr(target, 'write'):
+                        result['size'] += len(event.data)
+                        if result['size'] > max_bytes:
+                            raise UploadError(f'Fichier trop volumineux (maximum {max_bytes} octets)', 413)
+                        target.write(event.data)
+                        digest.update(event.data)
+                    elif target is not None:
+                        target.append(event.data)
+                    if not event.more_data:
+                        if hasattr(target, 'write'):
+                            target.close()
+                        elif target is not None:
+                            fields[name] = b''.join(target).decode('utf-8', 'replace')
+                        current = None
+                event = decoder.next_event()
+            if isinstance(event, Epilogue) or not chunk:
+                break
+
+        if result is None:
+            raise UploadError(f'Fichier manquant (champ {field_name})')
+        if current is not None and hasattr(current[1], 'write'):
+            raise UploadError('Envoi interrompu')
+
+        result['sha256'] = digest.hexdigest()
+        result['path'] = content_path(directory, result['sha256'], file_extension(result['filename']))
+        result['existing'] = os.path.exists(result['path'])
+        if not result['existing']:
+            os.makedirs(os.path.dirname(result['path']), exist_ok=True)
+            os.replace(tmp_path, result['path'])
+            tmp_path = None
+        result['fields'] = fields
+        return result
+
+    except ValueError as e:
+        # Erreurs du décodeur multipart (corps tronqué ou mal formé)
+        if isinstance(e, UploadError):
+            raise
+        raise UploadError(f'Corps multipart invalide: {str(e)}')
+
+    finally:
+        if current is not None and hasattr(current[1], 'write'):
+            current[1].close()
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _clean_text(text: str) -> str:
+    text = re.sub(r'[ \t\xa0]+', ' ', text)
+    text = re.sub(r'\n\s*\n+', '\n\n', text)
+    return text.strip()
+
+
+def _extract_pdf(path: str) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        from PyPDF2 import PdfReader
+    reader = PdfReader(path)
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+
+def _extract_docx(path: str) -> str:
+    import docx
+    document = docx.Document(path)
+    parts = [paragraph.text for paragraph in document.paragraphs]
+    for table in document.tables:
+        for row in table.rows:
+            parts.append(' | '.join(cell.text for cell in row.cells))
+    return '\n'.join(parts)
+
+
+def extract_text(path: str) -> str:
+    """Texte brut d'un CV PDF ou DOCX. Exécuté dans un processus du pool d'extraction."""
+    extension = file_extension(path)
+    if extension == 'pdf':
+        text = _extract_pdf(path)
+    elif extension == 'docx':
+        text = _extract_docx(path)
+    else:
+        raise ExtractionError(f"Extraction impossible pour le format .{extension} (convertir en PDF ou DOCX)")
+    text = _clean_text(text)
+    if not text:
+        # PDF scanné: pas de couche texte
+        raise ExtractionError("Aucun texte extrait du document (PDF scanné ?)")
+    return text
+
+
+class ExtractionPool:
+    """
+    Pool de processus pour l'extraction de texte (CPU, bibliothèques PDF non
+    thread-safe et sujettes aux fuites mémoire): l'analyse d'un PDF ne bloque
+    ni les workers web ni le GIL des threads du worker de jobs.
+    """
+
+    def __init__(self, workers: int = None, timeout: float = None, max_tasks_per_child: int = None):
+        self.workers = workers or int(os.getenv('RESUME_EXTRACTION_WORKERS', str(min(4, os.cpu_count() or 1))))
+        self.timeout = timeout or float(os.getenv('RESUME_EXTRACTION_TIMEOUT', '60'))
+        self.max_tasks_per_child = max_tasks_per_child or int(os.getenv('RESUME_EXTRACTION_MAX_TASKS', '50'))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # 'spawn': pas de fork d'un processus qui héberge des threads et des connexions
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        max_tasks_per_child=self.max_tasks_per_child
+                    )
+        return self._executor
+
+    def extract(self, path: str) -> str:
+        executor = self._get_executor()
+        try:
+            return executor.submit(extract_text, path).result(timeout=self.timeout)
+        except BrokenProcessPool:
+            # Processus tué (mémoire, document piégé): le pool est recréé pour les jobs suivants
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> ExtractionPool:
+    """Retourne le pool d'extraction partagé du processus."""
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = ExtractionPool()
+    return _default_pool
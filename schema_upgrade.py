@@ -0,0 +1,71 @@
+from typing import Dict, List, Sequence
+from sqlalchemy import inspect, text
+from src.models.user import db
+import logging
+
+logger = logging.getLogger(__name__)
+
+# db.create_all() crée les tables manquantes mais ne modifie jamais une table existante:
+# les colonnes ajoutées aux modèles depuis (toutes nullables) sont ajoutées au démarrage.
+ADDED_COLUMNS: Dict[str, Sequence[str]] = {
+    # Import ETL des candidats (carte d'identité nationale)
+    'candidate': ('cin_number', 'birth_date', 'address', 'cin_expiration_date'),
+    # Questions d'entretien générées par candidature
+    'application': ('interview_questions', 'interview_questions_fingerprint', 'interview_questions_generated_at'),
+}
+# Index des tables existantes, créés s'ils n'existent pas
+ADDED_INDEXES: Sequence[str] = (
+    'ix_candidate_cin_number',
+    # Pagination par curseur des listes (clé de tri, id)
+    'ix_job_posting_status_posted_date_id',
+    'ix_candidate_ai_score_id',
+    'ix_employee_status_id',
+    # Organigramme: subordonnés directs d'un manager
+    'ix_employee_manager_id',
+    # Version des données d'un département (risque de turnover)
+    'ix_employee_department_updated_at',
+    # Dernières évaluations d'un employé
+    'ix_performance_evaluation_employee_date',
+)
+
+
+def _find_index(name: str):
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    raise ValueError(f"Index inconnu: {name}")
+
+
+def ensure_schema() -> List[str]:
+    """
+    Met à niveau une base créée par une version précédente, après db.create_all() (idempotent):
+    ALTER TABLE ... ADD COLUMN pour les colonnes absentes, puis CREATE INDEX des index absents.
+    Retourne les colonnes et index ajoutés.
+    """
+    added = []
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        preparer = connection.dialect.identifier_preparer
+        for table_name, columns in ADDED_COLUMNS.items():
+            existing = {column['name'] for column in inspector.get_columns(table_name)}
+            table = db.metadata.tables[table_name]
+            for name in columns:
+                if name in existing:
+                    continue
+                column = table.columns[name]
+                connection.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                    f"{preparer.format_column(column)} {column.type.compile(dialect=connection.dialect)}"
+                ))
+                added.append(f'{table_name}.{name}')
+
+        for name in ADDED_INDEXES:
+            index = _find_index(name)
+            if name not in {existing['name'] for existing in inspector.get_indexes(index.table.name)}:
+                index.create(connection)
+                added.append(name)
+
+    if added:
+        logger.info(f"Schéma mis à niveau: {', '.join(added)}")
+    return added
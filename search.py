@@ -0,0 +1,36 @@
+from flask import Blueprint, request, jsonify
+from src.services.search_index import SEARCH_FIELDS, get_search_index
+
+search_bp = Blueprint('search', __name__)
+
+@search_bp.route('/search', methods=['GET'])
+def search():
+    """
+    Recherche plein texte des employés et candidats (nom, email, poste, département, compétences).
+    Insensible aux accents, chaque mot en préfixe pour l'autocomplétion, résultats classés.
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Paramètre q requis'}), 400
+        
+        search_type = request.args.get('type', 'all')
+        if search_type not in ('all',) + tuple(SEARCH_FIELDS):
+            return jsonify({'error': f"type doit valoir all, {', '.join(SEARCH_FIELDS)}"}), 400
+        kinds = list(SEARCH_FIELDS) if search_type == 'all' else [search_type]
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        match_all = request.args.get('match', 'all') != 'any'
+        
+        # Statut: filtre des employés uniquement
+        status = request.args.get('status')
+        
+        index = get_search_index()
+        result = {'query': query}
+        for kind in kinds:
+            matches = index.search(kind, query, limit, match_all, status=status if kind == 'employee' else None)
+            result[f'{kind}s'] = [dict(obj.to_dict(), search_score=score) for obj, score in matches]
+        
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
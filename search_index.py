@@ -0,0 +1,202 @@
+import re
+import threading
+from typing import Dict, List, Sequence, Tuple
+from sqlalchemy import text
+from src.models.user import db
+from src.models.employee import Employee
+from src.models.candidate import Candidate
+from src.services.match_scorer import strip_accents
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Champs indexés par type: (colonne d'index, colonnes sources, poids)
+SEARCH_FIELDS = {
+    'employee': [
+        ('name', ('first_name', 'last_name'), 'A'),
+        ('email', ('email',), 'B'),
+        ('position', ('position',), 'C'),
+        ('department', ('department',), 'C'),
+        ('skills', ('skills',), 'D'),
+    ],
+    'candidate': [
+        ('name', ('first_name', 'last_name'), 'A'),
+        ('email', ('email',), 'B'),
+        ('skills', ('skills',), 'D'),
+    ],
+}
+SEARCH_MODELS = {'employee': Employee, 'candidate': Candidate}
+
+# Poids bm25 (SQLite) correspondant aux classes A-D de PostgreSQL
+_BM25_WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 2.0, 'D': 1.0}
+# translate() est IMMUTABLE (contrairement à unaccent): utilisable dans une colonne générée
+_PG_ACCENTS = ('àâäáãåçéèêëíìîïñóòôöõúùûüýÿ', 'aaaaaaceeeeiiiinooooouuuuyy')
+# Le parseur PostgreSQL garde un email entier: découpé sur la ponctuation, comme unicode61 (SQLite)
+_PG_SPLIT_FIELDS = {'email'}
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def query_terms(query: str) -> List[str]:
+    """Mots de la requête, sans accents ni ponctuation (aucune syntaxe FTS ne passe)."""
+    return _TOKEN.findall(strip_accents(query or '').lower())
+
+
+def _source(prefix: str, columns: Sequence[str]) -> str:
+    return " || ' ' || ".join(f"coalesce({prefix}{column}, '')" for column in columns)
+
+
+class SearchIndex:
+    """
+    Recherche plein texte des employés et candidats (noms, emails, poste, département, compétences):
+    insensible aux accents et à la casse, préfixes pour l'autocomplétion, résultats classés.
+    - SQLite: tables FTS5 (tokenizer unicode61 sans diacritiques), tenues à jour par déclencheurs
+    - PostgreSQL: colonne tsvector générée, pondérée par champ, avec index GIN
+    La synchronisation est faite par la base: les imports en masse (SQL direct) sont couverts.
+    """
+
+    def __init__(self):
+        self._ready = set()
+        self._lock = threading.Lock()
+
+    def _dialect(self) -> str:
+        return db.session.get_bind().dialect.name
+
+    def ensure(self):
+        """Crée l'index et sa synchronisation s'ils n'existent pas (idempotent), puis l'alimente."""
+        bind = db.session.get_bind()
+        if bind in self._ready:
+            return
+        with self._lock:
+            if bind in self._ready:
+                return
+            dialect = bind.dialect.name
+            for kind in SEARCH_FIELDS:
+                if dialect == 'sqlite':
+                    self._ensure_sqlite(kind)
+                elif dialect == 'postgresql':
+                    self._ensure_postgresql(kind)
+                else:
+                    raise ValueError(f"Recherche plein texte non supportée pour la base {dialect}")
+            db.session.commit()
+            self._ready.add(bind)
+
+    def _ensure_sqlite(self, kind: str):
+        table = SEARCH_MODELS[kind].__tablename__
+        fts = f'{table}_fts'
+        fields = SEARCH_FIELDS[kind]
+        exists = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': fts}
+        ).first()
+        if exists:
+            return
+
+        columns = ', '.join(name for name, _, _ in fields)
+        db.session.execute(text(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({columns}, "
+            f"tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        ))
+
+        def values(prefix):
+            return ', '.join(_source(prefix, sources) for _, sources, _ in fields)
+
+        watched = ', '.join(sorted({column for _, sources, _ in fields for column in sources}))
+        db.session.execute(text(
+            f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {values('new.')}); END"
+        ))
+        db.session.execute(text(
+            f"CREATE TRIGGER {fts}_update AFTER UPDATE OF {watched} ON {table} BEGIN "
+            f"DELETE FROM {fts} WHERE rowid = old.id; "
+            f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {values('new.')}); END"
+        ))
+        db.session.execute(text(
+            f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM {fts} WHERE rowid = old.id; END"
+        ))
+        # Lignes existantes
+        db.session.execute(text(f"INSERT INTO {fts}(rowid, {columns}) SELECT id, {values('')} FROM {table}"))
+        logger.info(f"Index plein texte {fts} créé")
+
+    def _ensure_postgresql(self, kind: str):
+        table = SEARCH_MODELS[kind].__tablename__
+        accents, plain = _PG_ACCENTS
+
+        def normalized(name, sources):
+            value = f"translate(lower({_source('', sources)}), '{accents}', '{plain}')"
+            if name in _PG_SPLIT_FIELDS:
+                value = f"regexp_replace({value}, '[^[:alnum:]]+', ' ', 'g')"
+            return value
+
+        document = ' || '.join(
+            f"setweight(to_tsvector('simple', {normalized(name, sources)}), '{weight}')"
+            for name, sources, weight in SEARCH_FIELDS[kind]
+        )
+        db.session.execute(text(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({document}) STORED"
+        ))
+        db.session.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING GIN (search_vector)"
+        ))
+
+    def search(self, kind: str, query: str, limit: int = 20, match_all: bool = True,
+               status: str = None) -> List[Tuple[object, float]]:
+        """
+        Retourne [(objet, score)] par pertinence décroissante. Chaque mot est cherché en
+        préfixe ("mar dub" trouve Marie Dubois); `match_all=False` accepte n'importe quel mot.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        self.ensure()
+        model = SEARCH_MODELS[kind]
+        table = model.__tablename__
+        params = {'limit': limit}
+        status_filter = ''
+        if status:
+            status_filter = f'AND {table}.status = :status'
+            params['status'] = status
+
+        if self._dialect() == 'postgresql':
+            params['query'] = (' & ' if match_all else ' | ').join(f'{term}:*' for term in terms)
+            rows = db.session.execute(text(
+                f"SELECT {table}.id, ts_rank(search_vector, query) AS score "
+                f"FROM {table}, to_tsquery('simple', :query) AS query "
+                f"WHERE search_vector @@ query {status_filter} ORDER BY score DESC, {table}.id LIMIT :limit"
+            ), params).all()
+        else:
+            fts = f'{table}_fts'
+            weights = ', '.join(str(_BM25_WEIGHTS[weight]) for _, _, weight in SEARCH_FIELDS[kind])
+            params['query'] = (' ' if match_all else ' OR ').join(f'"{term}"*' for term in terms)
+            # bm25: plus petit = plus pertinent; renvoyé positif pour un tri décroissant homogène
+            rows = db.session.execute(text(
+                f"SELECT {fts}.rowid AS id, -bm25({fts}, {weights}) AS score "
+                f"FROM {fts} JOIN {table} ON {table}.id = {fts}.rowid "
+                f"WHERE {fts} MATCH :query {status_filter} ORDER BY score DESC, {fts}.rowid LIMIT :limit"
+            ), params).all()
+
+        if not rows:
+            return []
+        objects = {obj.id: obj for obj in model.query.filter(model.id.in_([row.id for row in rows])).all()}
+        return [(objects[row.id], round(float(row.score), 4)) for row in rows if row.id in objects]
+
+    def search_all(self, query: str, kinds: Sequence[str] = None, limit: int = 20,
+                   match_all: bool = True) -> Dict[str, List[Tuple[object, float]]]:
+        return {
+            kind: self.search(kind, query, limit, match_all)
+            for kind in (kinds or SEARCH_FIELDS)
+        }
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """Retourne l'index de recherche plein texte partagé du processus."""
+    global _default_index
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                _default_index = SearchIndex()
+    return _default_index
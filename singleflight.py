@@ -0,0 +1,234 @@
+import copy
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+from src.services.resilience import request_time_remaining
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteLockTable:
+    """Table de verrous inter-processus (un verrou par clé de prompt, avec expiration)."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid = None
+        self._db = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Une connexion SQLite ne doit pas être réutilisée après un fork
+        if self._pid != os.getpid():
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS llm_inflight ('
+                ' key TEXT PRIMARY KEY,'
+                ' owner TEXT NOT NULL,'
+                ' expires_at REAL NOT NULL)'
+            )
+            self._db.commit()
+            self._pid = os.getpid()
+        return self._db
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            self._conn.execute('DELETE FROM llm_inflight WHERE key = ? AND expires_at < ?', (key, now))
+            cursor = self._conn.execute(
+                'INSERT OR IGNORE INTO llm_inflight (key, owner, expires_at) VALUES (?, ?, ?)',
+                (key, owner, now + ttl)
+            )
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def release(self, key: str, owner: str):
+        with self._lock:
+            self._conn.execute('DELETE FROM llm_inflight WHERE key = ? AND owner = ?', (key, owner))
+            self._conn.commit()
+
+    def is_held(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM llm_inflight WHERE key = ? AND expires_at >= ?', (key, time.time())
+            ).fetchone()
+        return row is not None
+
+
+class RedisLockTable:
+    """Verrous inter-processus via Redis (SET NX EX)."""
+
+    def __init__(self, url: str, prefix: str = 'llm_inflight:'):
+        import redis
+        self._redis = redis.from_url(url)
+        self.prefix = prefix
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        return bool(self._redis.set(self.prefix + key, owner, nx=True, ex=max(1, int(ttl))))
+
+    def release(self, key: str, owner: str):
+        name = self.prefix + key
+        if self._redis.get(name) == owner.encode():
+            self._redis.delete(name)
+
+    def is_held(self, key: str) -> bool:
+        return bool(self._redis.exists(self.prefix + key))
+
+
+class _Flight:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Regroupement des appels identiques en cours: le premier appelant (leader) exécute
+    la requête, les suivants attendent et reçoivent son résultat.
+    Avec une table de verrous, le regroupement s'étend aux autres processus, qui
+    récupèrent le résultat du leader dans le cache partagé.
+    """
+
+    def __init__(self, lock_table=None, wait_timeout: float = None, poll_interval: float = 0.2):
+        self.lock_table = lock_table
+        self.wait_timeout = wait_timeout or float(os.getenv('SINGLEFLIGHT_WAIT_TIMEOUT', '60'))
+        self.poll_interval = poll_interval
+        self._token = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._stats = {'leaders': 0, 'coalesced': 0, 'coalesced_cross_process': 0, 'wait_timeouts': 0}
+
+    def do(self, key: str, fn: Callable[[], Any], lookup: Optional[Callable[[], Any]] = None,
+           deadline: Optional[float] = None) -> Any:
+        """
+        Exécute `fn` une seule fois par clé parmi les appels concurrents.
+        `lookup` relit le résultat dans le cache partagé (requis pour le mode inter-processus).
+        `deadline` (horloge monotone) borne l'attente d'un suiveur, sinon l'échéance de la requête en cours.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+
+        if not leader:
+            if not flight.event.wait(self._wait_time(deadline)):
+                self._count('wait_timeouts')
+                return fn()
+            self._count('coalesced')
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            self._count('leaders')
+            flight.result = self._lead(key, fn, lookup, deadline)
+            return copy.deepcopy(flight.result)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    @property
+    def _owner(self) -> str:
+        return f"{os.getpid()}-{self._token}"
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._flights)
+        stats['cross_process'] = type(self.lock_table).__name__ if self.lock_table else None
+        return stats
+
+    def _wait_time(self, deadline: Optional[float]) -> float:
+        """Attente maximale d'un suiveur: SINGLEFLIGHT_WAIT_TIMEOUT, bornée par le temps restant de l'appel."""
+        remaining = deadline - time.monotonic() if deadline is not None else request_time_remaining()
+        if remaining is None:
+            return self.wait_timeout
+        return max(0.0, min(self.wait_timeout, remaining))
+
+    def _lead(self, key: str, fn: Callable[[], Any], lookup: Optional[Callable[[], Any]],
+              deadline: Optional[float] = None) -> Any:
+        if self.lock_table is None or lookup is None:
+            return fn()
+
+        try:
+            acquired = self.lock_table.acquire(key, self._owner, self.wait_timeout)
+        except Exception as e:
+            logger.warning(f"Table de verrous single-flight indisponible: {str(e)}")
+            return fn()
+
+        if acquired:
+            try:
+                return fn()
+            finally:
+                try:
+                    self.lock_table.release(key, self._owner)
+                except Exception as e:
+                    logger.warning(f"Libération du verrou single-flight impossible: {str(e)}")
+
+        # Un autre processus exécute déjà cet appel: attente de son résultat dans le cache partagé
+        wait_until = time.monotonic() + self._wait_time(deadline)
+        while time.monotonic() < wait_until:
+            time.sleep(self.poll_interval)
+            value = lookup()
+            if value is not None:
+                self._count('coalesced_cross_process')
+                return value
+            if not self.lock_table.is_held(key):
+                break
+        value = lookup()
+        if value is not None:
+            self._count('coalesced_cross_process')
+            return value
+        return fn()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+
+def build_singleflight_from_env() -> SingleFlight:
+    """
+    Construit le regroupeur d'appels: SINGLEFLIGHT_BACKEND (none|sqlite|redis),
+    SINGLEFLIGHT_SQLITE_PATH, REDIS_URL, SINGLEFLIGHT_WAIT_TIMEOUT.
+    """
+    backend = os.getenv('SINGLEFLIGHT_BACKEND', 'none').lower()
+    lock_table = None
+    try:
+        if backend == 'sqlite':
+            default_path = os.path.join(os.path.dirname(__file__), 'database', 'llm_cache.db')
+            lock_table = SQLiteLockTable(os.getenv('SINGLEFLIGHT_SQLITE_PATH', default_path))
+        elif backend == 'redis':
+            lock_table = RedisLockTable(os.getenv('REDIS_URL', 'redis://localhost:6379'))
+    except Exception as e:
+        logger.warning(f"Verrous single-flight '{backend}' indisponibles, regroupement local seul: {str(e)}")
+    return SingleFlight(lock_table)
+
+
+_default_singleflight = None
+_default_singleflight_lock = threading.Lock()
+
+
+def get_singleflight() -> SingleFlight:
+    """Retourne le regroupeur d'appels partagé du processus."""
+    global _default_singleflight
+    if _default_singleflight is None:
+        with _default_singleflight_lock:
+            if _default_singleflight is None:
+                _default_singleflight = build_singleflight_from_env()
+    return _default_singleflight
@@ -0,0 +1,31 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+from src.models.user import db
+
+# Tables de liaison: l'index (skill_id, owner_id) sert les recherches par compétence
+candidate_skill = db.Table(
+    'candidate_skill',
+    db.Column('candidate_id', db.Integer, db.ForeignKey('candidate.id'), primary_key=True),
+    db.Column('skill_id', db.Integer, db.ForeignKey('skill.id'), primary_key=True),
+    db.Index('ix_candidate_skill_skill', 'skill_id', 'candidate_id')
+)
+
+employee_skill = db.Table(
+    'employee_skill',
+    db.Column('employee_id', db.Integer, db.ForeignKey('employee.id'), primary_key=True),
+    db.Column('skill_id', db.Integer, db.ForeignKey('skill.id'), primary_key=True),
+    db.Index('ix_employee_skill_skill', 'skill_id', 'employee_id')
+)
+
+class Skill(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)  # Forme canonique affichée (ex. JavaScript)
+    slug = db.Column(db.String(100), unique=True, nullable=False)  # Forme normalisée (sans accents, minuscules)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'slug': self.slug
+        }
@@ -0,0 +1,234 @@
+import json
+import re
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import delete, func, insert, select
+from src.models.user import db
+from src.models.skill import Skill, candidate_skill, employee_skill
+from src.services.match_scorer import strip_accents
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Variantes usuelles (forme normalisée) -> nom canonique
+SKILL_SYNONYMS = {
+    'js': 'JavaScript',
+    'javascript': 'JavaScript',
+    'ecmascript': 'JavaScript',
+    'ts': 'TypeScript',
+    'typescript': 'TypeScript',
+    'py': 'Python',
+    'python': 'Python',
+    'python3': 'Python',
+    'node': 'Node.js',
+    'nodejs': 'Node.js',
+    'node.js': 'Node.js',
+    'react': 'React',
+    'reactjs': 'React',
+    'react.js': 'React',
+    'vue': 'Vue.js',
+    'vuejs': 'Vue.js',
+    'vue.js': 'Vue.js',
+    'angularjs': 'Angular',
+    'k8s': 'Kubernetes',
+    'kubernetes': 'Kubernetes',
+    'postgres': 'PostgreSQL',
+    'postgresql': 'PostgreSQL',
+    'psql': 'PostgreSQL',
+    'mongo': 'MongoDB',
+    'mongodb': 'MongoDB',
+    'aws': 'AWS',
+    'amazon web services': 'AWS',
+    'gcp': 'Google Cloud',
+    'google cloud platform': 'Google Cloud',
+    'azure': 'Azure',
+    'microsoft azure': 'Azure',
+    'golang': 'Go',
+    'c#': 'C#',
+    'csharp': 'C#',
+    'c++': 'C++',
+    'cpp': 'C++',
+    'ml': 'Machine Learning',
+    'machine learning': 'Machine Learning',
+    'apprentissage automatique': 'Machine Learning',
+    'ia': 'Intelligence artificielle',
+    'ai': 'Intelligence artificielle',
+    'intelligence artificielle': 'Intelligence artificielle',
+    'powerbi': 'Power BI',
+    'power bi': 'Power BI',
+    'ms excel': 'Excel',
+    'microsoft excel': 'Excel',
+    'seo': 'SEO',
+    'crm': 'CRM',
+    'sql': 'SQL',
+    'ux': 'UX/UI Design',
+    'ui/ux': 'UX/UI Design',
+    'ux/ui': 'UX/UI Design',
+    'ux/ui design': 'UX/UI Design',
+    'project management': 'Gestion de projet',
+    'gestion de projets': 'Gestion de projet',
+    'gestion de projet': 'Gestion de projet',
+    '.net': '.NET',
+    'dotnet': '.NET',
+}
+
+OWNER_TABLES = {
+    'candidate': (candidate_skill, candidate_skill.c.candidate_id),
+    'employee': (employee_skill, employee_skill.c.employee_id),
+}
+
+_EDGE_PUNCTUATION = ' \t\n\r-_,;:.!?"\'()[]{}'
+# Un point initial fait partie du nom (.NET): il n'est retiré qu'en fin de chaîne
+_LEADING_PUNCTUATION = _EDGE_PUNCTUATION.replace('.', '')
+
+
+def _strip_edges(text: str) -> str:
+    return text.lstrip(_LEADING_PUNCTUATION).rstrip(_EDGE_PUNCTUATION)
+
+
+def skill_slug(name: str) -> str:
+    """Forme normalisée d'une compétence: sans accents, minuscules, espaces réduits."""
+    slug = strip_accents(str(name)).lower()
+    slug = _strip_edges(re.sub(r'\s+', ' ', slug))
+    return slug
+
+
+def canonical_skill(name: str) -> Tuple[str, str]:
+    """Retourne (slug, nom canonique) d'une compétence, synonymes résolus."""
+    slug = skill_slug(name)
+    canonical = SKILL_SYNONYMS.get(slug)
+    if canonical is None:
+        compact = slug.replace(' ', '')
+        canonical = SKILL_SYNONYMS.get(compact)
+    if canonical is None:
+        return slug, _strip_edges(re.sub(r'\s+', ' ', str(name)))
+    return skill_slug(canonical), canonical
+
+
+def parse_skills(value) -> List[str]:
+    """Accepte une liste, une chaîne JSON ou une liste séparée par des virgules."""
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            value = value.split(',')
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, (list, tuple)):
+        return []
+    return [str(item) for item in value if item is not None and str(item).strip()]
+
+
+def canonicalize_skills(value) -> List[Tuple[str, str]]:
+    """Liste dédoublonnée de (slug, nom canonique), dans l'ordre d'origine."""
+    seen = set()
+    skills = []
+    for name in parse_skills(value):
+        slug, canonical = canonical_skill(name)
+        if slug and slug not in seen:
+            seen.add(slug)
+            skills.append((slug, canonical))
+    return skills
+
+
+def get_or_create_skills(skills: Iterable[Tuple[str, str]]) -> Dict[str, int]:
+    """Retourne {slug: skill_id}, en créant les compétences manquantes en une requête."""
+    names = dict(skills)
+    if not names:
+        return {}
+    ids = dict(db.session.execute(
+        select(Skill.slug, Skill.id).where(Skill.slug.in_(list(names)))
+    ).all())
+    missing = [slug for slug in names if slug not in ids]
+    if missing:
+        db.session.execute(insert(Skill), [{'slug': slug, 'name': names[slug]} for slug in missing])
+        ids.update(db.session.execute(
+            select(Skill.slug, Skill.id).where(Skill.slug.in_(missing))
+        ).all())
+    return ids
+
+
+def set_skills(owner, value, owner_type: str) -> List[str]:
+    """
+    Canonicalise les compétences d'un candidat ou d'un employé à l'écriture:
+    met à jour la colonne JSON `skills` et la table de liaison. L'objet doit avoir un id
+    (flush préalable).
+    """
+    return set_skills_many([(owner, value)], owner_type)[0]
+
+
+def set_skills_many(items: List[Tuple[object, object]], owner_type: str) -> List[List[str]]:
+    """Comme `set_skills` pour plusieurs (objet, compétences), en trois requêtes pour tout le lot."""
+    canonical = [(owner, canonicalize_skills(value)) for owner, value in items]
+    for owner, skills in canonical:
+        owner.skills = json.dumps([name for _, name in skills], ensure_ascii=False)
+    replace_skill_links(owner_type, {owner.id: skills for owner, skills in canonical})
+    return [[name for _, name in skills] for _, skills in canonical]
+
+
+def replace_skill_links(owner_type: str, skills_by_owner: Dict[int, List[Tuple[str, str]]]):
+    """Remplace les lignes de liaison de plusieurs propriétaires ({id: [(slug, nom)]})."""
+    if not skills_by_owner:
+        return
+    table, owner_column = OWNER_TABLES[owner_type]
+    names = {}
+    for skills in skills_by_owner.values():
+        for slug, name in skills:
+            names.setdefault(slug, name)
+
+    db.session.execute(delete(table).where(owner_column.in_(list(skills_by_owner))))
+    ids = get_or_create_skills(names.items())
+    links = {(owner_id, ids[slug]) for owner_id, skills in skills_by_owner.items() for slug, _ in skills}
+    if links:
+        db.session.execute(insert(table), [
+            {owner_column.name: owner_id, 'skill_id': skill_id} for owner_id, skill_id in links
+        ])
+
+
+def resolve_skill_ids(value) -> Dict[str, int]:
+    """Résout des noms de compétences (variantes acceptées) en {slug: skill_id} existants."""
+    slugs = [slug for slug, _ in canonicalize_skills(value)]
+    if not slugs:
+        return {}
+    found = dict(db.session.execute(select(Skill.slug, Skill.id).where(Skill.slug.in_(slugs))).all())
+    return {slug: found.get(slug) for slug in slugs}
+
+
+def filter_by_skills(query, owner_type: str, owner_id_column, value, mode: str = 'and'):
+    """
+    Restreint `query` aux propriétaires ayant toutes (mode 'and') ou au moins une
+    (mode 'or') des compétences demandées, via la table de liaison indexée.
+    """
+    resolved = resolve_skill_ids(value)
+    ids = [skill_id for skill_id in resolved.values() if skill_id is not None]
+    table, owner_column = OWNER_TABLES[owner_type]
+
+    if mode == 'and':
+        # Une compétence inconnue ne peut être possédée par personne
+        if not resolved or len(ids) < len(resolved):
+            return query.filter(False)
+        owners = select(owner_column).where(table.c.skill_id.in_(ids)).group_by(owner_column).having(
+            func.count() == len(ids)
+        )
+    else:
+        if not ids:
+            return query.filter(False)
+        owners = select(owner_column).where(table.c.skill_id.in_(ids))
+
+    return query.filter(owner_id_column.in_(owners))
+
+
+def backfill_skills(model, owner_type: str, chunk_size: int = 500) -> int:
+    """Canonicalise les compétences existantes et remplit la table de liaison, par blocs."""
+    count = 0
+    last_id = 0
+    while True:
+        owners = model.query.filter(model.id > last_id).order_by(model.id).limit(chunk_size).all()
+        if not owners:
+            return count
+        for owner in owners:
+            set_skills(owner, owner.skills, owner_type)
+        db.session.commit()
+        count += len(owners)
+        last_id = owners[-1].id
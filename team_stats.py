@@ -0,0 +1,147 @@
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, case, func, select
+from src.models.user import db
+from src.models.employee import Employee
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fenêtre des départs récents (employés passés inactifs ou sortis)
+DEPARTURE_WINDOW_DAYS = int(os.getenv('TEAM_STATS_DEPARTURE_WINDOW_DAYS', '365'))
+LEAVER_STATUSES = ('inactive', 'terminated')
+SALARY_PERCENTILES = (10, 25, 50, 75, 90)
+# Tranches d'ancienneté en années: (libellé, borne basse incluse, borne haute exclue)
+TENURE_BUCKETS = (('<1', 0, 1), ('1-3', 1, 3), ('3-5', 3, 5), ('5+', 5, None))
+
+
+def _years_before(day: date, years: float) -> date:
+    return day - timedelta(days=round(365.25 * years))
+
+
+def _tenure_years(hire_date: Optional[date], today: date) -> Optional[float]:
+    return round((today - hire_date).days / 365.25, 1) if hire_date else None
+
+
+class TeamStatsProvider:
+    """
+    Statistiques d'équipe (département) calculées par agrégats SQL: effectif, percentiles
+    de salaire, répartition de l'ancienneté, moyenne et écart-type de performance, départs
+    récents. Le résumé a une taille fixe, quel que soit l'effectif du département.
+    """
+
+    def department_version(self, department: str) -> Tuple[int, Optional[str]]:
+        """
+        Version des données d'un département: (nombre d'employés, dernière mise à jour).
+        Toute création, modification ou suppression d'un employé du département la fait changer.
+        """
+        count, last_update = db.session.execute(
+            select(func.count(Employee.id), func.max(Employee.updated_at)).where(
+                Employee.department == department
+            )
+        ).one()
+        return int(count), last_update.isoformat() if last_update else None
+
+    def _percentiles(self, column, percentiles: Sequence[int], filters: List) -> Dict[int, object]:
+        """Percentiles (rang le plus proche) d'une colonne, en une requête à fonctions de fenêtre."""
+        ranked = select(
+            column.label('value'),
+            func.row_number().over(order_by=column).label('rank'),
+            func.count().over().label('total')
+        ).where(column.is_not(None), *filters).subquery()
+        # Rang du percentile p: ceil(p * n / 100), en division entière portable
+        row = db.session.execute(select(*[
+            func.max(case((ranked.c.rank == (ranked.c.total * p + 99) // 100, ranked.c.value)))
+            for p in percentiles
+        ])).one()
+        return dict(zip(percentiles, row))
+
+    def summary(self, department: str, employee: Employee = None, today: date = None) -> Dict:
+        """
+        Résumé de l'équipe d'un département. Si `employee` est donné, il est exclu des
+        statistiques et sa position dans l'équipe (percentile de salaire, écart de
+        performance, ancienneté) est ajoutée sous 'employee_position'.
+        """
+        today = today or date.today()
+        same_team = [Employee.department == department]
+        if employee is not None and employee.id is not None:
+            same_team.append(Employee.id != employee.id)
+        active = Employee.status == 'active'
+        departed_since = datetime.combine(today - timedelta(days=DEPARTURE_WINDOW_DAYS), datetime.min.time())
+
+        def count_if(*conditions):
+            return func.sum(case((and_(*conditions), 1), else_=0))
+
+        columns = [
+            count_if(active).label('headcount'),
+            func.avg(case((active, Employee.performance_score))).label('performance_mean'),
+            func.avg(case((active, Employee.performance_score * Employee.performance_score))).label('performance_square'),
+            count_if(Employee.status.in_(LEAVER_STATUSES), Employee.updated_at >= departed_since).label('departures'),
+        ]
+        for label, low, high in TENURE_BUCKETS:
+            conditions = [active, Employee.hire_date <= _years_before(today, low)]
+            if high is not None:
+                conditions.append(Employee.hire_date > _years_before(today, high))
+            columns.append(count_if(*conditions).label(f'tenure_{low}'))
+        if employee is not None and employee.salary is not None:
+            columns.append(count_if(active, Employee.salary < employee.salary).label('salary_below'))
+            columns.append(count_if(active, Employee.salary.is_not(None)).label('salary_count'))
+
+        row = db.session.execute(select(*columns).where(*same_team)).one()
+        headcount = int(row.headcount or 0)
+        departures = int(row.departures or 0)
+
+        performance = None
+        if row.performance_mean is not None:
+            mean = float(row.performance_mean)
+            # Écart-type de population: sqrt(E[x²] - E[x]²), SQLite n'ayant pas de stddev
+            variance = max(0.0, float(row.performance_square) - mean * mean)
+            performance = {'mean': round(mean, 2), 'stddev': round(variance ** 0.5, 2)}
+
+        salaries = self._percentiles(Employee.salary, SALARY_PERCENTILES, same_team + [active])
+        median_hire_date = self._percentiles(Employee.hire_date, (50,), same_team + [active])[50]
+        if isinstance(median_hire_date, str):
+            median_hire_date = date.fromisoformat(median_hire_date)
+
+        summary = {
+            'department': department,
+            'headcount': headcount,
+            'salary_percentiles': {
+                f'p{p}': round(float(value), 2) for p, value in salaries.items() if value is not None
+            },
+            'tenure_years': {
+                'median': _tenure_years(median_hire_date, today),
+                'distribution': {label: int(getattr(row, f'tenure_{low}') or 0) for label, low, _ in TENURE_BUCKETS}
+            },
+            'performance': performance,
+            'recent_departures': {
+                'window_days': DEPARTURE_WINDOW_DAYS,
+                'count': departures,
+                'rate': round(departures / (headcount + departures), 3) if headcount + departures else 0.0
+            }
+        }
+
+        if employee is not None:
+            position = {'tenure_years': _tenure_years(employee.hire_date, today)}
+            if employee.salary is not None and row.salary_count:
+                position['salary_percentile'] = round(100.0 * row.salary_below / row.salary_count, 1)
+            if performance and employee.performance_score is not None:
+                position['performance_vs_team'] = round(employee.performance_score - performance['mean'], 2)
+            summary['employee_position'] = position
+        return summary
+
+
+_default_provider = None
+_default_provider_lock = threading.Lock()
+
+
+def get_team_stats_provider() -> TeamStatsProvider:
+    """Retourne le fournisseur de statistiques d'équipe partagé du processus."""
+    global _default_provider
+    if _default_provider is None:
+        with _default_provider_lock:
+            if _default_provider is None:
+                _default_provider = TeamStatsProvider()
+    return _default_provider
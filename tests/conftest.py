@@ -0,0 +1,44 @@
+import importlib.util
+import os
+import sys
+import types
+import pytest
+
+# Arborescence à plat: les modules src.models.*, src.services.*, src.routes.* et
+# src.scripts.* sont les fichiers de la racine du backend
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('OPENAI_API_KEY', 'sk-test')
+
+
+def _alias_packages():
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    if importlib.util.find_spec('src') is not None:
+        return
+    for name in ('src', 'src.models', 'src.services', 'src.routes', 'src.scripts'):
+        package = types.ModuleType(name)
+        package.__path__ = [BACKEND_DIR]
+        sys.modules[name] = package
+        parent, _, child = name.rpartition('.')
+        if parent:
+            setattr(sys.modules[parent], child, package)
+
+
+_alias_packages()
+
+
+@pytest.fixture
+def app():
+    """Application Flask minimale sur une base SQLite en mémoire."""
+    from flask import Flask
+    from src.models.user import db
+    from src.models import candidate, document, employee, job, skill  # noqa: F401 (tables à créer)
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
@@ -0,0 +1,28 @@
+import asyncio
+import concurrent.futures
+import threading
+import pytest
+from src.services.async_ai_service import EventLoopThread
+
+
+def test_timed_out_coroutine_is_cancelled_and_releases_its_slot():
+    loop_thread = EventLoopThread()
+    semaphore = asyncio.Semaphore(1)
+    cancelled = threading.Event()
+
+    async def slow_call():
+        async with semaphore:
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+    async def fast_call():
+        async with semaphore:
+            return 'ok'
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        loop_thread.run(slow_call(), timeout=0.1)
+    assert cancelled.wait(2)
+    assert loop_thread.run(fast_call(), timeout=2) == 'ok'
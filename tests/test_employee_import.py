@@ -0,0 +1,60 @@
+import io
+import json
+from src.models.user import db
+from src.models.employee import Employee
+from src.services.employee_import import EmployeeImporter
+
+
+def _row(code: str, manager: str = None) -> dict:
+    row = {
+        'employee_id': code, 'first_name': 'Prénom', 'last_name': code, 'email': f'{code.lower()}@example.com',
+        'position': 'Manager', 'department': 'RH', 'hire_date': '2020-01-01'
+    }
+    if manager:
+        row['manager_employee_id'] = manager
+    return row
+
+
+def _import(rows, chunk_size: int = 1000) -> dict:
+    importer = EmployeeImporter(chunk_size=chunk_size)
+    importer.import_stream(io.StringIO('\n'.join(json.dumps(row) for row in rows)), 'ndjson')
+    return importer.finish()
+
+
+def _managers() -> dict:
+    codes = dict(db.session.query(Employee.id, Employee.employee_id).all())
+    return {code: codes.get(manager_id) for code, manager_id in
+            db.session.query(Employee.employee_id, Employee.manager_id).all()}
+
+
+def test_managers_referencing_each_other_are_rejected(app):
+    stats = _import([_row('M1', 'M2'), _row('M2', 'M1')])
+
+    assert stats['created'] == 2
+    assert stats['errors'] == 1
+    assert stats['error_report'][0]['employee_id'] == 'M2'
+    assert 'cycle' in stats['error_report'][0]['error']
+    assert _managers() == {'M1': 'M2', 'M2': None}
+
+
+def test_cycle_through_a_deferred_manager_is_rejected(app):
+    # M2 n'existe pas encore quand la ligne de M1 est importée: rattachement résolu par finish()
+    stats = _import([_row('M1', 'M2'), _row('M2', 'M1')], chunk_size=1)
+
+    assert [error['employee_id'] for error in stats['error_report']] == ['M1']
+    assert _managers() == {'M1': None, 'M2': 'M1'}
+
+
+def test_cycle_within_a_chunk_is_rejected(app):
+    stats = _import([_row('A', 'C'), _row('B', 'A'), _row('C', 'B')])
+
+    assert [error['row'] for error in stats['error_report']] == [3]
+    assert _managers() == {'A': 'C', 'B': 'A', 'C': None}
+
+
+def test_cycle_with_the_existing_hierarchy_is_rejected(app):
+    _import([_row('D'), _row('E', 'D'), _row('F', 'E')])
+    stats = _import([_row('D', 'F'), _row('G', 'F')], chunk_size=1)
+
+    assert [error['employee_id'] for error in stats['error_report']] == ['D']
+    assert _managers() == {'D': None, 'E': 'D', 'F': 'E', 'G': 'F'}
@@ -0,0 +1,103 @@
+import pytest
+from src.services import llm_cache
+from src.services.llm_cache import LLMCache, MemoryLRUTier, SQLiteTier, make_cache_key, normalize_prompt
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def test_prompt_whitespace_does_not_change_the_key():
+    indented = """
+        Analysez ce CV:
+            Python, SQL
+    """
+    assert normalize_prompt(indented) == 'Analysez ce CV: Python, SQL'
+    assert make_cache_key('analyze_resume', 'gpt-4', 0.3, indented) == \
+        make_cache_key('analyze_resume', 'gpt-4', 0.3, 'Analysez ce CV: Python, SQL')
+
+
+def test_key_depends_on_method_model_and_temperature():
+    key = make_cache_key('analyze_resume', 'gpt-4', 0.3, 'prompt')
+    assert key != make_cache_key('generate_job_description', 'gpt-4', 0.3, 'prompt')
+    assert key != make_cache_key('analyze_resume', 'gpt-4o-mini', 0.3, 'prompt')
+    assert key != make_cache_key('analyze_resume', 'gpt-4', 0.7, 'prompt')
+    assert key == make_cache_key('analyze_resume', 'gpt-4', 0.3000001, 'prompt')
+
+
+def test_lru_evicts_least_recently_used():
+    tier = MemoryLRUTier(max_entries=2)
+    tier.set('a', 1, 60)
+    tier.set('b', 2, 60)
+    assert tier.get('a') == 1  # 'a' devient le plus récent
+    tier.set('c', 3, 60)
+
+    assert tier.get('b') is llm_cache._MISSING
+    assert tier.get('a') == 1
+    assert tier.get('c') == 3
+    assert tier.evictions == 1
+
+
+def test_memory_tier_returns_copies():
+    tier = MemoryLRUTier()
+    tier.set('k', {'skills': ['Python']}, 60)
+    tier.get('k')['skills'].append('SQL')
+    assert tier.get('k') == {'skills': ['Python']}
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = LLMCache(ttls={'analyze_resume': 10})
+    cache.set('analyze_resume', 'k', {'score': 80})
+    clock[0] += 9
+    assert cache.get('analyze_resume', 'k') == {'score': 80}
+    clock[0] += 2
+    assert cache.get('analyze_resume', 'k') is None
+
+
+def test_ttl_zero_disables_the_cache_for_a_method():
+    cache = LLMCache()
+    assert cache.ttl_for('chatbot_response') == 0
+    cache.set('chatbot_response', 'k', 'Bonjour')
+    assert cache.get('chatbot_response', 'k') is None
+    assert len(cache.memory) == 0
+
+
+def test_stats_count_hits_and_misses():
+    cache = LLMCache()
+    cache.get('analyze_resume', 'k')
+    cache.set('analyze_resume', 'k', {'score': 80})
+    cache.get('analyze_resume', 'k')
+    cache.get('analyze_resume', 'k', count=False)
+
+    stats = cache.stats()
+    assert stats['by_method']['analyze_resume'] == {'memory_hits': 1, 'persistent_hits': 0, 'misses': 1}
+    assert stats['hit_rate'] == 0.5
+
+
+def test_sqlite_tier_persists_across_instances(tmp_path):
+    path = str(tmp_path / 'cache' / 'llm_cache.db')
+    SQLiteTier(path).set('k', {'score': 80}, 60, 'analyze_resume')
+
+    cache = LLMCache(persistent_tier=SQLiteTier(path))
+    assert cache.get('analyze_resume', 'k') == {'score': 80}
+    assert cache.get('analyze_resume', 'k') == {'score': 80}
+    assert cache.stats()['by_method']['analyze_resume'] == {'memory_hits': 1, 'persistent_hits': 1, 'misses': 0}
+
+
+def test_sqlite_tier_expiry_and_eviction(tmp_path, clock):
+    tier = SQLiteTier(str(tmp_path / 'llm_cache.db'), max_entries=2)
+    tier.set('a', 1, 10)
+    clock[0] += 1
+    tier.set('b', 2, 0)  # sans expiration
+    clock[0] += 1
+    tier.get('a')  # 'a' devient le plus récemment utilisé
+    clock[0] += 1
+    tier.set('c', 3, 10)
+
+    assert tier.get('b') is llm_cache._MISSING
+    assert tier.get('c') == 3
+    clock[0] += 20
+    assert tier.get('a') is llm_cache._MISSING
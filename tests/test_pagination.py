@@ -0,0 +1,71 @@
+import pytest
+from src.models.user import db
+from src.models.candidate import Candidate
+from src.services.pagination import CursorError, encode_cursor, keyset_page
+
+
+@pytest.fixture
+def candidates(app):
+    """Candidats 1 à 7: scores 90, 80, 80, 70, puis trois sans score."""
+    scores = [90, 80, 80, 70, None, None, None]
+    for number, score in enumerate(scores, start=1):
+        db.session.add(Candidate(
+            id=number, first_name='Prénom', last_name=f'Nom{number}',
+            email=f'candidat{number}@example.com', ai_score=score
+        ))
+    db.session.flush()
+    # ai_score=None à l'insertion prendrait la valeur par défaut (0.0)
+    Candidate.query.filter(Candidate.id > 4).update({'ai_score': None})
+    db.session.commit()
+
+
+def _pages(per_page: int, cursor=None):
+    """Parcourt la liste complète; retourne les ids de chaque page."""
+    pages = []
+    while True:
+        page = keyset_page(Candidate.query, 'candidates', Candidate.id, cursor, per_page,
+                           sort_column=Candidate.ai_score)
+        pages.append([candidate.id for candidate in page['items']])
+        assert page['has_more'] == (page['next_cursor'] is not None)
+        if not page['has_more']:
+            return pages
+        cursor = page['next_cursor']
+
+
+def test_pages_follow_score_then_id_with_null_scores_last(candidates):
+    assert _pages(2) == [[1, 3], [2, 4], [7, 6], [5]]
+
+
+def test_page_crossing_into_null_scores(candidates):
+    assert _pages(3) == [[1, 3, 2], [4, 7, 6], [5]]
+
+
+def test_cursor_inside_null_scores_continues_by_id(candidates):
+    assert _pages(2, encode_cursor('candidates', [None, 6])) == [[5]]
+
+
+def test_has_more_is_false_at_the_exact_page_boundary(candidates):
+    assert _pages(7) == [[1, 3, 2, 4, 7, 6, 5]]
+    assert _pages(6) == [[1, 3, 2, 4, 7, 6], [5]]
+
+
+def test_last_scored_row_ends_a_page_before_null_scores(candidates):
+    assert _pages(4) == [[1, 3, 2, 4], [7, 6, 5]]
+
+
+def test_ascending_order_puts_null_scores_last(candidates):
+    page = keyset_page(Candidate.query, 'candidates', Candidate.id, None, 10,
+                       sort_column=Candidate.ai_score, descending=False)
+    assert [candidate.id for candidate in page['items']] == [4, 2, 3, 1, 5, 6, 7]
+
+
+@pytest.mark.parametrize('cursor', ['pas-un-curseur', '!!!', encode_cursor('candidates', [80])])
+def test_invalid_cursor_is_rejected(candidates, cursor):
+    with pytest.raises(CursorError):
+        keyset_page(Candidate.query, 'candidates', Candidate.id, cursor, 2, sort_column=Candidate.ai_score)
+
+
+def test_cursor_from_another_list_is_rejected(candidates):
+    cursor = encode_cursor('job_postings', [80, 2])
+    with pytest.raises(CursorError):
+        keyset_page(Candidate.query, 'candidates', Candidate.id, cursor, 2, sort_column=Candidate.ai_score)
@@ -0,0 +1,131 @@
+import httpx
+import openai
+import pytest
+from src.services import resilience
+from src.services.resilience import CircuitBreaker, CircuitOpenError, DeadlineExceededError, ResiliencePolicy, RetryBudget
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(resilience.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(resilience.time, 'sleep', lambda seconds: now.__setitem__(0, now[0] + seconds))
+    return now
+
+
+def _connection_error():
+    return openai.APIConnectionError(request=httpx.Request('POST', 'http://localhost/v1/chat/completions'))
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker('gpt-4', failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+    assert breaker.to_dict()['short_circuited'] == 1
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker('gpt-4', failure_threshold=3)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = CircuitBreaker('gpt-4', failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 29
+    assert not breaker.allow()
+
+    clock[0] += 1
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+    assert not breaker.allow()  # un seul appel d'essai à la fois
+
+
+def test_successful_probe_closes_the_breaker(clock):
+    breaker = CircuitBreaker('gpt-4', failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker('gpt-4', failure_threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert breaker.to_dict()['retry_in_seconds'] == 30.0
+
+
+def test_retry_budget_is_refilled_by_calls():
+    budget = RetryBudget(ratio=0.5, max_tokens=2)
+    assert budget.try_withdraw() and budget.try_withdraw()
+    assert not budget.try_withdraw()
+    budget.deposit()
+    assert not budget.try_withdraw()
+    budget.deposit()
+    assert budget.try_withdraw()
+
+
+def test_retries_stop_when_the_budget_is_exhausted(clock):
+    policy = ResiliencePolicy(max_retries=5, retry_budget=RetryBudget(ratio=0.0, max_tokens=1), failure_threshold=10)
+    attempts = []
+
+    def failing(timeout):
+        attempts.append(timeout)
+        raise _connection_error()
+
+    with pytest.raises(openai.APIConnectionError):
+        policy.call('gpt-4', failing, clock[0] + 60)
+
+    assert len(attempts) == 2  # appel initial + un seul retry financé par le budget
+    stats = policy.stats()
+    assert (stats['retries'], stats['budget_exhausted'], stats['failures']) == (1, 1, 2)
+
+
+def test_retries_succeed_within_the_budget(clock):
+    policy = ResiliencePolicy(max_retries=2)
+    attempts = []
+
+    def flaky(timeout):
+        attempts.append(timeout)
+        if len(attempts) < 3:
+            raise _connection_error()
+        return 'ok'
+
+    assert policy.call('gpt-4', flaky, clock[0] + 60) == 'ok'
+    assert len(attempts) == 3
+    assert policy.breaker('gpt-4').state == 'closed'
+
+
+def test_open_breaker_short_circuits_calls(clock):
+    policy = ResiliencePolicy(failure_threshold=1, max_retries=3)
+
+    def failing(timeout):
+        raise _connection_error()
+
+    with pytest.raises(openai.APIConnectionError):
+        policy.call('gpt-4', failing, clock[0] + 60)
+    with pytest.raises(CircuitOpenError):
+        policy.call('gpt-4', lambda timeout: 'ok', clock[0] + 60)
+
+
+def test_expired_deadline_raises_before_calling(clock):
+    policy = ResiliencePolicy()
+    with pytest.raises(DeadlineExceededError):
+        policy.call('gpt-4', lambda timeout: 'ok', clock[0] - 1)
+    assert policy.stats()['deadline_exceeded'] == 1
@@ -0,0 +1,77 @@
+import io
+import pytest
+from src.models.user import db
+from src.models.job import AIJob
+from src.services import job_queue
+from src.services.job_queue import PermanentJobError, enqueue, run_job
+from src.services.resume_extraction import ExtractionError, UploadError, extract_text, stream_upload
+
+
+def _multipart(filename: str, content: bytes):
+    boundary = 'frontiere'
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="resume"; filename="{filename}"\r\n'
+        f'Content-Type: application/octet-stream\r\n\r\n'
+    ).encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+    return io.BytesIO(body), f'multipart/form-data; boundary={boundary}'
+
+
+def test_doc_upload_is_rejected(tmp_path):
+    stream, content_type = _multipart('cv.doc', b'\xd0\xcf\x11\xe0')
+    with pytest.raises(UploadError) as error:
+        stream_upload(stream, content_type, str(tmp_path))
+    assert error.value.status_code == 400
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_pdf_without_text_layer_is_an_extraction_error(tmp_path):
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    writer.add_blank_page(width=595, height=842)
+    path = tmp_path / 'scan.pdf'
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+    with pytest.raises(ExtractionError):
+        extract_text(str(path))
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    monkeypatch.setitem(job_queue.JOB_HANDLERS, 'test_job', None)
+
+    def register(func):
+        job_queue.JOB_HANDLERS['test_job'] = func
+    return register
+
+
+def _run(job_id: int) -> AIJob:
+    job = db.session.get(AIJob, job_id)
+    job.attempts += 1
+    job.status = 'running'
+    db.session.commit()
+    run_job(job)
+    return db.session.get(AIJob, job_id)
+
+
+def test_permanent_error_fails_the_job_without_retry(app, handler):
+    def unreadable(target_id, payload):
+        raise PermanentJobError('Aucun texte extrait du document (PDF scanné ?)')
+    handler(unreadable)
+    job_id = enqueue('test_job', 1).id
+    db.session.commit()
+
+    job = _run(job_id)
+    assert (job.status, job.attempts) == ('failed', 1)
+    assert 'PDF scanné' in job.last_error
+
+
+def test_other_errors_are_retried(app, handler):
+    def flaky(target_id, payload):
+        raise ValueError('quota')
+    handler(flaky)
+    job_id = enqueue('test_job', 1).id
+    db.session.commit()
+
+    job = _run(job_id)
+    assert (job.status, job.attempts) == ('pending', 1)
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import Column, MetaData, Table, inspect, text
+from src.models.user import db
+from src.services import schema_upgrade
+from src.services.schema_upgrade import ensure_schema
+
+
+def _recreate_without(table_name: str, dropped):
+    """Remplace une table par sa version antérieure (sans les colonnes `dropped` ni ses index)."""
+    db.session.execute(text(f'DROP TABLE {table_name}'))
+    db.session.commit()
+    legacy = MetaData()
+    Table(table_name, legacy, *[
+        Column(column.name, column.type, primary_key=column.primary_key)
+        for column in db.metadata.tables[table_name].columns if column.name not in dropped
+    ])
+    legacy.create_all(db.engine)
+
+
+def _columns(table_name: str):
+    return {column['name'] for column in inspect(db.engine).get_columns(table_name)}
+
+
+def _indexes(table_name: str):
+    return {index['name'] for index in inspect(db.engine).get_indexes(table_name)}
+
+
+def test_missing_columns_and_indexes_are_added(app):
+    for table_name, columns in schema_upgrade.ADDED_COLUMNS.items():
+        _recreate_without(table_name, columns)
+        db.session.execute(text(f'INSERT INTO {table_name} (id) VALUES (1)'))
+    for name in schema_upgrade.ADDED_INDEXES:
+        db.session.execute(text(f'DROP INDEX IF EXISTS {name}'))
+    db.session.commit()
+
+    added = ensure_schema()
+
+    for table_name, columns in schema_upgrade.ADDED_COLUMNS.items():
+        assert set(columns) <= _columns(table_name)
+        assert db.session.execute(text(f'SELECT count(*) FROM {table_name}')).scalar() == 1
+    for name in schema_upgrade.ADDED_INDEXES:
+        assert name in added
+        assert name in _indexes(schema_upgrade._find_index(name).table.name)
+
+
+def test_ensure_schema_is_idempotent(app):
+    ensure_schema()
+    assert ensure_schema() == []
+
+
+def test_unknown_index_is_reported(app, monkeypatch):
+    monkeypatch.setattr(schema_upgrade, 'ADDED_INDEXES', ('ix_inconnu',))
+    with pytest.raises(ValueError):
+        ensure_schema()
@@ -0,0 +1,126 @@
+import threading
+import time
+import pytest
+from src.services.resilience import reset_request_deadline, set_request_deadline
+from src.services.singleflight import SingleFlight, SQLiteLockTable
+
+
+def _start_leader(flights, key, release, result='leader'):
+    """Lance un appel leader qui ne se termine qu'à `release`."""
+    started = threading.Event()
+
+    def call():
+        started.set()
+        release.wait(5)
+        return result
+
+    thread = threading.Thread(target=flights.do, args=(key, call))
+    thread.start()
+    assert started.wait(2)
+    return thread
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def call():
+        calls.append(1)
+        release.wait(5)
+        return {'score': 80}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do('k', call))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [{'score': 80}] * 5
+    assert results[0] is not results[1]  # chaque appelant reçoit sa copie
+    stats = flights.stats()
+    assert (stats['leaders'], stats['coalesced'], stats['in_flight']) == (1, 4, 0)
+
+
+def test_followers_receive_the_leader_error():
+    flights = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        release.wait(5)
+        raise ValueError('quota')
+
+    def leader():
+        try:
+            flights.do('k', failing)
+        except ValueError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    time.sleep(0.1)
+    threading.Timer(0.1, release.set).start()
+    with pytest.raises(ValueError):
+        flights.do('k', lambda: 'jamais appelé')
+    thread.join(5)
+    assert len(errors) == 1
+
+
+def test_follower_wait_is_bounded_by_the_call_deadline():
+    flights = SingleFlight(wait_timeout=60)
+    release = threading.Event()
+    leader = _start_leader(flights, 'k', release)
+    try:
+        started = time.monotonic()
+        assert flights.do('k', lambda: 'follower', deadline=time.monotonic() + 0.3) == 'follower'
+        assert time.monotonic() - started < 1
+        assert flights.stats()['wait_timeouts'] == 1
+    finally:
+        release.set()
+        leader.join(5)
+
+
+def test_follower_wait_is_bounded_by_the_request_deadline():
+    flights = SingleFlight(wait_timeout=60)
+    release = threading.Event()
+    leader = _start_leader(flights, 'k', release)
+    token = set_request_deadline(0.3)
+    try:
+        started = time.monotonic()
+        assert flights.do('k', lambda: 'follower') == 'follower'
+        assert time.monotonic() - started < 1
+    finally:
+        reset_request_deadline(token)
+        release.set()
+        leader.join(5)
+
+
+def test_cross_process_follower_reads_the_shared_result(tmp_path):
+    path = str(tmp_path / 'locks.db')
+    cache = {}
+    other_process = SQLiteLockTable(path)
+    assert other_process.acquire('k', 'autre-processus', 30)
+    threading.Timer(0.3, lambda: cache.update(k='leader')).start()
+
+    flights = SingleFlight(SQLiteLockTable(path), poll_interval=0.05)
+    result = flights.do('k', lambda: 'appel dupliqué', lookup=lambda: cache.get('k'))
+
+    assert result == 'leader'
+    assert flights.stats()['coalesced_cross_process'] == 1
+
+
+def test_cross_process_wait_is_bounded_by_the_call_deadline(tmp_path):
+    path = str(tmp_path / 'locks.db')
+    assert SQLiteLockTable(path).acquire('k', 'autre-processus', 30)
+
+    flights = SingleFlight(SQLiteLockTable(path), wait_timeout=60, poll_interval=0.05)
+    started = time.monotonic()
+    result = flights.do('k', lambda: 'follower', lookup=lambda: None, deadline=time.monotonic() + 0.3)
+
+    assert result == 'follower'
+    assert time.monotonic() - started < 1
@@ -0,0 +1,11 @@
+from src.services.skills import canonical_skill, canonicalize_skills, skill_slug
+
+
+def test_leading_dot_is_kept():
+    assert canonicalize_skills(['.NET']) == [('.net', '.NET')]
+    assert canonicalize_skills(['dotnet', '.net']) == [('.net', '.NET')]
+
+
+def test_trailing_and_separator_punctuation_is_stripped():
+    assert skill_slug(' - Python. ') == 'python'
+    assert canonical_skill('(Docker),') == ('docker', 'Docker')
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from src.models.user import db
+from src.models.employee import Employee, TurnoverRiskAssessment
+from src.services.ai_service import AIService
+from src.services.llm_cache import LLMCache
+from src.services.team_stats import TeamStatsProvider, get_team_stats_provider
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Les statistiques dépendent aussi de la date (ancienneté, fenêtre des départs):
+# au-delà de cet âge, une prédiction enregistrée est recalculée même sans changement
+TURNOVER_RISK_MAX_AGE_DAYS = int(os.getenv('TURNOVER_RISK_MAX_AGE_DAYS', '30'))
+
+
+def risk_fingerprint(employee: Employee, department_version) -> str:
+    """Empreinte de l'employé et de la version des données de son département."""
+    payload = json.dumps([
+        employee.id,
+        employee.updated_at.isoformat() if employee.updated_at else None,
+        employee.department,
+        list(department_version)
+    ])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def stored_assessment(employee_id: int, fingerprint: str, high_stakes: bool) -> Optional[TurnoverRiskAssessment]:
+    """Prédiction enregistrée, si elle est encore valide (et issue du modèle fort si demandé)."""
+    assessment = db.session.get(TurnoverRiskAssessment, employee_id)
+    if assessment is None or assessment.fingerprint != fingerprint:
+        return None
+    if high_stakes and not assessment.high_stakes:
+        return None
+    if assessment.computed_at < datetime.utcnow() - timedelta(days=TURNOVER_RISK_MAX_AGE_DAYS):
+        return None
+    return assessment
+
+
+class TurnoverRiskPredictor:
+    """
+    Risque de turnover d'un employé. Le prompt reçoit un résumé de taille fixe de l'équipe
+    (TeamStatsProvider) au lieu de la liste des collègues. Le résultat est enregistré par
+    employé et resservi tant que ses données et celles de son département ne changent pas.
+    """
+
+    def __init__(self, ai_service: AIService = None, team_stats: TeamStatsProvider = None):
+        self.ai_service = ai_service or AIService()
+        self.team_stats = team_stats or get_team_stats_provider()
+        self._refreshing_service = None
+
+    def _service(self, refresh: bool) -> AIService:
+        if not refresh:
+            return self.ai_service
+        if self._refreshing_service is None:
+            # Un recalcul explicite ne doit pas resservir la réponse du cache LLM
+            self._refreshing_service = AIService(
+                cache=LLMCache(ttls={'predict_turnover_risk': 0}),
+                raise_errors=self.ai_service.raise_errors
+            )
+        return self._refreshing_service
+
+    def predict(self, employee: Employee, high_stakes: bool = False, refresh: bool = False) -> Dict:
+        """
+        Retourne {'risk', 'team_stats', 'cached', 'computed_at'}.
+        La nouvelle prédiction est ajoutée à la session (validation par l'appelant);
+        la réponse par défaut renvoyée en cas d'échec de l'IA n'est jamais enregistrée.
+        """
+        fingerprint = risk_fingerprint(employee, self.team_stats.department_version(employee.department))
+        assessment = None if refresh else stored_assessment(employee.id, fingerprint, high_stakes)
+        if assessment is not None:
+            return {
+                'risk': json.loads(assessment.result),
+                'team_stats': json.loads(assessment.team_stats) if assessment.team_stats else None,
+                'cached': True,
+                'computed_at': assessment.computed_at
+            }
+
+        team_stats = self.team_stats.summary(employee.department, employee)
+        risk = self._service(refresh).predict_turnover_risk(employee.to_dict(), team_stats, high_stakes=high_stakes)
+        computed_at = None
+        if 'ai_model' in risk:
+            assessment = db.session.get(TurnoverRiskAssessment, employee.id) or TurnoverRiskAssessment(
+                employee_id=employee.id
+            )
+            assessment.fingerprint = fingerprint
+            assessment.result = json.dumps(risk, ensure_ascii=False)
+            assessment.team_stats = json.dumps(team_stats, ensure_ascii=False)
+            assessment.high_stakes = high_stakes
+            assessment.computed_at = computed_at = datetime.utcnow()
+            db.session.add(assessment)
+
+        return {'risk': risk, 'team_stats': team_stats, 'cached': False, 'computed_at': computed_at}